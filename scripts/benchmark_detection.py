@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Benchmark HTTP honeypot threat detection per request.
+
+Runs a mix of benign requests, reconnaissance probes, scanner traffic and
+injection attempts with bodies of various sizes through the previous
+pattern-by-pattern detector, the precompiled ``ThreatMatcher`` and a
+``ThreatDetector`` with its verdict cache, checks that the old and new
+matchers report the same threat type and prints the time per request.
+"""
+import argparse
+import asyncio
+import random
+import re
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from tenebrinet.services.http.detection import (
+    SCANNER_SIGNATURES,
+    SUSPICIOUS_PATHS,
+    ThreatDetector,
+    ThreatMatcher,
+)
+
+
+# (path, query, body, user agent)
+Request = Tuple[str, str, Optional[str], str]
+
+BROWSER_UA = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/120.0 Safari/537.36"
+)
+
+# Signatures as the honeypot matched them before the matcher, one
+# ``re.search`` with IGNORECASE per pattern
+LEGACY_PATTERNS = {
+    "sql_injection": [
+        r"(\%27)|(\')|(\-\-)|(\%23)|(#)",
+        r"((\%3D)|(=))[^\n]*((\%27)|(\')|(\-\-)|(\%3B)|(;))",
+        r"\w*((\%27)|(\'))((\%6F)|o|(\%4F))((\%72)|r|(\%52))",
+        r"union.*select",
+        r"select.*from",
+        r"insert.*into",
+        r"drop.*table",
+        r"update.*set",
+        r"delete.*from",
+    ],
+    "xss": [
+        r"<script[^>]*>",
+        r"javascript:",
+        r"on\w+\s*=",
+        r"<img[^>]+onerror",
+        r"<svg[^>]+onload",
+    ],
+    "path_traversal": [
+        r"\.\./",
+        r"\.\.\\",
+        r"%2e%2e%2f",
+        r"%2e%2e/",
+        r"\.\.%2f",
+        r"/etc/passwd",
+        r"/etc/shadow",
+        r"c:\\windows",
+    ],
+    "command_injection": [
+        r";\s*\w+",
+        r"\|\s*\w+",
+        r"`[^`]+`",
+        r"\$\([^)]+\)",
+        r"&&\s*\w+",
+    ],
+    "lfi_rfi": [
+        r"(file|php|zip|data|expect|input|phar)://",
+        r"\.php\?",
+        r"include\s*\(",
+        r"require\s*\(",
+    ],
+}
+
+
+def legacy_classify(
+    path: str, query: str, body: Optional[str], user_agent: str
+) -> str:
+    """Return the threat type as the previous detector did."""
+    path = path.lower()
+    combined = f"{path}?{query.lower()}"
+    if body:
+        combined += f" {body.lower()}"
+
+    for threat_type, patterns in LEGACY_PATTERNS.items():
+        for pattern in patterns:
+            if re.search(pattern, combined, re.IGNORECASE):
+                return threat_type
+
+    for suspicious_path in SUSPICIOUS_PATHS:
+        if path.startswith(suspicious_path.lower()):
+            return "reconnaissance"
+
+    user_agent = user_agent.lower()
+    for scanner in SCANNER_SIGNATURES:
+        if scanner in user_agent:
+            return "scanner"
+
+    return "probe"
+
+
+def _form_body(rng: random.Random, size: int) -> str:
+    fields = []
+    while sum(len(field) + 1 for field in fields) < size:
+        name = rng.choice(["name", "message", "comment", "title", "text"])
+        words = " ".join(
+            rng.choice(["hello", "world", "lorem", "ipsum", "dolor", "amet"])
+            for _ in range(8)
+        )
+        fields.append(f"{name}{len(fields)}={words.replace(' ', '+')}")
+    return "&".join(fields)
+
+
+def build_requests(count: int, seed: int) -> List[Request]:
+    """Return a deterministic mix of honeypot requests."""
+    rng = random.Random(seed)
+    attacks = [
+        ("/index.php", "id=1' OR '1'='1", None),
+        ("/search", "q=1 UNION SELECT username,password FROM users", None),
+        ("/page", "q=<script>alert(1)</script>", None),
+        ("/download", "file=../../../../etc/passwd", None),
+        ("/ping", "host=127.0.0.1;cat+/etc/shadow", None),
+        ("/view", "page=php://filter/resource=index", None),
+    ]
+    requests: List[Request] = []
+    for _ in range(count):
+        kind = rng.random()
+        if kind < 0.35:
+            path = rng.choice(["/", "/index.html", "/about", "/blog/post"])
+            requests.append((path, "", None, BROWSER_UA))
+        elif kind < 0.55:
+            path = rng.choice(SUSPICIOUS_PATHS)
+            requests.append((path, "", None, BROWSER_UA))
+        elif kind < 0.65:
+            scanner = rng.choice(SCANNER_SIGNATURES)
+            requests.append(("/", "", None, f"Mozilla/5.00 ({scanner})"))
+        elif kind < 0.85:
+            path, query, body = rng.choice(attacks)
+            requests.append((path, query, body, BROWSER_UA))
+        else:
+            size = rng.choice([64, 512, 4096])
+            requests.append(
+                ("/contact", "", _form_body(rng, size), BROWSER_UA)
+            )
+    return requests
+
+
+def time_detector(
+    detect: Callable[[str, str, Optional[str], str], object],
+    requests: List[Request],
+    rounds: int,
+) -> float:
+    """Return the best time per request in microseconds."""
+    best = float("inf")
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for path, query, body, user_agent in requests:
+            detect(path, query, body, user_agent)
+        best = min(best, time.perf_counter() - started)
+    return best / len(requests) * 1e6
+
+
+async def time_cached_detector(
+    requests: List[Request], rounds: int
+) -> float:
+    """Return the best time per request of a detector with warm cache."""
+    largest = max(
+        len(path) + len(query) + len(body or "")
+        for path, query, body, _ in requests
+    )
+    # Everything inline, so every verdict is cacheable
+    detector = ThreatDetector(
+        matcher=ThreatMatcher(), inline_max_chars=largest
+    )
+    best = float("inf")
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for path, query, body, user_agent in requests:
+            await detector.classify(path, query, body, user_agent)
+        best = min(best, time.perf_counter() - started)
+    return best / len(requests) * 1e6
+
+
+def main(count: int, rounds: int, seed: int) -> None:
+    """Main entry point."""
+    requests = build_requests(count, seed)
+    matcher = ThreatMatcher()
+
+    mismatches = 0
+    verdicts: Dict[str, int] = {}
+    for request in requests:
+        expected = legacy_classify(*request)
+        actual = matcher.classify(*request)
+        verdicts[actual] = verdicts.get(actual, 0) + 1
+        if actual != expected:
+            mismatches += 1
+            print(f"  mismatch: {request!r}: {expected} != {actual}")
+
+    legacy = time_detector(legacy_classify, requests, rounds)
+    classify = time_detector(matcher.classify, requests, rounds)
+    match = time_detector(matcher.match, requests, rounds)
+    cached = asyncio.run(time_cached_detector(requests, rounds))
+
+    print(f"{count} requests, best of {rounds} rounds")
+    for threat_type, seen in sorted(verdicts.items()):
+        print(f"  {threat_type:<20} {seen}")
+    print(f"legacy detector          {legacy:8.2f} µs/request")
+    print(f"ThreatMatcher.classify   {classify:8.2f} µs/request")
+    print(f"ThreatMatcher.match      {match:8.2f} µs/request (all categories)")
+    print(f"ThreatDetector.classify  {cached:8.2f} µs/request (warm cache)")
+    print(f"speedup                  {legacy / classify:8.2f}x")
+    print(f"verdict mismatches       {mismatches}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--count", type=int, default=5000,
+        help="Number of requests in the mix (default: 5000)",
+    )
+    parser.add_argument(
+        "--rounds", type=int, default=5,
+        help="Timed passes over the mix (default: 5)",
+    )
+    parser.add_argument(
+        "--seed", type=int, default=1,
+        help="Random seed of the request mix (default: 1)",
+    )
+    args = parser.parse_args()
+    main(args.count, args.rounds, args.seed)
@@ -5,6 +5,7 @@ Seed database with sample attack data for demonstration purposes.
 This script populates the database with realistic attack examples
 so that the dashboard displays meaningful data immediately after deployment.
 """
+import argparse
 import asyncio
 import random
 from datetime import datetime, timedelta, timezone
@@ -12,8 +13,15 @@ from uuid import uuid4
 
 from sqlalchemy import select
 
-from tenebrinet.core.database import AsyncSessionLocal, init_db
+from tenebrinet.core.aggregates import StreamingAggregates
+from tenebrinet.core.credentials import apply_credential_pairs
+from tenebrinet.core.database import (
+    AsyncSessionLocal,
+    bulk_insert,
+    migrate_db,
+)
 from tenebrinet.core.models import Attack, Credential, Session
+from tenebrinet.core.rollups import apply_attack_rollups
 
 
 # Sample data pools
@@ -89,29 +97,40 @@ FTP_COMMANDS = [
 ]
 
 
-async def create_sample_attacks(num_attacks: int = 100) -> None:
+async def create_sample_attacks(
+    num_attacks: int = 100, batch_size: int = 10000
+) -> None:
     """
     Create sample attack records.
 
+    Rows are generated in chunks and written with ``bulk_insert``, which
+    uses COPY on PostgreSQL, so millions of synthetic rows can be loaded
+    for load tests.
+
     Args:
         num_attacks: Number of attack records to create
+        batch_size: Number of attacks written per transaction
     """
-    async with AsyncSessionLocal() as session:
-        print(f"Creating {num_attacks} sample attacks...")
+    print(f"Creating {num_attacks} sample attacks...")
+
+    # Generate attacks over the past 7 days
+    now = datetime.now(timezone.utc)
+    start_time = now - timedelta(days=7)
 
-        # Generate attacks over the past 7 days
-        now = datetime.now(timezone.utc)
-        start_time = now - timedelta(days=7)
+    # Seeded attacks bypass the event sink, so count them here
+    aggregates = StreamingAggregates(node_id="seed")
 
-        for i in range(num_attacks):
+    created = 0
+    while created < num_attacks:
+        attacks: list = []
+        credentials: list = []
+        sessions: list = []
+
+        for _ in range(min(batch_size, num_attacks - created)):
             # Random timestamp within the past week
             random_seconds = random.randint(0, 7 * 24 * 60 * 60)
             timestamp = start_time + timedelta(seconds=random_seconds)
 
-            # Random attacker
-            ip = random.choice(ATTACKER_IPS)
-            country = random.choice(COUNTRIES)
-
             # Random service
             service = random.choice(SERVICES)
 
@@ -128,55 +147,64 @@ async def create_sample_attacks(num_attacks: int = 100) -> None:
             else:
                 confidence = random.uniform(0.65, 0.90)
 
-            # Create attack
-            attack = Attack(
-                id=uuid4(),
-                timestamp=timestamp,
-                ip=ip,
-                port=random.choice([2222, 8080, 2121]),
-                service=service,
-                threat_type=threat_type,
-                confidence=confidence,
-                country=country,
-                payload=generate_payload(service, threat_type),
-                raw_data={"demo": True, "generated": True},
-            )
-
-            session.add(attack)
+            attack_id = uuid4()
+            attacks.append({
+                "id": attack_id,
+                "timestamp": timestamp,
+                "ip": random.choice(ATTACKER_IPS),
+                "service": service,
+                "threat_type": threat_type,
+                "confidence": confidence,
+                "country": random.choice(COUNTRIES),
+                "payload": {
+                    "data": generate_payload(service, threat_type),
+                    "demo": True,
+                },
+            })
 
             # Add credentials for SSH attacks
             if service == "ssh" and threat_type == "credential_attack":
-                num_attempts = random.randint(1, 5)
-                for _ in range(num_attempts):
-                    credential = Credential(
-                        id=uuid4(),
-                        attack_id=attack.id,
-                        username=random.choice(SSH_USERNAMES),
-                        password=random.choice(SSH_PASSWORDS),
-                        timestamp=timestamp
-                        + timedelta(seconds=random.randint(0, 60)),
-                    )
-                    session.add(credential)
+                for _ in range(random.randint(1, 5)):
+                    credentials.append({
+                        "id": uuid4(),
+                        "attack_id": attack_id,
+                        "username": random.choice(SSH_USERNAMES),
+                        "password": random.choice(SSH_PASSWORDS),
+                        "success": False,
+                    })
 
             # Add session data for successful logins (10% chance)
             if service == "ssh" and random.random() < 0.1:
-                session_obj = Session(
-                    id=uuid4(),
-                    attack_id=attack.id,
-                    start_time=timestamp,
-                    end_time=timestamp + timedelta(minutes=random.randint(1, 30)),
-                    commands=generate_session_commands(),
-                )
-                session.add(session_obj)
+                sessions.append({
+                    "id": uuid4(),
+                    "attack_id": attack_id,
+                    "start_time": timestamp,
+                    "end_time": timestamp
+                    + timedelta(minutes=random.randint(1, 30)),
+                    "commands": [
+                        {"cmd": cmd, "timestamp": timestamp.isoformat()}
+                        for cmd in generate_session_commands()
+                    ],
+                })
+
+        async with AsyncSessionLocal() as session:
+            await bulk_insert(session, Attack, attacks)
+            await apply_attack_rollups(session, attacks)
+            await bulk_insert(
+                session,
+                Credential,
+                await apply_credential_pairs(session, credentials, attacks),
+            )
+            await bulk_insert(session, Session, sessions)
+            await session.commit()
+        aggregates.observe(attacks)
+
+        created += len(attacks)
+        print(f"  Created {created}/{num_attacks} attacks...")
 
-            # Commit in batches
-            if (i + 1) % 20 == 0:
-                await session.commit()
-                print(f"  Created {i + 1}/{num_attacks} attacks...")
+    await aggregates.checkpoint()
 
-        # Final commit
-        await session.commit()
-        print(f"✅ Successfully created {num_attacks} sample attacks!")
+    print(f"✅ Successfully created {num_attacks} sample attacks!")
 
 
 def generate_payload(service: str, threat_type: str) -> str:
@@ -216,18 +244,18 @@ async def check_existing_data() -> bool:
         return result.scalar() is not None
 
 
-async def main():
+async def main(count: int, batch_size: int, assume_yes: bool) -> None:
     """Main entry point."""
     print("🌱 TenebriNET Database Seeder")
     print("=" * 50)
 
     # Initialize database
     print("Initializing database...")
-    await init_db()
+    await migrate_db()
 
     # Check for existing data
     has_data = await check_existing_data()
-    if has_data:
+    if has_data and not assume_yes:
         print("⚠️  Database already contains attack data.")
         response = input("Do you want to add more sample data? (y/N): ")
         if response.lower() != "y":
@@ -235,11 +263,25 @@ async def main():
             return
 
     # Create sample data
-    await create_sample_attacks(num_attacks=150)
+    await create_sample_attacks(num_attacks=count, batch_size=batch_size)
 
     print("\n✨ Database seeding complete!")
     print("You can now access the dashboard at http://localhost:8000")
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--count", type=int, default=150,
+        help="Number of attacks to create (default: 150)",
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=10000,
+        help="Attacks written per transaction (default: 10000)",
+    )
+    parser.add_argument(
+        "--yes", "-y", action="store_true",
+        help="Add data even if the database is not empty",
+    )
+    args = parser.parse_args()
+    asyncio.run(main(args.count, args.batch_size, args.yes))
@@ -0,0 +1,177 @@
+# tenebrinet/api/export.py
+"""
+Streaming bulk export of attacks.
+
+Rows are read through a server-side cursor (``stream_results`` with
+``yield_per``) and encoded one batch at a time, so memory use is bounded
+by the batch size however many rows are exported. NDJSON and CSV are
+always available; Parquet needs ``pyarrow`` (the ``export`` extra) and
+writes one row group per batch.
+"""
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Any, AsyncIterator, List, Sequence
+from uuid import UUID
+
+import structlog
+from sqlalchemy import Row, Select, select
+
+from tenebrinet.core import database
+from tenebrinet.core.archive import (
+    ATTACK_COLUMNS,
+    attack_schema,
+    attack_table,
+    pyarrow_available,
+)
+from tenebrinet.core.blobs import payload_blobs
+from tenebrinet.core.models import Attack
+
+
+logger = structlog.get_logger()
+
+EXPORT_BATCH_SIZE = 5000
+
+EXPORT_COLUMNS = ATTACK_COLUMNS
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def export_query() -> Select:
+    """Return the base export query over the export columns."""
+    return select(*(getattr(Attack, name) for name in EXPORT_COLUMNS))
+
+
+def parquet_available() -> bool:
+    """Return whether Parquet export is possible."""
+    return pyarrow_available()
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+async def stream_batches(
+    query: Select, batch_size: int = EXPORT_BATCH_SIZE
+) -> AsyncIterator[Sequence[Row]]:
+    """
+    Stream the rows of a query in batches.
+
+    Opens its own read session: the response body is produced after the
+    request's dependencies have been cleaned up. Payloads are rehydrated
+    from their blobs.
+
+    Args:
+        query: Query selecting ``EXPORT_COLUMNS``.
+        batch_size: Rows fetched from the cursor at a time.
+
+    Yields:
+        Batches of at most ``batch_size`` rows.
+    """
+    session_factory = await database.read_session_factory()
+    async with session_factory() as session, session_factory() as blobs:
+        result = await session.stream(
+            query.execution_options(yield_per=batch_size)
+        )
+        exported = 0
+        async for rows in result.partitions():
+            # Blobs are read on a second session while the cursor is open
+            await payload_blobs.rehydrate(blobs, [row.payload for row in rows])
+            exported += len(rows)
+            yield rows
+    logger.info("attacks_exported", rows=exported)
+
+
+async def ndjson_chunks(
+    batches: AsyncIterator[Sequence[Row]],
+) -> AsyncIterator[bytes]:
+    """Encode batches as newline-delimited JSON objects."""
+    async for rows in batches:
+        yield "".join(
+            json.dumps(dict(row._mapping), default=_json_default) + "\n"
+            for row in rows
+        ).encode("utf-8")
+
+
+def _csv_value(value: Any) -> Any:
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=_json_default)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return "" if value is None else value
+
+
+async def csv_chunks(
+    batches: AsyncIterator[Sequence[Row]],
+) -> AsyncIterator[bytes]:
+    """Encode batches as CSV with a header row; payloads become JSON."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    async for rows in batches:
+        writer.writerows([_csv_value(v) for v in row] for row in rows)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        # Header of an empty export
+        yield buffer.getvalue().encode("utf-8")
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file collecting bytes until they are drained."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: Any) -> int:
+        chunk = bytes(data)
+        self._chunks.append(chunk)
+        self._position += len(chunk)
+        return len(chunk)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data, self._chunks = b"".join(self._chunks), []
+        return data
+
+
+async def parquet_chunks(
+    batches: AsyncIterator[Sequence[Row]],
+) -> AsyncIterator[bytes]:
+    """Encode batches as a Parquet file, one row group per batch."""
+    import pyarrow.parquet as pq
+
+    schema = attack_schema()
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+    try:
+        async for rows in batches:
+            writer.write_table(attack_table(rows, schema))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+ENCODERS = {
+    "ndjson": ndjson_chunks,
+    "csv": csv_chunks,
+    "parquet": parquet_chunks,
+}
@@ -14,8 +14,16 @@ from fastapi.responses import FileResponse
 import os
 
 from tenebrinet import __version__
-from tenebrinet.api.routes import attacks, health
-from tenebrinet.core.database import init_db
+from tenebrinet.api.routes import archive, attacks, credentials, health
+from tenebrinet.core.archive import attack_archive
+from tenebrinet.core.blobs import payload_blobs
+from tenebrinet.core.cache import cache
+from tenebrinet.core.config import CONFIG_ENV_VAR, load_config
+from tenebrinet.core.database import (
+    configure_engines,
+    dispose_engines,
+    init_db,
+)
 from tenebrinet.core.logger import configure_logger
 
 
@@ -28,10 +36,20 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     """
     # Startup
     configure_logger(log_level="INFO", log_format="json")
-    await init_db()
+    config_path = os.getenv(CONFIG_ENV_VAR)
+    if config_path:
+        cfg = load_config(config_path)
+        cache.configure(cfg.redis)
+        attack_archive.configure(cfg.archive)
+        payload_blobs.configure(cfg.ingest)
+        configure_engines(cfg.database)
+        await init_db(cfg.database)
+    else:
+        await init_db()
     yield
     # Shutdown
-    pass
+    await cache.close()
+    await dispose_engines()
 
 
 def create_app() -> FastAPI:
@@ -67,6 +85,8 @@ def create_app() -> FastAPI:
     # Register routers
     app.include_router(health.router)
     app.include_router(attacks.router, prefix="/api/v1")
+    app.include_router(credentials.router, prefix="/api/v1")
+    app.include_router(archive.router, prefix="/api/v1")
 
     # Mount static files
     static_path = os.path.join(
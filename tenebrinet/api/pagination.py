@@ -0,0 +1,60 @@
+# tenebrinet/api/pagination.py
+"""
+Keyset pagination helpers.
+
+Cursors are opaque, URL-safe tokens encoding the sort key of the last
+row of a page, ``(timestamp, id)``. The next page seeks past that key
+through the timestamp indexes instead of skipping rows with OFFSET, so
+every page costs the same however deep the client pages.
+"""
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Tuple
+from uuid import UUID
+
+
+def encode_cursor(timestamp: datetime, row_id: UUID) -> str:
+    """
+    Encode the sort key of a row as a cursor.
+
+    Args:
+        timestamp: Timestamp of the last row on the page.
+        row_id: ID of the last row on the page.
+
+    Returns:
+        Opaque cursor string.
+    """
+    data = json.dumps(
+        {"ts": timestamp.isoformat(), "id": str(row_id)},
+        separators=(",", ":"),
+    ).encode("utf-8")
+    return base64.urlsafe_b64encode(data).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    """
+    Decode a cursor produced by :func:`encode_cursor`.
+
+    Args:
+        cursor: Cursor string from a previous response.
+
+    Returns:
+        Tuple of (timestamp, id).
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(data["ts"]), UUID(data["id"])
+    except (
+        binascii.Error,
+        KeyError,
+        TypeError,
+        UnicodeError,
+        ValueError,
+    ) as e:
+        raise ValueError("Invalid cursor") from e
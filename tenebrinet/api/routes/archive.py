@@ -0,0 +1,86 @@
+# tenebrinet/api/routes/archive.py
+"""
+Archive API endpoints.
+
+Query attacks that were moved from the database to the Parquet archive.
+"""
+import asyncio
+from datetime import datetime
+from typing import Literal, Optional
+
+from fastapi import APIRouter, HTTPException, Query
+
+from tenebrinet.api.schemas import (
+    ArchivedAttackList,
+    ArchiveStats,
+    AttackResponse,
+)
+from tenebrinet.core.archive import attack_archive, pyarrow_available
+
+
+router = APIRouter(prefix="/archive", tags=["archive"])
+
+
+def _require_pyarrow() -> None:
+    if not pyarrow_available():
+        raise HTTPException(
+            status_code=501, detail="The attack archive requires pyarrow"
+        )
+
+
+@router.get("/attacks", response_model=ArchivedAttackList)
+async def list_archived_attacks(
+    service: Optional[str] = Query(None, description="Filter by service"),
+    ip: Optional[str] = Query(None, description="Filter by IP address"),
+    start_date: Optional[datetime] = Query(
+        None, description="Filter from date"
+    ),
+    end_date: Optional[datetime] = Query(None, description="Filter to date"),
+    limit: int = Query(100, ge=1, le=10000, description="Maximum rows"),
+) -> ArchivedAttackList:
+    """
+    List archived attacks.
+
+    Date filters skip whole days of the archive and service and IP
+    filters are pushed down to the Parquet row groups.
+    """
+    _require_pyarrow()
+    rows = await asyncio.to_thread(
+        attack_archive.scan,
+        start=start_date,
+        end=end_date,
+        service=service,
+        ip=ip,
+        limit=limit,
+    )
+    return ArchivedAttackList(
+        items=[AttackResponse.model_validate(row) for row in rows],
+        count=len(rows),
+    )
+
+
+@router.get("/stats", response_model=ArchiveStats)
+async def get_archive_stats(
+    group_by: Literal["service", "threat_type", "country", "date"] = Query(
+        "service", description="Field to count by"
+    ),
+    service: Optional[str] = Query(None, description="Filter by service"),
+    ip: Optional[str] = Query(None, description="Filter by IP address"),
+    start_date: Optional[datetime] = Query(
+        None, description="Filter from date"
+    ),
+    end_date: Optional[datetime] = Query(None, description="Filter to date"),
+) -> ArchiveStats:
+    """Count archived attacks by service, threat type, country or day."""
+    _require_pyarrow()
+    counts = await asyncio.to_thread(
+        attack_archive.aggregate,
+        group_by=group_by,
+        start=start_date,
+        end=end_date,
+        service=service,
+        ip=ip,
+    )
+    return ArchiveStats(
+        group_by=group_by, total=sum(counts.values()), counts=counts
+    )
@@ -4,34 +4,114 @@ Attack API endpoints.
 
 Provides REST endpoints for querying and managing attack records.
 """
-from datetime import datetime, timezone
-from typing import Optional
+from datetime import date, datetime, timedelta, timezone
+from typing import Literal, Optional
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import func, select
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select, func, select, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from tenebrinet.api.export import (
+    ENCODERS,
+    MEDIA_TYPES,
+    export_query,
+    parquet_available,
+    stream_batches,
+)
+from tenebrinet.api.pagination import decode_cursor, encode_cursor
 from tenebrinet.api.schemas import (
     AttackListResponse,
     AttackResponse,
     AttackStats,
     CredentialListResponse,
     CredentialResponse,
+    DailyAttackCount,
+    DailyAttackStats,
     SessionListResponse,
     SessionResponse,
 )
-from tenebrinet.core.database import get_db_session
-from tenebrinet.core.models import Attack, Credential, Session
+from tenebrinet.core import database
+from tenebrinet.core.aggregates import ALL_TIME, day_periods, load_aggregates
+from tenebrinet.core.blobs import payload_blobs
+from tenebrinet.core.database import (
+    estimate_count,
+    get_db_session,
+    get_read_db_session,
+)
+from tenebrinet.core.models import (
+    Attack,
+    AttackAggregate,
+    AttackRollup,
+    Credential,
+    Session,
+    SessionCommand,
+)
+from tenebrinet.core.rollups import remove_attack_from_rollups
+from tenebrinet.utils.hll import HyperLogLog
 
 
 router = APIRouter(prefix="/attacks", tags=["attacks"])
 
+# Cache tag of everything derived from the whole attack history
+STATS_CACHE_TAG = "attack-stats"
+
+
+async def _get_attack(db: AsyncSession, attack_id: UUID) -> Attack:
+    """
+    Load an attack by ID or raise a 404.
+
+    ``db.get`` needs the full primary key, which includes the partition
+    key ``timestamp``, so the lookup is done by ``id`` alone.
+    """
+    result = await db.execute(select(Attack).where(Attack.id == attack_id))
+    attack = result.scalar_one_or_none()
+    if not attack:
+        raise HTTPException(status_code=404, detail="Attack not found")
+    return attack
+
+
+def _filter_attacks(
+    query: Select,
+    service: Optional[str],
+    threat_type: Optional[str],
+    ip: Optional[str],
+    country: Optional[str],
+    start_date: Optional[datetime],
+    end_date: Optional[datetime],
+) -> Select:
+    """Apply the attack listing filters to a query."""
+    if service:
+        query = query.where(Attack.service == service)
+    if threat_type:
+        query = query.where(Attack.threat_type == threat_type)
+    if ip:
+        query = query.where(Attack.ip == ip)
+    if country:
+        query = query.where(Attack.country == country)
+    if start_date:
+        query = query.where(Attack.timestamp >= start_date)
+    if end_date:
+        query = query.where(Attack.timestamp <= end_date)
+    return query
+
 
 @router.get("", response_model=AttackListResponse)
 async def list_attacks(
     page: int = Query(1, ge=1, description="Page number"),
     per_page: int = Query(20, ge=1, le=100, description="Items per page"),
+    cursor: Optional[str] = Query(
+        None,
+        description="Cursor from a previous response's next_cursor; "
+        "takes precedence over page",
+    ),
+    count: Optional[Literal["exact", "estimate", "none"]] = Query(
+        None,
+        description="How to compute total: exact, estimate (planner "
+        "statistics) or none. Defaults to exact in page mode and none "
+        "in cursor mode",
+    ),
     service: Optional[str] = Query(None, description="Filter by service"),
     threat_type: Optional[str] = Query(
         None, description="Filter by threat type"
@@ -42,76 +122,193 @@ async def list_attacks(
         None, description="Filter from date"
     ),
     end_date: Optional[datetime] = Query(None, description="Filter to date"),
-    db: AsyncSession = Depends(get_db_session),
+    db: AsyncSession = Depends(get_read_db_session),
 ) -> AttackListResponse:
     """
     List all attacks with optional filtering and pagination.
 
-    Returns a paginated list of attack records.
+    Attacks are returned newest first. Pages can be addressed by number
+    or, for constant cost however deep the client pages, by passing the
+    ``next_cursor`` of the previous response as ``cursor``.
     """
     # Build query
-    query = select(Attack)
-
-    # Apply filters
-    if service:
-        query = query.where(Attack.service == service)
-    if threat_type:
-        query = query.where(Attack.threat_type == threat_type)
-    if ip:
-        query = query.where(Attack.ip == ip)
-    if country:
-        query = query.where(Attack.country == country)
-    if start_date:
-        query = query.where(Attack.timestamp >= start_date)
-    if end_date:
-        query = query.where(Attack.timestamp <= end_date)
+    query = _filter_attacks(
+        select(Attack),
+        service=service,
+        threat_type=threat_type,
+        ip=ip,
+        country=country,
+        start_date=start_date,
+        end_date=end_date,
+    )
 
     # Get total count
-    count_query = select(func.count()).select_from(query.subquery())
-    total_result = await db.execute(count_query)
-    total = total_result.scalar() or 0
-
-    # Apply pagination
-    offset = (page - 1) * per_page
-    query = query.order_by(Attack.timestamp.desc())
-    query = query.offset(offset).limit(per_page)
+    count_type = count or ("exact" if cursor is None else "none")
+    total = None
+    if count_type == "estimate":
+        total = await estimate_count(db, query)
+        if total is None:
+            # No planner statistics on this backend
+            count_type = "exact"
+    if count_type == "exact":
+        count_query = select(func.count()).select_from(query.subquery())
+        total_result = await db.execute(count_query)
+        total = total_result.scalar() or 0
+
+    # Seek past the cursor, or fall back to offset pagination
+    if cursor is not None:
+        try:
+            cursor_ts, cursor_id = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.where(
+            tuple_(Attack.timestamp, Attack.id) < tuple_(cursor_ts, cursor_id)
+        )
+    else:
+        query = query.offset((page - 1) * per_page)
+
+    # Fetch one extra row to learn whether another page follows
+    query = query.order_by(Attack.timestamp.desc(), Attack.id.desc())
+    query = query.limit(per_page + 1)
 
     # Execute query
     result = await db.execute(query)
-    attacks = result.scalars().all()
+    attacks = list(result.scalars().all())
+
+    next_cursor = None
+    if len(attacks) > per_page:
+        attacks = attacks[:per_page]
+        next_cursor = encode_cursor(attacks[-1].timestamp, attacks[-1].id)
+
+    # Calculate total pages (approximate for estimated totals)
+    pages = None
+    if cursor is None and total is not None:
+        pages = (total + per_page - 1) // per_page if total > 0 else 0
 
-    # Calculate total pages
-    pages = (total + per_page - 1) // per_page if total > 0 else 0
+    items = [AttackResponse.model_validate(a) for a in attacks]
+    await payload_blobs.rehydrate(db, [item.payload for item in items])
 
     return AttackListResponse(
-        items=[AttackResponse.model_validate(a) for a in attacks],
+        items=items,
         total=total,
-        page=page,
+        count_type=count_type,
+        page=page if cursor is None else None,
         per_page=per_page,
         pages=pages,
+        next_cursor=next_cursor,
+    )
+
+
+@router.get("/export")
+async def export_attacks(
+    fmt: Literal["ndjson", "csv", "parquet"] = Query(
+        "ndjson", alias="format", description="Output format"
+    ),
+    service: Optional[str] = Query(None, description="Filter by service"),
+    threat_type: Optional[str] = Query(
+        None, description="Filter by threat type"
+    ),
+    ip: Optional[str] = Query(None, description="Filter by IP address"),
+    country: Optional[str] = Query(None, description="Filter by country"),
+    start_date: Optional[datetime] = Query(
+        None, description="Filter from date"
+    ),
+    end_date: Optional[datetime] = Query(None, description="Filter to date"),
+) -> StreamingResponse:
+    """
+    Export attacks in bulk.
+
+    Streams every attack matching the filters, oldest first, as NDJSON,
+    CSV or Parquet. Rows are read through a server-side cursor, so
+    exports of any size run in constant memory.
+    """
+    if fmt == "parquet" and not parquet_available():
+        raise HTTPException(
+            status_code=501, detail="Parquet export requires pyarrow"
+        )
+
+    query = _filter_attacks(
+        export_query(),
+        service=service,
+        threat_type=threat_type,
+        ip=ip,
+        country=country,
+        start_date=start_date,
+        end_date=end_date,
+    ).order_by(Attack.timestamp, Attack.id)
+
+    return StreamingResponse(
+        ENCODERS[fmt](stream_batches(query)),
+        media_type=MEDIA_TYPES[fmt],
+        headers={
+            "Content-Disposition": f'attachment; filename="attacks.{fmt}"'
+        },
     )
 
 
 @router.get("/stats", response_model=AttackStats)
-async def get_attack_stats(
-    db: AsyncSession = Depends(get_db_session),
-) -> AttackStats:
+async def get_attack_stats() -> AttackStats:
     """
     Get attack statistics.
 
-    Returns aggregated statistics about attacks.
-    Stats are cached for 30 seconds to reduce database load.
+    Returns aggregated statistics about attacks, computed from the
+    per-minute rollup tables maintained during ingestion.
+    Stats are cached for 30 seconds to reduce database load and
+    refreshed in the background once they are 20 seconds old, so
+    polling clients never wait on the recompute.
     """
     from tenebrinet.core.cache import cache
 
-    # Try to get from cache first
-    cache_key = "stats:attacks"
-    cached_stats = await cache.get(cache_key)
-    if cached_stats:
-        return AttackStats(**cached_stats)
+    async def compute() -> dict:
+        # Own session: a background refresh outlives the request
+        session_factory = await database.read_session_factory()
+        async with session_factory() as session:
+            return (await _compute_attack_stats(session)).model_dump()
+
+    stats = await cache.get_or_set(
+        "stats:attacks",
+        compute,
+        ttl=30,
+        soft_ttl=20,
+        tags=[STATS_CACHE_TAG],
+    )
+    return AttackStats(**stats)
+
+
+async def _unique_ips_since(
+    db: AsyncSession, first_seen: Optional[datetime], today: date
+) -> int:
+    """Estimate the distinct attacker IPs from ``first_seen`` until today."""
+    if first_seen is None:
+        return 0
+    if first_seen.tzinfo is not None:
+        first_seen = first_seen.astimezone(timezone.utc)
+    first_day = first_seen.date().isoformat()
+    oldest_result = await db.execute(
+        select(func.min(AttackAggregate.__table__.c.period)).where(
+            AttackAggregate.__table__.c.period != ALL_TIME
+        )
+    )
+    oldest = oldest_result.scalar()
+    if oldest is None or oldest >= first_day:
+        # Nothing was dropped: the all-time sketches cover the same days
+        periods = [ALL_TIME]
+    else:
+        periods = day_periods(date.fromisoformat(first_day), today)
+    sketch = HyperLogLog()
+    for aggregate in (await load_aggregates(db, periods)).values():
+        sketch.merge(aggregate.sketch)
+    return sketch.count()
+
+
+async def _compute_attack_stats(db: AsyncSession) -> AttackStats:
+    """Compute attack statistics from the rollup and aggregate tables."""
+    # Everything is read from the incrementally maintained rollups, so
+    # the cost depends on the number of minute buckets, not attacks
+    total = func.coalesce(func.sum(AttackRollup.count), 0)
 
     # Total attacks
-    total_result = await db.execute(select(func.count(Attack.id)))
+    total_result = await db.execute(select(total))
     total_attacks = total_result.scalar() or 0
 
     # Attacks today
@@ -119,52 +316,56 @@ async def get_attack_stats(
         hour=0, minute=0, second=0, microsecond=0
     )
     today_result = await db.execute(
-        select(func.count(Attack.id)).where(Attack.timestamp >= today_start)
+        select(total).where(AttackRollup.bucket >= today_start)
     )
     attacks_today = today_result.scalar() or 0
 
-    # Unique IPs
-    unique_ips_result = await db.execute(
-        select(func.count(func.distinct(Attack.ip)))
+    # Unique IPs, estimated from the sketches of the days the retained
+    # rollups cover, so they count the same attacks as the totals
+    first_result = await db.execute(
+        select(func.min(AttackRollup.__table__.c.bucket))
+    )
+    unique_ips = await _unique_ips_since(
+        db, first_result.scalar(), today_start.date()
     )
-    unique_ips = unique_ips_result.scalar() or 0
 
     # Top countries
     top_countries_query = (
-        select(Attack.country, func.count(Attack.id).label("count"))
-        .where(Attack.country.isnot(None))
-        .group_by(Attack.country)
-        .order_by(func.count(Attack.id).desc())
+        select(AttackRollup.country, total.label("count"))
+        .where(AttackRollup.country != "")
+        .group_by(AttackRollup.country)
+        .order_by(total.desc())
         .limit(10)
     )
     top_countries_result = await db.execute(top_countries_query)
     top_countries = [
         {"country": row[0], "count": row[1]}
         for row in top_countries_result.all()
+        if row[1] > 0
     ]
 
     # Attacks by service
     by_service_query = (
-        select(Attack.service, func.count(Attack.id).label("count"))
-        .group_by(Attack.service)
+        select(AttackRollup.service, total.label("count"))
+        .group_by(AttackRollup.service)
     )
     by_service_result = await db.execute(by_service_query)
     attacks_by_service = {
-        row[0]: row[1] for row in by_service_result.all()
+        row[0]: row[1] for row in by_service_result.all() if row[1] > 0
     }
 
     # Attacks by threat type
     by_threat_query = (
-        select(Attack.threat_type, func.count(Attack.id).label("count"))
-        .where(Attack.threat_type.isnot(None))
-        .group_by(Attack.threat_type)
+        select(AttackRollup.threat_type, total.label("count"))
+        .where(AttackRollup.threat_type != "")
+        .group_by(AttackRollup.threat_type)
     )
     by_threat_result = await db.execute(by_threat_query)
     attacks_by_threat_type = {
-        row[0]: row[1] for row in by_threat_result.all()
+        row[0]: row[1] for row in by_threat_result.all() if row[1] > 0
     }
 
-    stats = AttackStats(
+    return AttackStats(
         total_attacks=total_attacks,
         attacks_today=attacks_today,
         unique_ips=unique_ips,
@@ -173,33 +374,85 @@ async def get_attack_stats(
         attacks_by_threat_type=attacks_by_threat_type,
     )
 
-    # Cache the result for 30 seconds
-    await cache.set(cache_key, stats.model_dump(), ttl=30)
 
-    return stats
+@router.get("/daily", response_model=DailyAttackStats)
+async def get_daily_stats(
+    start_date: Optional[date] = Query(
+        None, description="First day (UTC); defaults to 6 days before end"
+    ),
+    end_date: Optional[date] = Query(
+        None, description="Last day (UTC); defaults to today"
+    ),
+    db: AsyncSession = Depends(get_read_db_session),
+) -> DailyAttackStats:
+    """
+    Get per-day attack counts and distinct attacker IPs.
+
+    Served from the checkpointed streaming aggregates. Distinct IP counts
+    are HyperLogLog estimates (about 1% error); the range total merges
+    the daily sketches, so IPs seen on several days count once.
+    """
+    end_date = end_date or datetime.now(timezone.utc).date()
+    start_date = start_date or end_date - timedelta(days=6)
+    if start_date > end_date:
+        raise HTTPException(
+            status_code=400, detail="start_date is after end_date"
+        )
+    if (end_date - start_date).days > 366:
+        raise HTTPException(
+            status_code=400, detail="Date range is limited to 366 days"
+        )
+
+    periods = day_periods(start_date, end_date)
+    aggregates = await load_aggregates(db, periods)
+
+    items = []
+    overall = HyperLogLog()
+    for period in periods:
+        day = date.fromisoformat(period)
+        aggregate = aggregates.get(period)
+        if aggregate is None:
+            items.append(DailyAttackCount(
+                date=day, attacks=0, unique_ips=0, attacks_by_service={}
+            ))
+            continue
+        overall.merge(aggregate.sketch)
+        items.append(DailyAttackCount(
+            date=day,
+            attacks=aggregate.total,
+            unique_ips=aggregate.unique_ips,
+            attacks_by_service=dict(aggregate.by_service),
+        ))
+
+    return DailyAttackStats(
+        start_date=start_date,
+        end_date=end_date,
+        items=items,
+        unique_ips=overall.count(),
+    )
 
 
 @router.get("/{attack_id}", response_model=AttackResponse)
 async def get_attack(
     attack_id: UUID,
-    db: AsyncSession = Depends(get_db_session),
+    db: AsyncSession = Depends(get_read_db_session),
 ) -> AttackResponse:
     """
     Get a specific attack by ID.
 
     Returns the attack record with the given ID.
     """
-    attack = await db.get(Attack, attack_id)
-    if not attack:
-        raise HTTPException(status_code=404, detail="Attack not found")
+    attack = await _get_attack(db, attack_id)
 
-    return AttackResponse.model_validate(attack)
+    response = AttackResponse.model_validate(attack)
+    await payload_blobs.rehydrate(db, [response.payload])
+    return response
 
 
 @router.get("/{attack_id}/credentials", response_model=CredentialListResponse)
 async def get_attack_credentials(
     attack_id: UUID,
-    db: AsyncSession = Depends(get_db_session),
+    db: AsyncSession = Depends(get_read_db_session),
 ) -> CredentialListResponse:
     """
     Get credentials associated with an attack.
@@ -207,9 +460,7 @@ async def get_attack_credentials(
     Returns all credential attempts from a specific attack.
     """
     # Verify attack exists
-    attack = await db.get(Attack, attack_id)
-    if not attack:
-        raise HTTPException(status_code=404, detail="Attack not found")
+    await _get_attack(db, attack_id)
 
     # Get credentials
     query = select(Credential).where(Credential.attack_id == attack_id)
@@ -225,7 +476,7 @@ async def get_attack_credentials(
 @router.get("/{attack_id}/sessions", response_model=SessionListResponse)
 async def get_attack_sessions(
     attack_id: UUID,
-    db: AsyncSession = Depends(get_db_session),
+    db: AsyncSession = Depends(get_read_db_session),
 ) -> SessionListResponse:
     """
     Get sessions associated with an attack.
@@ -233,19 +484,36 @@ async def get_attack_sessions(
     Returns all sessions (shell interactions) from a specific attack.
     """
     # Verify attack exists
-    attack = await db.get(Attack, attack_id)
-    if not attack:
-        raise HTTPException(status_code=404, detail="Attack not found")
+    await _get_attack(db, attack_id)
 
     # Get sessions
     query = select(Session).where(Session.attack_id == attack_id)
     result = await db.execute(query)
     sessions = result.scalars().all()
 
-    return SessionListResponse(
-        items=[SessionResponse.model_validate(s) for s in sessions],
-        total=len(sessions),
-    )
+    # Merge commands from the append-only command log
+    command_log: dict = {}
+    if sessions:
+        log_query = (
+            select(SessionCommand)
+            .where(SessionCommand.session_id.in_([s.id for s in sessions]))
+            .order_by(SessionCommand.session_id, SessionCommand.seq)
+        )
+        log_result = await db.execute(log_query)
+        for entry in log_result.scalars().all():
+            command_log.setdefault(entry.session_id, []).append({
+                "cmd": entry.command,
+                "timestamp": entry.timestamp.isoformat(),
+            })
+
+    items = []
+    for s in sessions:
+        item = SessionResponse.model_validate(s)
+        if s.id in command_log:
+            item.commands = (item.commands or []) + command_log[s.id]
+        items.append(item)
+
+    return SessionListResponse(items=items, total=len(sessions))
 
 
 @router.delete("/{attack_id}", status_code=204)
@@ -258,9 +526,13 @@ async def delete_attack(
 
     Removes the attack, its credentials, and sessions.
     """
-    attack = await db.get(Attack, attack_id)
-    if not attack:
-        raise HTTPException(status_code=404, detail="Attack not found")
+    from tenebrinet.core.cache import cache
 
+    attack = await _get_attack(db, attack_id)
+
+    await remove_attack_from_rollups(db, attack)
     await db.delete(attack)
     await db.commit()
+
+    # Cached statistics still count the deleted attack
+    await cache.invalidate_tag(STATS_CACHE_TAG)
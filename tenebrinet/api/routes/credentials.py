@@ -0,0 +1,42 @@
+# tenebrinet/api/routes/credentials.py
+"""
+Credential API endpoints.
+
+Provides REST endpoints over the deduplicated credential dictionary.
+"""
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from tenebrinet.api.schemas import (
+    CredentialPairResponse,
+    TopCredentialsResponse,
+)
+from tenebrinet.core.database import get_read_db_session
+from tenebrinet.core.models import CredentialPair
+
+
+router = APIRouter(prefix="/credentials", tags=["credentials"])
+
+
+@router.get("/top", response_model=TopCredentialsResponse)
+async def get_top_credentials(
+    limit: int = Query(10, ge=1, le=1000, description="Number of pairs"),
+    db: AsyncSession = Depends(get_read_db_session),
+) -> TopCredentialsResponse:
+    """
+    Get the most attempted username/password pairs.
+
+    Reads the first rows of the attempts index of ``credential_pairs``.
+    """
+    result = await db.execute(
+        select(CredentialPair)
+        .order_by(CredentialPair.attempts.desc(), CredentialPair.id.desc())
+        .limit(limit)
+    )
+    return TopCredentialsResponse(
+        items=[
+            CredentialPairResponse.model_validate(pair)
+            for pair in result.scalars()
+        ]
+    )
@@ -6,7 +6,8 @@ Provides endpoints for monitoring service health and status.
 """
 from datetime import datetime, timezone
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -94,3 +95,16 @@ async def liveness_check() -> dict:
     Returns 200 if the application is alive.
     """
     return {"status": "alive", "timestamp": datetime.now(timezone.utc)}
+
+
+@router.get("/metrics")
+async def metrics() -> Response:
+    """
+    Prometheus metrics endpoint.
+
+    Exposes ingestion and honeypot counters in the text exposition format.
+    """
+    return Response(
+        content=generate_latest(),
+        media_type=CONTENT_TYPE_LATEST,
+    )
@@ -4,8 +4,8 @@ Pydantic schemas for API request/response validation.
 
 Defines the data transfer objects used by the API endpoints.
 """
-from datetime import datetime
-from typing import List, Optional
+from datetime import date, datetime
+from typing import Dict, List, Literal, Optional
 from uuid import UUID
 
 from pydantic import BaseModel, ConfigDict, Field
@@ -48,13 +48,22 @@ class AttackResponse(AttackBase):
 
 
 class AttackListResponse(BaseModel):
-    """Paginated list of attacks."""
+    """
+    Paginated list of attacks.
+
+    ``page`` and ``pages`` are only set in page mode. ``count_type`` tells
+    whether ``total`` is an exact count, a planner estimate, or omitted.
+    ``next_cursor`` continues the listing with keyset pagination and is
+    null on the last page.
+    """
 
     items: List[AttackResponse]
-    total: int
-    page: int
+    total: Optional[int] = None
+    count_type: Literal["exact", "estimate", "none"] = "exact"
+    page: Optional[int] = None
     per_page: int
-    pages: int
+    pages: Optional[int] = None
+    next_cursor: Optional[str] = None
 
 
 # --- Credential Schemas ---
@@ -79,6 +88,25 @@ class CredentialListResponse(BaseModel):
     total: int
 
 
+class CredentialPairResponse(BaseModel):
+    """Distinct username/password pair with its attempt counts."""
+
+    model_config = ConfigDict(from_attributes=True)
+
+    username: str
+    password: str
+    attempts: int
+    successes: int
+    first_seen: datetime
+    last_seen: datetime
+
+
+class TopCredentialsResponse(BaseModel):
+    """Most attempted credential pairs."""
+
+    items: List[CredentialPairResponse]
+
+
 # --- Session Schemas ---
 
 
@@ -115,6 +143,28 @@ class AttackStats(BaseModel):
     attacks_by_threat_type: dict
 
 
+class DailyAttackCount(BaseModel):
+    """Attack counts for one UTC day."""
+
+    date: date
+    attacks: int
+    unique_ips: int = Field(
+        ..., description="Estimated distinct attacker IPs (HyperLogLog)"
+    )
+    attacks_by_service: dict
+
+
+class DailyAttackStats(BaseModel):
+    """Per-day attack counts over a date range."""
+
+    start_date: date
+    end_date: date
+    items: List[DailyAttackCount]
+    unique_ips: int = Field(
+        ..., description="Estimated distinct attacker IPs over the range"
+    )
+
+
 class ServiceStatus(BaseModel):
     """Status of a honeypot service."""
 
@@ -135,6 +185,24 @@ class HealthResponse(BaseModel):
     database: str = Field(..., description="Database connection status")
 
 
+# --- Archive Schemas ---
+
+
+class ArchivedAttackList(BaseModel):
+    """Attacks read from the Parquet archive."""
+
+    items: List[AttackResponse]
+    count: int
+
+
+class ArchiveStats(BaseModel):
+    """Archived attack counts grouped by one field."""
+
+    group_by: str
+    total: int
+    counts: Dict[str, int]
+
+
 # --- Query Parameters ---
 
 
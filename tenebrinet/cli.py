@@ -6,6 +6,7 @@ Provides CLI commands for starting the honeypot services, managing
 configuration, and monitoring system health.
 """
 import asyncio
+import os
 from typing import Any, List
 
 import click
@@ -13,9 +14,27 @@ import structlog
 import uvicorn
 
 from tenebrinet import __version__
-from tenebrinet.core.config import load_config
-from tenebrinet.core.database import init_db
+from tenebrinet.core.aggregates import attack_aggregates
+from tenebrinet.core.archive import (
+    GROUP_BY_FIELDS,
+    attack_archive,
+    pyarrow_available,
+)
+from tenebrinet.core.blobs import payload_blobs
+from tenebrinet.core.config import CONFIG_ENV_VAR, load_config
+from tenebrinet.core import database
+from tenebrinet.core.database import (
+    configure_engines,
+    dispose_engines,
+    init_db,
+    migrate_db,
+)
 from tenebrinet.core.logger import configure_logger
+from tenebrinet.core.partitions import (
+    maintain_partitions,
+    run_partition_maintenance,
+)
+from tenebrinet.core.sink import event_sink
 
 
 logger = structlog.get_logger()
@@ -93,9 +112,30 @@ async def _run_services(cfg) -> None:
     from tenebrinet.services.ssh import SSHHoneypot
 
     # Initialize database
-    await init_db()
+    configure_engines(cfg.database)
+    await init_db(cfg.database)
     logger.info("database_initialized")
 
+    # Keep attack partitions created ahead and apply retention
+    maintenance = asyncio.create_task(
+        run_partition_maintenance(database.engine, cfg.database)
+    )
+
+    # Move old attacks to the Parquet archive
+    attack_archive.configure(cfg.archive)
+    archiving = (
+        asyncio.create_task(attack_archive.run())
+        if cfg.archive.enabled
+        else None
+    )
+
+    # Start the shared write-behind event sink
+    event_sink.configure(cfg.ingest)
+    payload_blobs.configure(cfg.ingest)
+    await event_sink.start()
+    attack_aggregates.configure(cfg.ingest)
+    await attack_aggregates.start()
+
     services: List[Any] = []
 
     # Start SSH honeypot if enabled
@@ -137,9 +177,15 @@ async def _run_services(cfg) -> None:
     except asyncio.CancelledError:
         pass
     finally:
-        # Stop all services
+        # Stop all services, then flush their remaining events
         for service in services:
             await service.stop()
+        await event_sink.stop()
+        await attack_aggregates.stop()
+        maintenance.cancel()
+        if archiving is not None:
+            archiving.cancel()
+        await dispose_engines()
 
 
 @main.command()
@@ -185,6 +231,9 @@ def api(config: str, host: str, port: int, reload: bool) -> None:
         click.echo(f"📚 API Docs: http://{host}:{port}/docs")
         click.echo("")
 
+        # Picked up by the app's lifespan, also in reload subprocesses
+        os.environ[CONFIG_ENV_VAR] = config
+
         uvicorn.run(
             "tenebrinet.api.main:app",
             host=host,
@@ -230,6 +279,8 @@ def run(config: str, api_port: int) -> None:
         click.echo(f"📁 Config: {config}")
         click.echo("")
 
+        os.environ[CONFIG_ENV_VAR] = config
+
         asyncio.run(_run_combined(cfg, api_port))
 
     except FileNotFoundError as e:
@@ -251,9 +302,30 @@ async def _run_combined(cfg, api_port: int) -> None:
     from tenebrinet.services.ssh import SSHHoneypot
 
     # Initialize database
-    await init_db()
+    configure_engines(cfg.database)
+    await init_db(cfg.database)
     logger.info("database_initialized")
 
+    # Keep attack partitions created ahead and apply retention
+    maintenance = asyncio.create_task(
+        run_partition_maintenance(database.engine, cfg.database)
+    )
+
+    # Move old attacks to the Parquet archive
+    attack_archive.configure(cfg.archive)
+    archiving = (
+        asyncio.create_task(attack_archive.run())
+        if cfg.archive.enabled
+        else None
+    )
+
+    # Start the shared write-behind event sink
+    event_sink.configure(cfg.ingest)
+    payload_blobs.configure(cfg.ingest)
+    await event_sink.start()
+    attack_aggregates.configure(cfg.ingest)
+    await attack_aggregates.start()
+
     services: List[Any] = []
 
     # Start SSH honeypot if enabled
@@ -301,6 +373,12 @@ async def _run_combined(cfg, api_port: int) -> None:
     finally:
         for service in services:
             await service.stop()
+        await event_sink.stop()
+        await attack_aggregates.stop()
+        maintenance.cancel()
+        if archiving is not None:
+            archiving.cancel()
+        await dispose_engines()
 
 
 @main.command()
@@ -339,17 +417,154 @@ def validate(config: str) -> None:
 
 
 @main.command()
-def initdb() -> None:
-    """Initialize the database schema."""
+@click.option(
+    "--config",
+    "-c",
+    default="config/honeypot.yml",
+    help="Path to configuration file.",
+    type=click.Path(exists=True),
+)
+def initdb(config: str) -> None:
+    """Initialize the database schema by applying all migrations."""
+    cfg = load_config(config)
     click.echo("🗄️  Initializing database...")
     try:
-        asyncio.run(init_db())
+        configure_engines(cfg.database)
+        asyncio.run(migrate_db(cfg.database))
         click.echo("✅ Database initialized successfully.")
     except Exception as e:
         click.echo(f"❌ Database initialization failed: {e}", err=True)
         raise SystemExit(1)
 
 
+@main.command()
+@click.option(
+    "--config",
+    "-c",
+    default="config/honeypot.yml",
+    help="Path to configuration file.",
+    type=click.Path(exists=True),
+)
+def partitions(config: str) -> None:
+    """Create upcoming attack partitions and drop expired ones."""
+    cfg = load_config(config)
+    click.echo("🗂️  Maintaining attack partitions...")
+    try:
+        configure_engines(cfg.database)
+        asyncio.run(maintain_partitions(database.engine, cfg.database))
+        click.echo("✅ Partitions are up to date.")
+    except Exception as e:
+        click.echo(f"❌ Partition maintenance failed: {e}", err=True)
+        raise SystemExit(1)
+
+
+@main.group()
+def archive() -> None:
+    """Move old attacks to Parquet files and query them."""
+    pass
+
+
+def _archive_from_config(config: str):
+    if not pyarrow_available():
+        click.echo(
+            "❌ The archive requires pyarrow: pip install tenebrinet[export]",
+            err=True,
+        )
+        raise SystemExit(1)
+    cfg = load_config(config)
+    attack_archive.configure(cfg.archive)
+    return cfg
+
+
+@archive.command("run")
+@click.option(
+    "--config",
+    "-c",
+    default="config/honeypot.yml",
+    help="Path to configuration file.",
+    type=click.Path(exists=True),
+)
+def archive_run(config: str) -> None:
+    """Archive attacks older than archive.after_days now."""
+    cfg = _archive_from_config(config)
+    click.echo(
+        f"🧊 Archiving attacks older than {cfg.archive.after_days} days..."
+    )
+
+    async def _archive() -> int:
+        configure_engines(cfg.database)
+        try:
+            return await attack_archive.archive()
+        finally:
+            await dispose_engines()
+
+    try:
+        archived = asyncio.run(_archive())
+        click.echo(
+            f"✅ Archived {archived} attacks to {cfg.archive.directory}."
+        )
+    except Exception as e:
+        click.echo(f"❌ Archival failed: {e}", err=True)
+        raise SystemExit(1)
+
+
+_archive_filters = [
+    click.option(
+        "--config",
+        "-c",
+        default="config/honeypot.yml",
+        help="Path to configuration file.",
+        type=click.Path(exists=True),
+    ),
+    click.option("--service", help="Filter by service."),
+    click.option("--ip", help="Filter by IP address."),
+    click.option(
+        "--start", type=click.DateTime(), help="Filter from date (UTC)."
+    ),
+    click.option("--end", type=click.DateTime(), help="Filter to date (UTC)."),
+]
+
+
+def _with_archive_filters(command):
+    for option in reversed(_archive_filters):
+        command = option(command)
+    return command
+
+
+@archive.command("query")
+@_with_archive_filters
+@click.option("--limit", default=100, help="Maximum number of rows.")
+def archive_query(config, service, ip, start, end, limit) -> None:
+    """Print archived attacks as JSON lines."""
+    import json
+
+    _archive_from_config(config)
+    rows = attack_archive.scan(
+        start=start, end=end, service=service, ip=ip, limit=limit
+    )
+    for row in rows:
+        click.echo(json.dumps(row, default=str))
+
+
+@archive.command("stats")
+@_with_archive_filters
+@click.option(
+    "--group-by",
+    type=click.Choice(GROUP_BY_FIELDS),
+    default="service",
+    help="Field to count by.",
+)
+def archive_stats(config, service, ip, start, end, group_by) -> None:
+    """Count archived attacks by one field."""
+    _archive_from_config(config)
+    counts = attack_archive.aggregate(
+        group_by=group_by, start=start, end=end, service=service, ip=ip
+    )
+    for value, count in sorted(counts.items(), key=lambda item: -item[1]):
+        click.echo(f"{value or '-':<24} {count}")
+    click.echo(f"{'total':<24} {sum(counts.values())}")
+
+
 @main.command()
 def train() -> None:
     """Train the ML threat classifier."""
@@ -6,7 +6,12 @@ Includes configuration, logging, database, and models.
 """
 
 from tenebrinet.core.config import load_config, TenebriNetConfig
-from tenebrinet.core.database import get_db_session, init_db, Base
+from tenebrinet.core.database import (
+    get_db_session,
+    init_db,
+    migrate_db,
+    Base,
+)
 from tenebrinet.core.logger import configure_logger
 
 __all__ = [
@@ -14,6 +19,7 @@ __all__ = [
     "TenebriNetConfig",
     "get_db_session",
     "init_db",
+    "migrate_db",
     "Base",
     "configure_logger",
 ]
@@ -0,0 +1,274 @@
+# tenebrinet/core/aggregates.py
+"""
+Streaming attack aggregates for TenebriNET.
+
+Each ingest node counts the attacks it commits in memory: totals,
+per-service counts and a HyperLogLog sketch of distinct attacker IPs,
+both per UTC day and for all time. The pending increments are
+checkpointed into ``attack_aggregates`` (one row per node and period)
+every few seconds. Readers merge the rows of all nodes, so distinct IP
+counts over any range of days cost a handful of sketch merges instead of
+``count(distinct ip)`` over the attacks table.
+
+Increments observed since the last checkpoint are lost if the process
+crashes; the raw attacks are not affected.
+"""
+import asyncio
+import socket
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import date, datetime, timezone
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    cast,
+)
+
+import structlog
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from tenebrinet.core import database
+from tenebrinet.core.config import IngestConfig
+from tenebrinet.core.metrics import (
+    AGGREGATE_CHECKPOINT_FAILURES,
+    AGGREGATE_PENDING_PERIODS,
+)
+from tenebrinet.core.models import AttackAggregate
+from tenebrinet.utils.hll import DEFAULT_PRECISION, HyperLogLog
+
+
+logger = structlog.get_logger()
+
+# Period key of the all-time aggregate row
+ALL_TIME = "all"
+
+
+@dataclass
+class PeriodAggregate:
+    """Counts and distinct IP sketch for one period."""
+
+    total: int = 0
+    by_service: Counter = field(default_factory=Counter)
+    sketch: HyperLogLog = field(default_factory=HyperLogLog)
+
+    def merge(self, other: "PeriodAggregate") -> None:
+        """Add another aggregate of the same period into this one."""
+        self.total += other.total
+        self.by_service.update(other.by_service)
+        self.sketch.merge(other.sketch)
+
+    @property
+    def unique_ips(self) -> int:
+        """Estimated number of distinct attacker IPs."""
+        return self.sketch.count()
+
+
+def _period_of(timestamp: Optional[datetime]) -> str:
+    """Return the daily period key of a timestamp."""
+    if timestamp is None:
+        timestamp = datetime.now(timezone.utc)
+    elif timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return timestamp.astimezone(timezone.utc).date().isoformat()
+
+
+class StreamingAggregates:
+    """In-memory attack aggregates with periodic checkpoints."""
+
+    def __init__(
+        self,
+        node_id: Optional[str] = None,
+        checkpoint_interval: float = 10.0,
+        session_factory: Optional[Callable[[], Any]] = None,
+        precision: int = DEFAULT_PRECISION,
+    ) -> None:
+        """
+        Initialize the aggregates.
+
+        Args:
+            node_id: Name of this node's checkpoint rows. Defaults to
+                the hostname.
+            checkpoint_interval: Seconds between checkpoints.
+            session_factory: Callable returning an AsyncSession context
+                manager. Defaults to ``database.IngestSessionLocal``.
+            precision: HyperLogLog precision of the IP sketches.
+        """
+        self.node_id = node_id or socket.gethostname()
+        self.checkpoint_interval = checkpoint_interval
+        self.precision = precision
+        self._session_factory = session_factory
+        self._pending: Dict[str, PeriodAggregate] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = asyncio.Event()
+
+    def configure(self, config: IngestConfig) -> None:
+        """Apply settings from the ``ingest`` configuration section."""
+        self.node_id = config.node_id or socket.gethostname()
+        self.checkpoint_interval = config.aggregate_checkpoint_interval
+
+    @property
+    def pending(self) -> Dict[str, PeriodAggregate]:
+        """Increments observed since the last checkpoint, by period."""
+        return self._pending
+
+    def observe(self, rows: Sequence[Dict[str, Any]]) -> None:
+        """
+        Count a batch of committed attacks.
+
+        Args:
+            rows: Attack column values as written by the event sink.
+        """
+        for row in rows:
+            for period in (_period_of(row.get("timestamp")), ALL_TIME):
+                aggregate = self._pending.get(period)
+                if aggregate is None:
+                    aggregate = self._pending[period] = PeriodAggregate(
+                        sketch=HyperLogLog(self.precision)
+                    )
+                aggregate.total += 1
+                aggregate.by_service[row["service"]] += 1
+                aggregate.sketch.add(row["ip"])
+        AGGREGATE_PENDING_PERIODS.set(len(self._pending))
+
+    async def checkpoint(self) -> None:
+        """Merge the pending increments into this node's stored rows."""
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+        session_factory = self._session_factory or database.IngestSessionLocal
+
+        try:
+            async with session_factory() as session:
+                result = await session.execute(
+                    select(AttackAggregate)
+                    .where(
+                        AttackAggregate.node == self.node_id,
+                        AttackAggregate.period.in_(list(pending)),
+                    )
+                    .with_for_update()
+                )
+                stored = {row.period: row for row in result.scalars()}
+
+                now = datetime.now(timezone.utc)
+                for period, aggregate in pending.items():
+                    row = stored.get(period)
+                    if row is None:
+                        session.add(AttackAggregate(
+                            node=self.node_id,
+                            period=period,
+                            total=aggregate.total,
+                            by_service=dict(aggregate.by_service),
+                            ip_sketch=aggregate.sketch.to_bytes(),
+                            updated_at=now,
+                        ))
+                        continue
+                    merged = _from_row(row)
+                    merged.merge(aggregate)
+                    row.total = merged.total
+                    row.by_service = dict(merged.by_service)
+                    row.ip_sketch = merged.sketch.to_bytes()
+                    row.updated_at = now
+                await session.commit()
+        except Exception as e:
+            AGGREGATE_CHECKPOINT_FAILURES.inc()
+            logger.warning("attack_aggregates_checkpoint_failed", error=str(e))
+            # Keep the increments for the next attempt
+            self._restore(pending)
+            return
+        except BaseException:
+            # Cancelled mid-checkpoint: the transaction did not complete
+            self._restore(pending)
+            raise
+        finally:
+            AGGREGATE_PENDING_PERIODS.set(len(self._pending))
+
+        logger.debug(
+            "attack_aggregates_checkpointed",
+            node=self.node_id,
+            periods=len(pending),
+        )
+
+    def _restore(self, pending: Dict[str, PeriodAggregate]) -> None:
+        """Put increments taken by a failed checkpoint back."""
+        for period, aggregate in pending.items():
+            if period in self._pending:
+                aggregate.merge(self._pending[period])
+            self._pending[period] = aggregate
+
+    async def start(self) -> None:
+        """Start checkpointing in the background."""
+        if self._task is None or self._task.done():
+            self._stopping = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the background task and write a final checkpoint."""
+        if self._task is not None:
+            # Let a running checkpoint finish rather than cancel it
+            self._stopping.set()
+            await self._task
+            self._task = None
+        await self.checkpoint()
+
+    async def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                await asyncio.wait_for(
+                    self._stopping.wait(), self.checkpoint_interval
+                )
+            except asyncio.TimeoutError:
+                await self.checkpoint()
+
+
+def _from_row(row: AttackAggregate) -> PeriodAggregate:
+    return PeriodAggregate(
+        total=cast(int, row.total),
+        by_service=Counter(row.by_service or {}),
+        sketch=HyperLogLog.from_bytes(cast(bytes, row.ip_sketch)),
+    )
+
+
+async def load_aggregates(
+    session: AsyncSession, periods: Iterable[str]
+) -> Dict[str, PeriodAggregate]:
+    """
+    Load checkpointed aggregates, merged across all nodes.
+
+    Args:
+        session: Session to read with.
+        periods: Period keys (ISO dates or ``ALL_TIME``) to load.
+
+    Returns:
+        Merged aggregate per period; periods without data are omitted.
+    """
+    result = await session.execute(
+        select(AttackAggregate).where(
+            AttackAggregate.period.in_(list(periods))
+        )
+    )
+    merged: Dict[str, PeriodAggregate] = {}
+    for row in result.scalars():
+        aggregate = _from_row(row)
+        if row.period in merged:
+            merged[row.period].merge(aggregate)
+        else:
+            merged[row.period] = aggregate
+    return merged
+
+
+def day_periods(start: date, end: date) -> List[str]:
+    """Return the daily period keys from ``start`` to ``end`` inclusive."""
+    return [
+        date.fromordinal(day).isoformat()
+        for day in range(start.toordinal(), end.toordinal() + 1)
+    ]
+
+
+# Global aggregates instance fed by the event sink
+attack_aggregates = StreamingAggregates()
@@ -0,0 +1,471 @@
+# tenebrinet/core/archive.py
+"""
+Columnar cold archive of old attacks.
+
+Attacks older than ``archive.after_days`` are moved, one UTC day at a
+time, into zstd-compressed Parquet files under a Hive-style layout
+(``<directory>/date=YYYY-MM-DD/part-<hash>.parquet``), with payload
+blobs inlined, and then deleted from the database together with their
+sessions, session commands and credentials; blobs no other attack
+references are swept afterwards. The per-minute rollups
+and aggregates are kept, so statistics still cover archived history.
+
+Within a file rows are sorted by service, IP and time. Scans filtered by
+date skip whole directories, and the row group statistics let filters
+on timestamp, service and ip skip most of the remaining data.
+
+Requires ``pyarrow`` (the ``export`` extra).
+"""
+import asyncio
+import hashlib
+import json
+import os
+import uuid
+from collections import Counter
+from datetime import date, datetime, time, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import structlog
+from sqlalchemy import Row, Select, delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from tenebrinet.core import database
+from tenebrinet.core.blobs import payload_blobs
+from tenebrinet.core.config import ArchiveConfig
+from tenebrinet.core.models import (
+    Attack,
+    Credential,
+    Session,
+    SessionCommand,
+)
+
+
+logger = structlog.get_logger()
+
+# Attack columns stored in the archive and in bulk exports
+ATTACK_COLUMNS = (
+    "id",
+    "timestamp",
+    "ip",
+    "service",
+    "threat_type",
+    "confidence",
+    "country",
+    "asn",
+    "payload",
+)
+
+GROUP_BY_FIELDS = ("service", "threat_type", "country", "date")
+
+
+def pyarrow_available() -> bool:
+    """Return whether ``pyarrow`` can be imported."""
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def attack_schema() -> Any:
+    """Return the Arrow schema of archived and exported attacks."""
+    import pyarrow as pa
+
+    return pa.schema([
+        ("id", pa.string()),
+        ("timestamp", pa.timestamp("us", tz="UTC")),
+        ("ip", pa.string()),
+        ("service", pa.string()),
+        ("threat_type", pa.string()),
+        ("confidence", pa.float64()),
+        ("country", pa.string()),
+        ("asn", pa.int64()),
+        ("payload", pa.string()),
+    ])
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def attack_table(rows: Sequence[Row], schema: Any = None) -> Any:
+    """
+    Convert rows of ``ATTACK_COLUMNS`` into an Arrow table.
+
+    IDs become strings and payloads JSON strings.
+
+    Args:
+        rows: Rows selecting ``ATTACK_COLUMNS`` in order.
+        schema: Schema from ``attack_schema``; built if omitted.
+    """
+    import pyarrow as pa
+
+    converters: Dict[str, Callable[[Any], Any]] = {
+        "id": str,
+        "payload": lambda v: json.dumps(v, default=_json_default),
+    }
+    columns: Dict[str, List[Any]] = {name: [] for name in ATTACK_COLUMNS}
+    for row in rows:
+        for name, value in zip(ATTACK_COLUMNS, row):
+            if value is not None and name in converters:
+                value = converters[name](value)
+            columns[name].append(value)
+    return pa.table(columns, schema=schema or attack_schema())
+
+
+def _fsync(path: Path) -> None:
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _day_bounds(day: date) -> tuple:
+    start = datetime.combine(day, time(), tzinfo=timezone.utc)
+    return start, start + timedelta(days=1)
+
+
+class AttackArchive:
+    """Moves old attacks to Parquet files and queries them."""
+
+    def __init__(
+        self,
+        directory: str = "data/archive",
+        after_days: int = 90,
+        compression: str = "zstd",
+        batch_size: int = 50000,
+        interval: float = 3600.0,
+        session_factory: Optional[Callable[[], Any]] = None,
+    ) -> None:
+        """
+        Initialize the archive.
+
+        Args:
+            directory: Root directory of the Parquet files.
+            after_days: Age in days after which attacks are archived.
+            compression: Parquet compression codec.
+            batch_size: Rows read from the database and written as one
+                row group at a time.
+            interval: Seconds between archival runs in ``run``.
+            session_factory: Callable returning an AsyncSession context
+                manager. Defaults to ``database.AsyncSessionLocal``.
+        """
+        self.directory = Path(directory)
+        self.after_days = after_days
+        self.compression = compression
+        self.batch_size = batch_size
+        self.interval = interval
+        self._session_factory = session_factory
+
+    def configure(self, config: ArchiveConfig) -> None:
+        """Apply settings from the ``archive`` configuration section."""
+        self.directory = Path(config.directory)
+        self.after_days = config.after_days
+        self.compression = config.compression
+        self.batch_size = config.batch_size
+        self.interval = config.interval
+
+    async def archive(self, now: Optional[datetime] = None) -> int:
+        """
+        Archive every complete UTC day older than ``after_days``.
+
+        Payload blobs no longer referenced by a stored attack are swept
+        afterwards.
+
+        Args:
+            now: Reference time; defaults to the current time.
+
+        Returns:
+            Number of attacks archived.
+        """
+        now = now or datetime.now(timezone.utc)
+        cutoff, _ = _day_bounds(
+            (now - timedelta(days=self.after_days)).astimezone(
+                timezone.utc
+            ).date()
+        )
+        session_factory = self._session_factory or database.AsyncSessionLocal
+
+        archived = 0
+        while True:
+            async with session_factory() as session:
+                oldest = (await session.execute(
+                    select(func.min(Attack.timestamp)).where(
+                        Attack.timestamp < cutoff
+                    )
+                )).scalar()
+            if oldest is None:
+                break
+            if oldest.tzinfo is None:
+                oldest = oldest.replace(tzinfo=timezone.utc)
+            day = oldest.astimezone(timezone.utc).date()
+            rows = await self.archive_day(day)
+            if not rows:
+                break
+            archived += rows
+
+        if archived:
+            # Archive files hold the payloads inline
+            async with session_factory() as session:
+                await payload_blobs.sweep(await session.connection())
+                await session.commit()
+        return archived
+
+    async def archive_day(self, day: date) -> int:
+        """
+        Move the attacks of one UTC day into a new Parquet file.
+
+        The file is written and synced before the rows, and the sessions
+        and credentials of the archived attacks, are deleted. Its
+        name is derived from the archived IDs, so rerunning after a crash
+        between the two steps overwrites it instead of duplicating rows.
+        On PostgreSQL the read and the delete share one repeatable-read
+        snapshot, so rows committed meanwhile are left for the next run.
+
+        Args:
+            day: The day to archive.
+
+        Returns:
+            Number of attacks archived.
+        """
+        import pyarrow.parquet as pq
+
+        start, end = _day_bounds(day)
+        in_day = (Attack.timestamp >= start, Attack.timestamp < end)
+        query = (
+            select(*(getattr(Attack, name) for name in ATTACK_COLUMNS))
+            .where(*in_day)
+            .order_by(
+                Attack.service, Attack.ip, Attack.timestamp, Attack.id
+            )
+            .execution_options(yield_per=self.batch_size)
+        )
+        directory = self.directory / f"date={day.isoformat()}"
+        directory.mkdir(parents=True, exist_ok=True)
+        # Dot-prefixed files are ignored by dataset scans
+        temporary = directory / f".tmp-{uuid.uuid4().hex}.parquet"
+        digest = hashlib.blake2b(digest_size=16)
+        schema = attack_schema()
+        session_factory = self._session_factory or database.AsyncSessionLocal
+
+        async with session_factory() as session, session_factory() as blobs:
+            # Must be set before the session's transaction begins
+            if session.get_bind().dialect.name == "postgresql":
+                await session.connection(
+                    execution_options={"isolation_level": "REPEATABLE READ"}
+                )
+
+            count = 0
+            writer = None
+            try:
+                result = await session.stream(query)
+                async for rows in result.partitions():
+                    # Archive files are self-contained
+                    await payload_blobs.rehydrate(
+                        blobs, [row.payload for row in rows]
+                    )
+                    for row in rows:
+                        digest.update(row.id.bytes)
+                    if writer is None:
+                        writer = pq.ParquetWriter(
+                            temporary, schema, compression=self.compression
+                        )
+                    await asyncio.to_thread(
+                        writer.write_table, attack_table(rows, schema)
+                    )
+                    count += len(rows)
+            finally:
+                if writer is not None:
+                    writer.close()
+            if not count:
+                temporary.unlink(missing_ok=True)
+                return 0
+
+            path = directory / f"part-{digest.hexdigest()}.parquet"
+            await asyncio.to_thread(_fsync, temporary)
+            os.replace(temporary, path)
+            await asyncio.to_thread(_fsync, directory)
+
+            await self._delete_attacks(session, in_day)
+            await session.commit()
+
+        logger.info(
+            "attacks_archived", day=day.isoformat(), rows=count, file=str(path)
+        )
+        return count
+
+    @staticmethod
+    async def _delete_attacks(
+        session: AsyncSession, in_day: Sequence[Any]
+    ) -> None:
+        """Delete archived attacks with their sessions and credentials."""
+        # Not linked by foreign keys that could cascade
+        attack_ids: Select[Any] = select(Attack.id).where(*in_day)
+        session_ids: Select[Any] = select(Session.id).where(
+            Session.attack_id.in_(attack_ids)
+        )
+        await session.execute(
+            delete(SessionCommand).where(
+                SessionCommand.session_id.in_(session_ids)
+            )
+        )
+        for model in (Session, Credential):
+            await session.execute(
+                delete(model).where(model.attack_id.in_(attack_ids))
+            )
+        await session.execute(delete(Attack).where(*in_day))
+
+    def _dataset(self) -> Any:
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+
+        if not self.directory.is_dir():
+            return None
+        return ds.dataset(
+            self.directory,
+            schema=attack_schema().append(pa.field("date", pa.string())),
+            format="parquet",
+            partitioning=ds.partitioning(
+                pa.schema([("date", pa.string())]), flavor="hive"
+            ),
+        )
+
+    @staticmethod
+    def _filter(
+        start: Optional[datetime],
+        end: Optional[datetime],
+        service: Optional[str],
+        ip: Optional[str],
+    ) -> Any:
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+
+        def utc(moment: datetime) -> Any:
+            if moment.tzinfo is None:
+                moment = moment.replace(tzinfo=timezone.utc)
+            return pa.scalar(moment, type=pa.timestamp("us", tz="UTC"))
+
+        conditions = []
+        if start is not None:
+            # Partition pruning on the directory name, then row groups
+            day = start.astimezone(timezone.utc) if start.tzinfo else start
+            conditions.append(ds.field("date") >= day.date().isoformat())
+            conditions.append(ds.field("timestamp") >= utc(start))
+        if end is not None:
+            day = end.astimezone(timezone.utc) if end.tzinfo else end
+            conditions.append(ds.field("date") <= day.date().isoformat())
+            conditions.append(ds.field("timestamp") <= utc(end))
+        if service is not None:
+            conditions.append(ds.field("service") == service)
+        if ip is not None:
+            conditions.append(ds.field("ip") == ip)
+
+        expression = None
+        for condition in conditions:
+            expression = (
+                condition if expression is None else expression & condition
+            )
+        return expression
+
+    def scan(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        service: Optional[str] = None,
+        ip: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Read archived attacks matching the filters.
+
+        Blocking; run it in a thread from async code.
+
+        Args:
+            start: Earliest timestamp.
+            end: Latest timestamp.
+            service: Service to match.
+            ip: Source IP to match.
+            limit: Maximum number of rows.
+
+        Returns:
+            Attacks as dicts with decoded payloads, in archive order.
+        """
+        dataset = self._dataset()
+        if dataset is None:
+            return []
+        scanner = dataset.scanner(
+            columns=list(ATTACK_COLUMNS),
+            filter=self._filter(start, end, service, ip),
+        )
+        rows: List[Dict[str, Any]] = []
+        for batch in scanner.to_batches():
+            for row in batch.to_pylist():
+                if row["payload"] is not None:
+                    row["payload"] = json.loads(row["payload"])
+                rows.append(row)
+                if limit is not None and len(rows) >= limit:
+                    return rows
+        return rows
+
+    def aggregate(
+        self,
+        group_by: str = "service",
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        service: Optional[str] = None,
+        ip: Optional[str] = None,
+    ) -> Dict[str, int]:
+        """
+        Count archived attacks matching the filters by one field.
+
+        Only the grouping column is read. Blocking; run it in a thread
+        from async code.
+
+        Args:
+            group_by: One of ``GROUP_BY_FIELDS``.
+            start: Earliest timestamp.
+            end: Latest timestamp.
+            service: Service to match.
+            ip: Source IP to match.
+
+        Returns:
+            Count per value; missing values are counted under "".
+        """
+        import pyarrow.compute as pc
+
+        if group_by not in GROUP_BY_FIELDS:
+            raise ValueError(f"Cannot group by {group_by}")
+        dataset = self._dataset()
+        if dataset is None:
+            return {}
+        scanner = dataset.scanner(
+            columns=[group_by],
+            filter=self._filter(start, end, service, ip),
+        )
+        counts: Counter = Counter()
+        for batch in scanner.to_batches():
+            for entry in pc.value_counts(batch.column(0)).to_pylist():
+                counts[entry["values"] or ""] += entry["counts"]
+        return dict(counts)
+
+    async def run(self) -> None:
+        """Archive periodically until cancelled."""
+        if not pyarrow_available():
+            logger.error("attack_archive_unavailable", reason="pyarrow")
+            return
+        while True:
+            try:
+                await self.archive()
+            except Exception as e:
+                logger.error("attack_archive_failed", error=str(e))
+            await asyncio.sleep(self.interval)
+
+
+# Global archive instance
+attack_archive = AttackArchive()
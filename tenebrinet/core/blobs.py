@@ -0,0 +1,280 @@
+# tenebrinet/core/blobs.py
+"""
+Content-addressed storage of large attack payload components.
+
+Scanners send byte-identical headers and bodies thousands of times. When
+the event sink writes attacks, every top-level payload value whose JSON
+text is at least ``ingest.payload_blob_min_size`` bytes is stored once in
+``payload_blobs`` under its SHA-256 and replaced in the payload by a
+reference::
+
+    {"method": "GET", "_blobs": {"headers": "<sha256>"}, ...}
+
+Readers call ``PayloadBlobs.rehydrate`` to put the values back. Blobs are
+immutable, so their contents are cached in process without invalidation;
+the same cache remembers which blobs are already stored, so repeated
+components are neither sent to the database again nor looked up again.
+
+Retention and archival delete attacks but not their blobs; they call
+``PayloadBlobs.sweep`` afterwards to delete the blobs no remaining
+attack references.
+"""
+import hashlib
+import json
+from datetime import datetime, timezone
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+
+import structlog
+from sqlalchemy import Result, delete, select
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from tenebrinet.core.cache import TTLCache
+from tenebrinet.core.config import IngestConfig
+from tenebrinet.core.database import insert_missing
+from tenebrinet.core.metrics import (
+    PAYLOAD_BLOB_REFERENCES,
+    PAYLOAD_BLOBS_WRITTEN,
+)
+from tenebrinet.core.models import Attack, PayloadBlob
+
+
+logger = structlog.get_logger()
+
+# Payload key holding the references of externalized components
+BLOB_REFS_KEY = "_blobs"
+
+# Blobs never change; the expiry only bounds how long a blob swept by
+# another process is still assumed to be stored
+CACHE_TTL = 3600.0
+
+# Digests looked up or deleted per query
+LOOKUP_CHUNK = 1000
+
+
+def _encode(value: Any) -> str:
+    return json.dumps(
+        value, sort_keys=True, separators=(",", ":"), ensure_ascii=False
+    )
+
+
+def blob_digest(content: str) -> str:
+    """Return the hex SHA-256 of a blob's content."""
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+class PayloadBlobs:
+    """Splits large payload components into blobs and restores them."""
+
+    def __init__(self, min_size: int = 256, cache_entries: int = 4096) -> None:
+        """
+        Initialize the blob store.
+
+        Args:
+            min_size: Minimum JSON size in bytes of a payload component
+                to store as a blob; 0 disables blobs.
+            cache_entries: Blob contents kept in process.
+        """
+        self.min_size = min_size
+        self._cache = TTLCache(max_entries=cache_entries)
+
+    def configure(self, config: IngestConfig) -> None:
+        """Apply settings from the ``ingest`` configuration section."""
+        self.min_size = config.payload_blob_min_size
+        self._cache = TTLCache(max_entries=config.payload_blob_cache_entries)
+
+    def split(
+        self, rows: Sequence[Dict[str, Any]]
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, str]]:
+        """
+        Replace large payload components by blob references.
+
+        The given rows are not modified.
+
+        Args:
+            rows: Attack column values as queued by the services.
+
+        Returns:
+            Tuple of (rows to insert, blob contents by digest that are not
+            known to be stored yet).
+        """
+        if not self.min_size:
+            return list(rows), {}
+
+        result: List[Dict[str, Any]] = []
+        blobs: Dict[str, str] = {}
+        for row in rows:
+            payload = row.get("payload")
+            if not isinstance(payload, dict):
+                result.append(row)
+                continue
+
+            compact: Dict[str, Any] = {}
+            refs: Dict[str, str] = {}
+            for key, value in payload.items():
+                if value is None or key == BLOB_REFS_KEY:
+                    compact[key] = value
+                    continue
+                content = _encode(value)
+                if len(content.encode("utf-8")) < self.min_size:
+                    compact[key] = value
+                    continue
+                digest = blob_digest(content)
+                refs[key] = digest
+                if digest not in self._cache:
+                    blobs[digest] = content
+
+            if refs:
+                compact[BLOB_REFS_KEY] = refs
+                PAYLOAD_BLOB_REFERENCES.inc(len(refs))
+                row = {**row, "payload": compact}
+            result.append(row)
+        return result, blobs
+
+    async def store(
+        self, session: AsyncSession, blobs: Dict[str, str]
+    ) -> None:
+        """
+        Insert blobs that are not stored yet.
+
+        Must run in the transaction that inserts the referencing rows;
+        call ``remember`` once it has committed.
+        """
+        if not blobs:
+            return
+        await insert_missing(session, PayloadBlob, [
+            {
+                "digest": digest,
+                "content": content,
+                "size": len(content.encode("utf-8")),
+            }
+            for digest, content in blobs.items()
+        ])
+        PAYLOAD_BLOBS_WRITTEN.inc(len(blobs))
+
+    def remember(self, blobs: Dict[str, str]) -> None:
+        """Record blobs as stored after their transaction committed."""
+        for digest, content in blobs.items():
+            self._cache.set(digest, content, CACHE_TTL)
+
+    async def rehydrate(
+        self,
+        session: AsyncSession,
+        payloads: Iterable[Optional[Dict[str, Any]]],
+    ) -> None:
+        """
+        Put referenced blob contents back into payloads, in place.
+
+        Payloads without references are left alone; references to blobs
+        that cannot be found are kept.
+
+        Args:
+            session: Session to read missing blobs with.
+            payloads: Payload dicts (or None) to restore.
+        """
+        pending = [
+            payload
+            for payload in payloads
+            if isinstance(payload, dict)
+            and isinstance(payload.get(BLOB_REFS_KEY), dict)
+        ]
+        if not pending:
+            return
+
+        contents: Dict[str, str] = {}
+        missing = set()
+        for payload in pending:
+            for digest in payload[BLOB_REFS_KEY].values():
+                content = self._cache.get(digest)
+                if content is None:
+                    missing.add(digest)
+                else:
+                    contents[digest] = content
+
+        digests = sorted(missing)
+        for start in range(0, len(digests), LOOKUP_CHUNK):
+            result: Result[Any] = await session.execute(
+                select(PayloadBlob.digest, PayloadBlob.content).where(
+                    PayloadBlob.digest.in_(digests[start:start + LOOKUP_CHUNK])
+                )
+            )
+            for digest, content in result:
+                contents[digest] = content
+                self._cache.set(digest, content, CACHE_TTL)
+
+        for payload in pending:
+            refs = payload.pop(BLOB_REFS_KEY)
+            unresolved = {}
+            for key, digest in refs.items():
+                if digest in contents:
+                    payload[key] = json.loads(contents[digest])
+                else:
+                    unresolved[key] = digest
+            if unresolved:
+                payload[BLOB_REFS_KEY] = unresolved
+
+    async def sweep(
+        self, conn: AsyncConnection, chunk: int = LOOKUP_CHUNK
+    ) -> int:
+        """
+        Delete blobs that no stored attack references.
+
+        Reads the blob references of every remaining attack, then deletes
+        the unreferenced blobs in chunks. Only blobs stored before the
+        sweep started are candidates, so blobs committed meanwhile with
+        their attacks are kept. The caller commits.
+
+        Args:
+            conn: Connection whose transaction to use.
+            chunk: Rows read per fetch and blobs deleted per statement.
+
+        Returns:
+            Number of blobs deleted.
+        """
+        started = datetime.now(timezone.utc)
+        attacks = Attack.__table__.c
+        blobs = PayloadBlob.__table__.c
+
+        referenced: Set[str] = set()
+        result = await conn.stream(
+            select(attacks.payload[BLOB_REFS_KEY])
+            .execution_options(yield_per=chunk)
+        )
+        async for refs, in result:
+            if isinstance(refs, dict):
+                referenced.update(refs.values())
+
+        unreferenced = [
+            digest
+            for digest, in await conn.execute(
+                select(blobs.digest).where(blobs.created_at < started)
+            )
+            if digest not in referenced
+        ]
+        for start in range(0, len(unreferenced), chunk):
+            await conn.execute(
+                delete(PayloadBlob).where(
+                    blobs.digest.in_(unreferenced[start:start + chunk])
+                )
+            )
+        for digest in unreferenced:
+            self._cache.delete(digest)
+
+        logger.info(
+            "payload_blobs_swept",
+            deleted=len(unreferenced),
+            referenced=len(referenced),
+        )
+        return len(unreferenced)
+
+
+# Global blob store used by the event sink and the API
+payload_blobs = PayloadBlobs()
@@ -1,25 +1,212 @@
 # tenebrinet/core/cache.py
 """
-Redis caching layer for TenebriNET.
+Two-tier caching layer for TenebriNET.
 
 Provides caching functionality for frequently accessed data to reduce
-database load and improve API response times.
+database load and improve API response times. Lookups go through a small
+in-process LRU/TTL tier before Redis, so hot keys polled by many
+dashboard clients cost no network round trip. ``get_or_set`` adds
+stampede protection: concurrent misses of one key share a single
+recompute, and values past their soft TTL are served while being
+refreshed in the background.
+
+Values are stored in Redis with a configurable serializer (stdlib json,
+or orjson/msgpack from the ``cache`` extra). Related keys can be tagged
+and dropped together with ``invalidate_tag``, which reads one Redis set
+instead of scanning the keyspace.
+
+Without a Redis URL (embedded mode) the in-process tier is the whole
+cache, with the same interface.
 """
+import asyncio
 import json
 import os
-from typing import Any, Optional
+import time
+from collections import OrderedDict
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    Mapping,
+    Optional,
+    Set,
+    Tuple,
+)
 
 import redis.asyncio as redis
+import structlog
+
+from tenebrinet.core.config import RedisConfig
+from tenebrinet.core.metrics import (
+    CACHE_COALESCED,
+    CACHE_ERRORS,
+    CACHE_HITS,
+    CACHE_MISSES,
+    CACHE_RECOMPUTES,
+    CACHE_STALE_SERVED,
+)
+
+
+logger = structlog.get_logger()
+
+_MISSING = object()
+
+DEFAULT_REDIS_URL = "redis://localhost:6379/0"
+
+# Extends the TTL of a tag set to ARGV[1] unless it already lives
+# longer; EXPIRE's NX and GT options would require Redis 7
+_EXTEND_TTL = """
+if redis.call('TTL', KEYS[1]) < tonumber(ARGV[1]) then
+    return redis.call('EXPIRE', KEYS[1], ARGV[1])
+end
+return 0
+"""
+
+Serializer = Tuple[Callable[[Any], bytes], Callable[[bytes], Any]]
+
+
+def get_serializer(name: str) -> Serializer:
+    """
+    Return the ``(dumps, loads)`` pair of a cache serializer.
+
+    Args:
+        name: ``json``, ``orjson`` or ``msgpack``.
+
+    Raises:
+        ImportError: If the serializer's package is not installed.
+    """
+    if name == "orjson":
+        import orjson
+
+        return orjson.dumps, orjson.loads
+    if name == "msgpack":
+        import msgpack
+
+        return (
+            lambda value: msgpack.packb(value, use_bin_type=True),
+            lambda data: msgpack.unpackb(data, raw=False),
+        )
+    if name == "json":
+        return lambda value: json.dumps(value).encode("utf-8"), json.loads
+    raise ValueError(f"Unknown cache serializer: {name}")
+
+
+def _tag_key(tag: str) -> str:
+    return f"tag:{tag}"
+
+
+class TTLCache:
+    """Bounded in-process cache with per-entry expiry and LRU eviction."""
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Entries kept before the least recently used one
+                is evicted.
+            clock: Monotonic time source, replaceable in tests.
+        """
+        self.max_entries = max_entries
+        self._clock = clock
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """
+        Get a live value and mark it as recently used.
+
+        Args:
+            key: Cache key
+            default: Returned if the key is missing or expired
+
+        Returns:
+            Cached value, or ``default``
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+        expires_at, value = entry
+        if expires_at <= self._clock():
+            del self._entries[key]
+            return default
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        """
+        Store a value, evicting the least recently used entry if full.
+
+        Args:
+            key: Cache key
+            value: Value to cache; stored by reference
+            ttl: Time to live in seconds
+        """
+        self._entries[key] = (self._clock() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> bool:
+        """Remove a key; returns whether it was present."""
+        return self._entries.pop(key, None) is not None
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        self._entries.clear()
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __len__(self) -> int:
+        return len(self._entries)
 
 
 class CacheManager:
-    """Manages Redis caching operations."""
+    """Manages the in-process and Redis caching tiers."""
 
-    def __init__(self):
-        """Initialize the cache manager with Redis connection."""
-        redis_url = os.getenv("REDIS_URL", "redis://localhost:6379/0")
-        self.redis = redis.from_url(redis_url, decode_responses=True)
+    def __init__(self, config: Optional[RedisConfig] = None):
+        """
+        Initialize the cache manager.
+
+        Args:
+            config: Redis and cache settings. Defaults to the Redis at
+                ``REDIS_URL`` (a local one if unset) with the default
+                settings; replace with ``configure``. A config without
+                ``url`` keeps the cache in process.
+        """
         self.default_ttl = 60  # Default TTL: 60 seconds
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.configure(
+            config
+            or RedisConfig(url=os.getenv("REDIS_URL", DEFAULT_REDIS_URL))
+        )
+
+    def configure(self, config: RedisConfig) -> None:
+        """
+        Apply settings from the ``redis`` configuration section.
+
+        Builds a new connection pool and empties the in-process tier, so
+        call it at startup before the cache is used.
+        """
+        self.redis: Optional[redis.Redis] = None
+        if config.url:
+            self.redis = redis.from_url(
+                config.url,
+                max_connections=config.max_connections,
+                socket_timeout=config.socket_timeout,
+                socket_connect_timeout=config.socket_timeout,
+            )
+        self._dumps, self._loads = get_serializer(config.serializer)
+        self.local = TTLCache(config.local_max_entries)
+        self.local_ttl = config.local_ttl
+        # Tagged keys of the in-process tier; only used without Redis
+        self._local_tags: Dict[str, Set[str]] = {}
 
     async def get(self, key: str) -> Optional[Any]:
         """
@@ -31,39 +218,231 @@ class CacheManager:
         Returns:
             Cached value if exists, None otherwise
         """
+        return (await self.get_many([key])).get(key)
+
+    async def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """
+        Get several values with at most one Redis round trip.
+
+        Args:
+            keys: Cache keys
+
+        Returns:
+            Mapping of the keys that were found to their values
+        """
+        found: Dict[str, Any] = {}
+        missing = []
+        for key in keys:
+            value = self.local.get(key, _MISSING)
+            if value is _MISSING:
+                missing.append(key)
+            else:
+                CACHE_HITS.labels(tier="local").inc()
+                found[key] = value
+        if self.redis is None:
+            CACHE_MISSES.inc(len(missing))
+            return found
+        if not missing:
+            return found
+
         try:
-            value = await self.redis.get(key)
-            if value:
-                return json.loads(value)
-            return None
+            raw_values = await self.redis.mget(missing)
         except Exception as e:
             # Log error but don't fail - cache is optional
-            print(f"Cache get error: {e}")
-            return None
+            CACHE_ERRORS.labels(operation="get").inc()
+            logger.warning("cache_get_failed", keys=missing, error=str(e))
+            raw_values = [None] * len(missing)
+
+        for key, raw in zip(missing, raw_values):
+            value = self._decode(key, raw)
+            if value is _MISSING:
+                CACHE_MISSES.inc()
+                continue
+            CACHE_HITS.labels(tier="redis").inc()
+            self.local.set(key, value, self.local_ttl)
+            found[key] = value
+        return found
+
+    def _decode(self, key: str, raw: Optional[bytes]) -> Any:
+        if raw is None:
+            return _MISSING
+        try:
+            return self._loads(raw)
+        except Exception as e:
+            # E.g. written with another serializer; treat as a miss
+            CACHE_ERRORS.labels(operation="decode").inc()
+            logger.warning("cache_decode_failed", key=key, error=str(e))
+            return _MISSING
 
     async def set(
-        self, key: str, value: Any, ttl: Optional[int] = None
+        self,
+        key: str,
+        value: Any,
+        ttl: Optional[int] = None,
+        tags: Iterable[str] = (),
     ) -> bool:
         """
         Set a value in cache.
 
         Args:
             key: Cache key
-            value: Value to cache (must be JSON-serializable)
+            value: Value to cache (must be serializable)
+            ttl: Time to live in seconds (default: 60)
+            tags: Tags to invalidate the key by
+
+        Returns:
+            True if successful, False otherwise
+        """
+        return await self.set_many({key: value}, ttl, tags)
+
+    async def set_many(
+        self,
+        values: Mapping[str, Any],
+        ttl: Optional[int] = None,
+        tags: Iterable[str] = (),
+    ) -> bool:
+        """
+        Set several values in one Redis pipeline.
+
+        Args:
+            values: Mapping of cache keys to values
             ttl: Time to live in seconds (default: 60)
+            tags: Tags added to every key
 
         Returns:
             True if successful, False otherwise
         """
+        if not values:
+            return True
+        ttl = ttl or self.default_ttl
+        if self.redis is None:
+            for key, value in values.items():
+                self.local.set(key, value, ttl)
+            self._tag_locally(values, tags)
+            return True
+
+        for key, value in values.items():
+            self.local.set(key, value, min(ttl, self.local_ttl))
         try:
-            ttl = ttl or self.default_ttl
-            serialized = json.dumps(value)
-            await self.redis.setex(key, ttl, serialized)
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for key, value in values.items():
+                    pipe.setex(key, ttl, self._dumps(value))
+                for tag in tags:
+                    tag_key = _tag_key(tag)
+                    pipe.sadd(tag_key, *values)
+                    # Keep the tag set as long as its longest-lived key
+                    pipe.eval(_EXTEND_TTL, 1, tag_key, ttl)
+                await pipe.execute()
             return True
         except Exception as e:
-            print(f"Cache set error: {e}")
+            CACHE_ERRORS.labels(operation="set").inc()
+            logger.warning("cache_set_failed", keys=list(values), error=str(e))
             return False
 
+    def _tag_locally(self, keys: Iterable[str], tags: Iterable[str]) -> None:
+        for tag in tags:
+            tagged = self._local_tags.setdefault(tag, set())
+            tagged.update(keys)
+            if len(tagged) > self.local.max_entries:
+                # Forget keys that were evicted or expired meanwhile
+                tagged.intersection_update(
+                    [key for key in tagged if key in self.local]
+                )
+
+    async def get_or_set(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        ttl: Optional[int] = None,
+        soft_ttl: Optional[float] = None,
+        tags: Iterable[str] = (),
+    ) -> Any:
+        """
+        Get a value, computing and caching it on a miss.
+
+        Concurrent misses of the same key in this process wait for one
+        shared call of ``compute``. Once a value is older than
+        ``soft_ttl`` it is still returned, and one background call of
+        ``compute`` replaces it before the hard ``ttl`` runs out, so
+        readers do not see the miss at all while the key stays hot.
+
+        ``compute`` may outlive the request that triggered it, so it must
+        not use request-scoped resources such as the request's database
+        session.
+
+        Args:
+            key: Cache key
+            compute: Coroutine function returning a JSON-serializable
+                value
+            ttl: Time to live in seconds (default: 60)
+            soft_ttl: Age in seconds after which the value is refreshed
+                in the background; no background refresh if None
+            tags: Tags to invalidate the key by
+
+        Returns:
+            Cached or freshly computed value
+        """
+        ttl = ttl or self.default_ttl
+        entry = await self.get(key)
+        if isinstance(entry, dict) and "value" in entry:
+            refresh_at = entry.get("refresh_at")
+            if refresh_at is not None and time.time() >= refresh_at:
+                CACHE_STALE_SERVED.inc()
+                self._recompute(key, compute, ttl, soft_ttl, tags)
+            return entry["value"]
+
+        if key in self._inflight:
+            CACHE_COALESCED.inc()
+        # Shielded so a cancelled request does not abort the recompute
+        # other requests are waiting on
+        return await asyncio.shield(
+            self._recompute(key, compute, ttl, soft_ttl, tags)
+        )
+
+    def _recompute(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        ttl: int,
+        soft_ttl: Optional[float],
+        tags: Iterable[str],
+    ) -> asyncio.Task:
+        """Return the in-flight recompute of ``key``, starting one if idle."""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(
+                self._compute_and_store(key, compute, ttl, soft_ttl, tags)
+            )
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        return task
+
+    async def _compute_and_store(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        ttl: int,
+        soft_ttl: Optional[float],
+        tags: Iterable[str],
+    ) -> Any:
+        value = await compute()
+        CACHE_RECOMPUTES.inc()
+        refresh_at = time.time() + soft_ttl if soft_ttl is not None else None
+        await self.set(
+            key, {"value": value, "refresh_at": refresh_at}, ttl, tags
+        )
+        return value
+
+    def _finish(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled() and task.exception() is not None:
+            # Retrieving the exception also keeps background refreshes
+            # that nobody awaits from warning at garbage collection
+            logger.warning(
+                "cache_recompute_failed", key=key, error=str(task.exception())
+            )
+
     async def delete(self, key: str) -> bool:
         """
         Delete a key from cache.
@@ -74,37 +453,69 @@ class CacheManager:
         Returns:
             True if successful, False otherwise
         """
+        self.local.delete(key)
+        if self.redis is None:
+            return True
         try:
             await self.redis.delete(key)
             return True
         except Exception as e:
-            print(f"Cache delete error: {e}")
+            CACHE_ERRORS.labels(operation="delete").inc()
+            logger.warning("cache_delete_failed", key=key, error=str(e))
             return False
 
-    async def invalidate_pattern(self, pattern: str) -> int:
+    async def invalidate_tag(self, tag: str) -> int:
         """
-        Invalidate all keys matching a pattern.
+        Invalidate all keys set with a tag.
 
         Args:
-            pattern: Redis key pattern (e.g., "stats:*")
+            tag: Tag passed to ``set``, ``set_many`` or ``get_or_set``
 
         Returns:
-            Number of keys deleted
+            Number of keys deleted from Redis (from the in-process tier
+            without Redis)
         """
+        if self.redis is None:
+            return sum(
+                self.local.delete(key)
+                for key in self._local_tags.pop(tag, set())
+            )
         try:
-            keys = []
-            async for key in self.redis.scan_iter(match=pattern):
-                keys.append(key)
-            if keys:
-                return await self.redis.delete(*keys)
+            # Read and drop the tag set atomically; keys tagged afterwards
+            # start a new set
+            async with self.redis.pipeline(transaction=True) as pipe:
+                pipe.smembers(_tag_key(tag))
+                pipe.delete(_tag_key(tag))
+                members, _ = await pipe.execute()
+        except Exception as e:
+            CACHE_ERRORS.labels(operation="invalidate").inc()
+            logger.warning("cache_invalidate_failed", tag=tag, error=str(e))
+            # The tagged keys are unknown; drop everything held locally
+            self.local.clear()
             return 0
+
+        keys = [
+            member.decode("utf-8") if isinstance(member, bytes) else member
+            for member in members
+        ]
+        for key in keys:
+            self.local.delete(key)
+        if not keys:
+            return 0
+        try:
+            return await self.redis.delete(*keys)
         except Exception as e:
-            print(f"Cache invalidate error: {e}")
+            CACHE_ERRORS.labels(operation="invalidate").inc()
+            logger.warning("cache_invalidate_failed", tag=tag, error=str(e))
             return 0
 
     async def close(self) -> None:
-        """Close the Redis connection."""
-        await self.redis.close()
+        """Cancel pending recomputes and close the Redis connection."""
+        for task in list(self._inflight.values()):
+            task.cancel()
+        self.local.clear()
+        if self.redis is not None:
+            await self.redis.close()
 
 
 # Global cache instance
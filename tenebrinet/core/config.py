@@ -32,6 +32,23 @@ class HTTPServiceConfig(BaseModel):
     host: str = "0.0.0.0"
     fake_cms: str = "WordPress 5.8"
     serve_files: bool = True
+    background_recording: bool = True
+    max_pending_records: int = 1000
+    # Requests with more characters than this (path, query and body) are
+    # matched in worker processes, each match limited to a CPU budget
+    detection_inline_max_chars: int = 4096
+    detection_workers: int = Field(default=2, ge=1)
+    detection_cpu_budget: float = Field(default=0.25, gt=0)
+    # Offloaded matches in flight; beyond it requests are matched inline
+    # on their first detection_inline_max_chars characters
+    detection_max_queue: int = Field(default=64, ge=1)
+    # Verdicts reused for identical requests; 0 disables the cache
+    detection_cache_entries: int = Field(default=10000, ge=0)
+    detection_cache_ttl: float = Field(default=300.0, gt=0)
+    # YAML threat signature rules, reloaded on change; None uses the
+    # built-in signatures
+    rules_file: Optional[str] = None
+    rules_reload_interval: float = Field(default=5.0, gt=0)
 
 
 class FTPServiceConfig(BaseModel):
@@ -56,15 +73,71 @@ class DatabaseConfig(BaseModel):
     """Database connection configuration."""
 
     url: str
+    # Pool for API queries
     pool_size: int = 10
     max_overflow: int = 20
+    # Pool for the honeypot ingest path (event sink, aggregates)
+    ingest_pool_size: int = 5
+    ingest_max_overflow: int = 5
+    pool_timeout: float = 30.0
+    pool_recycle: int = 3600
+    # Optional read replica for read-only API routes
+    read_url: Optional[str] = None
+    max_replica_lag: float = 5.0
+    replica_lag_check_interval: float = 5.0
+    # Embedded mode (sqlite+aiosqlite URLs)
+    sqlite_synchronous: Literal["OFF", "NORMAL", "FULL"] = "NORMAL"
+    sqlite_busy_timeout: float = 5.0
     echo: bool = False
+    auto_migrate: bool = False
+    partition_interval: Literal["daily", "weekly"] = "daily"
+    partitions_ahead: int = 7
+    retention_days: Optional[int] = None
 
 
 class RedisConfig(BaseModel):
-    """Redis connection configuration."""
+    """Redis connection and cache configuration."""
+
+    # None keeps the cache in process only (embedded mode)
+    url: Optional[str] = None
+    max_connections: int = 50
+    socket_timeout: float = 1.0
+    serializer: Literal["json", "orjson", "msgpack"] = "json"
+    local_max_entries: int = 1024
+    local_ttl: float = 5.0
+
+
+class IngestConfig(BaseModel):
+    """Write-behind event ingestion configuration."""
+
+    batch_size: int = 500
+    flush_interval: float = 1.0
+    max_queue_size: int = 10000
+    spool_enabled: bool = True
+    spool_dir: str = "data/spool"
+    spool_segment_mb: int = 64
+    spool_fsync_interval: float = 1.0
+    spool_replay_interval: float = 5.0
+    # Replay attempts before a failing batch goes to the dead-letter file
+    spool_max_replay_attempts: int = Field(default=3, ge=1)
+    node_id: Optional[str] = None
+    aggregate_checkpoint_interval: float = 10.0
+    # Payload components at least this large (bytes of JSON) are stored
+    # once as content-addressed blobs; 0 keeps payloads inline
+    payload_blob_min_size: int = 256
+    payload_blob_cache_entries: int = 4096
+
+
+class ArchiveConfig(BaseModel):
+    """Cold archive of old attacks to Parquet files."""
 
-    url: str
+    enabled: bool = False
+    directory: str = "data/archive"
+    # Keep below database.retention_days, or partitions are dropped first
+    after_days: int = Field(default=90, ge=1)
+    interval: float = 3600.0
+    compression: Literal["zstd", "snappy", "gzip", "none"] = "zstd"
+    batch_size: int = 50000
 
 
 class MLConfig(BaseModel):
@@ -112,7 +185,9 @@ class TenebriNetConfig(BaseModel):
 
     services: ServicesConfig
     database: DatabaseConfig
-    redis: RedisConfig
+    redis: RedisConfig = Field(default_factory=RedisConfig)
+    ingest: IngestConfig = Field(default_factory=IngestConfig)
+    archive: ArchiveConfig = Field(default_factory=ArchiveConfig)
     ml: MLConfig
     threat_intel: ThreatIntelConfig
     logging: LoggingConfig
@@ -121,6 +196,10 @@ class TenebriNetConfig(BaseModel):
 # Regex pattern for ${VAR_NAME} or ${VAR_NAME:default}
 ENV_VAR_PATTERN = re.compile(r"\$\{(\w+)(?::([^}]*))?\}")
 
+# Path of the configuration file, set by the CLI for processes it spawns
+# (such as the API server) that have no --config option of their own
+CONFIG_ENV_VAR = "TENEBRINET_CONFIG"
+
 
 def substitute_env_vars(content: str) -> str:
     """
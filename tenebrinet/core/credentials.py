@@ -0,0 +1,129 @@
+# tenebrinet/core/credentials.py
+"""
+Deduplicated credential dictionary for TenebriNET.
+
+Brute-force tools try the same few thousand username/password pairs
+over and over, so each distinct pair is stored once in
+``credential_pairs`` together with its attempt and success counts and
+first and last sighting. ``credentials`` rows only reference their pair.
+
+Pair IDs are a 64-bit hash of the pair, so ingest nodes compute them
+without a lookup; the event sink upserts a batch's pairs in the same
+transaction as its credential rows.
+"""
+import hashlib
+import json
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from tenebrinet.core.database import upsert_counters
+from tenebrinet.core.models import CredentialPair
+
+
+def pair_id(username: str, password: str) -> int:
+    """Return the signed 64-bit ID of a username/password pair."""
+    digest = hashlib.blake2b(
+        json.dumps([username, password]).encode("utf-8"), digest_size=8
+    ).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+def _as_utc(timestamp: datetime) -> datetime:
+    if timestamp.tzinfo is None:
+        return timestamp.replace(tzinfo=timezone.utc)
+    return timestamp.astimezone(timezone.utc)
+
+
+def summarize_credentials(
+    rows: Sequence[Dict[str, Any]],
+    attacks: Iterable[Dict[str, Any]] = (),
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Split captured credentials into credential rows and pair increments.
+
+    Args:
+        rows: Credential values as queued by the services, with
+            ``username`` and ``password``.
+        attacks: Attack rows of the same batch; their timestamps date the
+            attempts. Attempts of other attacks are dated now.
+
+    Returns:
+        Tuple of (credentials rows with ``pair_id``, credential_pairs
+        rows with unique IDs).
+    """
+    now = datetime.now(timezone.utc)
+    seen_at = {
+        attack["id"]: _as_utc(attack["timestamp"])
+        for attack in attacks
+        if attack.get("timestamp") is not None
+    }
+    credentials: List[Dict[str, Any]] = []
+    pairs: Dict[int, Dict[str, Any]] = {}
+
+    for row in rows:
+        username, password = row["username"], row["password"]
+        key = pair_id(username, password)
+        success = bool(row.get("success"))
+        seen = seen_at.get(row.get("attack_id"), now)
+
+        entry = pairs.get(key)
+        if entry is None:
+            pairs[key] = {
+                "id": key,
+                "username": username,
+                "password": password,
+                "attempts": 1,
+                "successes": int(success),
+                "first_seen": seen,
+                "last_seen": seen,
+            }
+        else:
+            entry["attempts"] += 1
+            entry["successes"] += int(success)
+            entry["first_seen"] = min(entry["first_seen"], seen)
+            entry["last_seen"] = max(entry["last_seen"], seen)
+
+        credential = {
+            k: v for k, v in row.items() if k not in ("username", "password")
+        }
+        credential["pair_id"] = key
+        credential["success"] = success
+        credentials.append(credential)
+
+    return credentials, list(pairs.values())
+
+
+async def apply_credential_pairs(
+    session: AsyncSession,
+    rows: Sequence[Dict[str, Any]],
+    attacks: Iterable[Dict[str, Any]] = (),
+) -> List[Dict[str, Any]]:
+    """
+    Count a batch of captured credentials into ``credential_pairs``.
+
+    Must run in the same transaction as, and before, the insert of the
+    returned rows.
+
+    Args:
+        session: Session whose transaction to use.
+        rows: Credential values with ``username`` and ``password``.
+        attacks: Attack rows of the same batch, see
+            ``summarize_credentials``.
+
+    Returns:
+        The ``credentials`` rows to insert, referencing their pairs.
+    """
+    if not rows:
+        return []
+    credentials, pairs = summarize_credentials(rows, attacks)
+    await upsert_counters(
+        session,
+        CredentialPair,
+        pairs,
+        increment=["attempts", "successes"],
+        greatest=["last_seen"],
+        least=["first_seen"],
+    )
+    return credentials
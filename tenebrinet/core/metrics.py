@@ -0,0 +1,226 @@
+# tenebrinet/core/metrics.py
+"""
+Prometheus metrics for TenebriNET.
+
+All metric objects live here so every component registers them once
+against the default registry and dashboards have a single place to look
+up metric names.
+"""
+from prometheus_client import Counter, Gauge, Histogram
+
+
+# --- Event ingestion ---
+
+EVENTS_ENQUEUED = Counter(
+    "tenebrinet_events_enqueued_total",
+    "Events accepted by the write-behind event sink.",
+    ["table"],
+)
+
+EVENTS_FLUSHED = Counter(
+    "tenebrinet_events_flushed_total",
+    "Events persisted to the database by the event sink.",
+    ["table"],
+)
+
+EVENTS_DROPPED = Counter(
+    "tenebrinet_events_dropped_total",
+    "Events rejected because the event sink queue was full.",
+    ["table"],
+)
+
+EVENT_FLUSH_FAILURES = Counter(
+    "tenebrinet_event_flush_failures_total",
+    "Event sink batch flushes that failed to commit.",
+)
+
+EVENT_BATCH_SIZE = Histogram(
+    "tenebrinet_event_batch_size",
+    "Number of events written per event sink flush.",
+    buckets=(1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000),
+)
+
+EVENT_FLUSH_SECONDS = Histogram(
+    "tenebrinet_event_flush_seconds",
+    "Time spent writing one event sink batch.",
+)
+
+EVENT_QUEUE_DEPTH = Gauge(
+    "tenebrinet_event_queue_depth",
+    "Events currently waiting in the event sink queue.",
+)
+
+EVENTS_SPOOLED = Counter(
+    "tenebrinet_events_spooled_total",
+    "Events written to the on-disk spool instead of the database.",
+)
+
+EVENTS_REPLAYED = Counter(
+    "tenebrinet_events_replayed_total",
+    "Spooled events replayed into the database.",
+)
+
+EVENTS_DEAD_LETTERED = Counter(
+    "tenebrinet_events_dead_lettered_total",
+    "Events moved to the spool dead-letter file after failing to commit.",
+)
+
+SPOOL_SEGMENTS = Gauge(
+    "tenebrinet_spool_segments",
+    "Spool segments waiting to be replayed.",
+)
+
+AGGREGATE_CHECKPOINT_FAILURES = Counter(
+    "tenebrinet_aggregate_checkpoint_failures_total",
+    "Streaming aggregate checkpoints that failed to commit.",
+)
+
+AGGREGATE_PENDING_PERIODS = Gauge(
+    "tenebrinet_aggregate_pending_periods",
+    "Aggregate periods with increments not yet checkpointed.",
+)
+
+PAYLOAD_BLOB_REFERENCES = Counter(
+    "tenebrinet_payload_blob_references_total",
+    "Payload components replaced by a reference to a stored blob.",
+)
+
+PAYLOAD_BLOBS_WRITTEN = Counter(
+    "tenebrinet_payload_blobs_written_total",
+    "Payload blobs sent to the database (not known to be stored yet).",
+)
+
+
+# --- HTTP honeypot ---
+
+HTTP_PENDING_RECORDS = Gauge(
+    "tenebrinet_http_pending_records",
+    "HTTP events handed off for background recording.",
+)
+
+HTTP_RECORD_LIMIT_HITS = Counter(
+    "tenebrinet_http_record_limit_hits_total",
+    "HTTP events recorded inline because the pending limit was reached.",
+)
+
+HTTP_DETECTION_OFFLOADED = Counter(
+    "tenebrinet_http_detection_offloaded_total",
+    "HTTP requests matched against threat signatures in a worker process.",
+)
+
+HTTP_DETECTION_OFFLOAD_QUEUE = Gauge(
+    "tenebrinet_http_detection_offload_queue",
+    "Offloaded HTTP threat matches waiting for or running in a worker.",
+)
+
+HTTP_DETECTION_TIMEOUTS = Counter(
+    "tenebrinet_http_detection_timeouts_total",
+    "Offloaded HTTP threat matches stopped at their CPU time budget.",
+)
+
+HTTP_DETECTION_QUEUE_FULL = Counter(
+    "tenebrinet_http_detection_queue_full_total",
+    "Large HTTP requests matched inline because the offload queue was full.",
+)
+
+HTTP_DETECTION_CACHE_HITS = Counter(
+    "tenebrinet_http_detection_cache_hits_total",
+    "HTTP requests whose threat verdict was served from the verdict cache.",
+)
+
+HTTP_DETECTION_CACHE_MISSES = Counter(
+    "tenebrinet_http_detection_cache_misses_total",
+    "HTTP requests matched because no cached verdict was found.",
+)
+
+HTTP_RULE_HITS = Counter(
+    "tenebrinet_http_rule_hits_total",
+    "HTTP requests matched by a threat signature rule.",
+    ["category", "rule"],
+)
+
+HTTP_RULE_EVAL_SECONDS = Counter(
+    "tenebrinet_http_rule_eval_seconds_total",
+    "Time spent evaluating a threat signature rule.",
+    ["category", "rule"],
+)
+
+HTTP_RULE_RELOADS = Counter(
+    "tenebrinet_http_rule_reloads_total",
+    "Reloads of the HTTP threat signature rules file.",
+    ["result"],
+)
+
+
+# --- Cache ---
+
+CACHE_HITS = Counter(
+    "tenebrinet_cache_hits_total",
+    "Cache lookups answered from a cache tier.",
+    ["tier"],
+)
+
+CACHE_MISSES = Counter(
+    "tenebrinet_cache_misses_total",
+    "Cache lookups that found no value in any tier.",
+)
+
+CACHE_RECOMPUTES = Counter(
+    "tenebrinet_cache_recomputes_total",
+    "Cached values recomputed from the database.",
+)
+
+CACHE_COALESCED = Counter(
+    "tenebrinet_cache_coalesced_total",
+    "Cache misses that waited on an in-flight recompute of the same key.",
+)
+
+CACHE_STALE_SERVED = Counter(
+    "tenebrinet_cache_stale_served_total",
+    "Values served past their soft TTL while refreshing in the background.",
+)
+
+CACHE_ERRORS = Counter(
+    "tenebrinet_cache_errors_total",
+    "Redis cache operations that failed.",
+    ["operation"],
+)
+
+
+# --- Database pools ---
+
+DB_POOL_CHECKOUT_SECONDS = Histogram(
+    "tenebrinet_db_pool_checkout_seconds",
+    "Time spent waiting for a pooled database connection.",
+    ["pool"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0),
+)
+
+DB_POOL_IN_USE = Gauge(
+    "tenebrinet_db_pool_connections_in_use",
+    "Database connections currently checked out of the pool.",
+    ["pool"],
+)
+
+DB_POOL_CAPACITY = Gauge(
+    "tenebrinet_db_pool_capacity",
+    "Maximum connections of the pool (pool size plus overflow).",
+    ["pool"],
+)
+
+DB_POOL_TIMEOUTS = Counter(
+    "tenebrinet_db_pool_timeouts_total",
+    "Checkouts that gave up waiting for a free connection.",
+    ["pool"],
+)
+
+REPLICA_LAG_SECONDS = Gauge(
+    "tenebrinet_db_replica_lag_seconds",
+    "Last measured replication lag of the read replica.",
+)
+
+REPLICA_FALLBACKS = Counter(
+    "tenebrinet_db_replica_fallbacks_total",
+    "Read-only sessions served by the primary because the replica lagged "
+    "or was unreachable.",
+)
@@ -7,19 +7,23 @@ and captured credentials.
 """
 import uuid
 from datetime import datetime, timezone
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Optional
 
 from sqlalchemy import (
+    BigInteger,
     Boolean,
     Column,
     DateTime,
     Float,
     ForeignKey,
+    Index,
     Integer,
     JSON,
+    LargeBinary,
     String,
+    Text,
+    Uuid,
 )
-from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 
 from tenebrinet.core.database import Base
@@ -42,10 +46,19 @@ class Attack(Base):
     """
 
     __tablename__ = "attacks"
+    # On PostgreSQL the table is range-partitioned by time; partitions are
+    # created and dropped by tenebrinet.core.partitions.
+    __table_args__ = {"postgresql_partition_by": "RANGE (timestamp)"}
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    # The partition key has to be part of the primary key
+    id = Column(Uuid, primary_key=True, default=uuid.uuid4)
     ip = Column(String(45), nullable=False, index=True)
-    timestamp = Column(DateTime(timezone=True), default=_utc_now, index=True)
+    timestamp = Column(
+        DateTime(timezone=True),
+        primary_key=True,
+        default=_utc_now,
+        index=True,
+    )
     service = Column(String(50), nullable=False)
     payload = Column(JSON)
     threat_type = Column(String(50))
@@ -53,9 +66,18 @@ class Attack(Base):
     country = Column(String(2))
     asn = Column(Integer)
 
-    # Relationships
-    sessions = relationship("Session", back_populates="attack")
-    credentials = relationship("Credential", back_populates="attack")
+    # Relationships. A partitioned table cannot be the target of a foreign
+    # key on ``id`` alone, so the joins are declared on the ORM side only.
+    sessions = relationship(
+        "Session",
+        back_populates="attack",
+        primaryjoin="Attack.id == foreign(Session.attack_id)",
+    )
+    credentials = relationship(
+        "Credential",
+        back_populates="attack",
+        primaryjoin="Attack.id == foreign(Credential.attack_id)",
+    )
 
     def __repr__(self) -> str:
         return (
@@ -64,6 +86,25 @@ class Attack(Base):
         )
 
 
+# Composite indexes serving the attacks API filters, which order by time.
+# Declared on the table's columns, which type checkers can follow.
+Index(
+    "ix_attacks_service_timestamp",
+    Attack.__table__.c.service,
+    Attack.__table__.c.timestamp.desc(),
+)
+Index(
+    "ix_attacks_threat_type_timestamp",
+    Attack.__table__.c.threat_type,
+    Attack.__table__.c.timestamp.desc(),
+)
+Index(
+    "ix_attacks_country_timestamp",
+    Attack.__table__.c.country,
+    Attack.__table__.c.timestamp.desc(),
+)
+
+
 class Session(Base):
     """
     Attack session lifecycle record.
@@ -73,14 +114,23 @@ class Session(Base):
 
     __tablename__ = "sessions"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    attack_id = Column(UUID(as_uuid=True), ForeignKey("attacks.id"))
+    id = Column(Uuid, primary_key=True, default=uuid.uuid4)
+    attack_id = Column(Uuid, index=True)
     start_time = Column(DateTime(timezone=True), default=_utc_now)
     end_time = Column(DateTime(timezone=True))
     commands = Column(JSON)
 
     # Relationships
-    attack = relationship("Attack", back_populates="sessions")
+    attack = relationship(
+        "Attack",
+        back_populates="sessions",
+        primaryjoin="foreign(Session.attack_id) == Attack.id",
+    )
+    command_log = relationship(
+        "SessionCommand",
+        back_populates="session",
+        order_by="SessionCommand.seq",
+    )
 
     def __repr__(self) -> str:
         return (
@@ -89,26 +139,182 @@ class Session(Base):
         )
 
 
+class SessionCommand(Base):
+    """
+    Single command executed during an interactive session.
+
+    Commands are appended as individual rows so recording a long session
+    costs linear I/O instead of rewriting the whole command list.
+    """
+
+    __tablename__ = "session_commands"
+
+    id = Column(Uuid, primary_key=True, default=uuid.uuid4)
+    session_id = Column(
+        Uuid,
+        ForeignKey("sessions.id"),
+        nullable=False,
+        index=True,
+    )
+    seq = Column(Integer, nullable=False)
+    timestamp = Column(DateTime(timezone=True), default=_utc_now)
+    command = Column(Text, nullable=False)
+
+    # Relationships
+    session = relationship("Session", back_populates="command_log")
+
+    def __repr__(self) -> str:
+        return (
+            f"<SessionCommand(session_id='{self.session_id}', "
+            f"seq={self.seq}, command='{self.command}')>"
+        )
+
+
 class Credential(Base):
     """
     Captured credential record.
 
-    Stores username/password combinations attempted during attacks.
+    Stores one username/password attempt of an attack. The strings live
+    once per distinct pair in ``credential_pairs``.
     """
 
     __tablename__ = "credentials"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    attack_id = Column(UUID(as_uuid=True), ForeignKey("attacks.id"))
-    username = Column(String(255), nullable=False)
-    password = Column(String(255), nullable=False)
+    id = Column(Uuid, primary_key=True, default=uuid.uuid4)
+    attack_id = Column(Uuid, index=True)
+    pair_id = Column(
+        BigInteger,
+        ForeignKey("credential_pairs.id"),
+        nullable=False,
+        index=True,
+    )
     success = Column(Boolean, default=False)
 
     # Relationships
-    attack = relationship("Attack", back_populates="credentials")
+    attack = relationship(
+        "Attack",
+        back_populates="credentials",
+        primaryjoin="foreign(Credential.attack_id) == Attack.id",
+    )
+    pair = relationship("CredentialPair", lazy="joined")
+
+    @property
+    def username(self) -> Optional[str]:
+        """Username of the attempted pair."""
+        return self.pair.username if self.pair is not None else None
+
+    @property
+    def password(self) -> Optional[str]:
+        """Password of the attempted pair."""
+        return self.pair.password if self.pair is not None else None
 
     def __repr__(self) -> str:
         return (
             f"<Credential(id='{self.id}', attack_id='{self.attack_id}', "
             f"username='{self.username}', success='{self.success}')>"
         )
+
+
+class CredentialPair(Base):
+    """
+    Distinct username/password pair with attempt counts.
+
+    ``id`` is a 64-bit hash of the pair (see
+    ``tenebrinet.core.credentials.pair_id``). Counts are maintained by
+    the event sink as credentials are ingested.
+    """
+
+    __tablename__ = "credential_pairs"
+
+    id = Column(BigInteger, primary_key=True, autoincrement=False)
+    username = Column(String(255), nullable=False)
+    password = Column(String(255), nullable=False)
+    attempts = Column(BigInteger, nullable=False, default=0)
+    successes = Column(BigInteger, nullable=False, default=0)
+    first_seen = Column(DateTime(timezone=True), nullable=False)
+    last_seen = Column(DateTime(timezone=True), nullable=False)
+
+    def __repr__(self) -> str:
+        return (
+            f"<CredentialPair(username='{self.username}', "
+            f"attempts={self.attempts})>"
+        )
+
+
+# Serves the most attempted pairs with a backward index scan
+Index(
+    "ix_credential_pairs_attempts",
+    CredentialPair.__table__.c.attempts,
+    CredentialPair.__table__.c.id,
+)
+
+
+class AttackRollup(Base):
+    """
+    Per-minute attack counts.
+
+    Maintained incrementally by the event sink as attacks are ingested,
+    so statistics can be computed from a few rows per minute instead of
+    scanning the raw attacks table. Unknown threat types and countries
+    are stored as empty strings because they are part of the key.
+    """
+
+    __tablename__ = "attack_rollups"
+
+    bucket = Column(DateTime(timezone=True), primary_key=True)
+    service = Column(String(50), primary_key=True)
+    threat_type = Column(String(50), primary_key=True, default="")
+    country = Column(String(2), primary_key=True, default="")
+    count = Column(BigInteger, nullable=False, default=0)
+
+    def __repr__(self) -> str:
+        return (
+            f"<AttackRollup(bucket='{self.bucket}', service='{self.service}', "
+            f"count={self.count})>"
+        )
+
+
+class AttackAggregate(Base):
+    """
+    Checkpoint of the streaming attack aggregates of one ingest node.
+
+    ``period`` is an ISO date for daily rows or ``"all"`` for the
+    all-time row. Counts are cumulative; ``ip_sketch`` is a serialized
+    HyperLogLog of the distinct attacker IPs in the period, which can be
+    merged across nodes and periods.
+    """
+
+    __tablename__ = "attack_aggregates"
+
+    node = Column(String(255), primary_key=True)
+    period = Column(String(10), primary_key=True)
+    total = Column(BigInteger, nullable=False, default=0)
+    by_service = Column(JSON, nullable=False, default=dict)
+    ip_sketch = Column(LargeBinary, nullable=False)
+    updated_at = Column(DateTime(timezone=True), default=_utc_now)
+
+    def __repr__(self) -> str:
+        return (
+            f"<AttackAggregate(node='{self.node}', period='{self.period}', "
+            f"total={self.total})>"
+        )
+
+
+class PayloadBlob(Base):
+    """
+    Content-addressed payload component.
+
+    Large parts of attack payloads, such as HTTP headers and bodies, are
+    stored once here under the SHA-256 of their JSON text and referenced
+    from the payload (see ``tenebrinet.core.blobs``). Rows are immutable.
+    """
+
+    __tablename__ = "payload_blobs"
+
+    digest = Column(String(64), primary_key=True)
+    content = Column(Text, nullable=False)
+    size = Column(Integer, nullable=False)
+    created_at = Column(DateTime(timezone=True), default=_utc_now)
+
+    def __repr__(self) -> str:
+        return f"<PayloadBlob(digest='{self.digest}', size={self.size})>"
@@ -0,0 +1,290 @@
+# tenebrinet/core/partitions.py
+"""
+Time partition management for the attacks table.
+
+On PostgreSQL ``attacks`` is declared ``PARTITION BY RANGE (timestamp)``.
+This module keeps daily or weekly partitions created ahead of time and
+implements retention by dropping whole partitions, which is far cheaper
+than deleting rows. Time-filtered queries on ``Attack.timestamp`` are
+pruned to the matching partitions by the planner.
+
+All functions are no-ops on other database backends.
+"""
+import asyncio
+import re
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+
+import structlog
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from tenebrinet.core.config import DatabaseConfig
+
+
+logger = structlog.get_logger()
+
+PARENT_TABLE = "attacks"
+DEFAULT_PARTITION = "attacks_default"
+
+# Matches the bounds rendered by pg_get_expr(relpartbound)
+_BOUNDS_PATTERN = re.compile(r"FROM \('([^']+)'\) TO \('([^']+)'\)")
+
+
+class PartitioningError(RuntimeError):
+    """Raised when the attacks table is not a partitioned table."""
+
+
+def partition_start(moment: datetime, interval: str = "daily") -> datetime:
+    """
+    Return the start of the partition containing ``moment``.
+
+    Daily partitions start at midnight UTC, weekly ones on Monday.
+    """
+    day = moment.astimezone(timezone.utc).replace(
+        hour=0, minute=0, second=0, microsecond=0
+    )
+    if interval == "weekly":
+        day -= timedelta(days=day.weekday())
+    return day
+
+
+def partition_step(interval: str = "daily") -> timedelta:
+    """Return the length of one partition."""
+    return timedelta(weeks=1) if interval == "weekly" else timedelta(days=1)
+
+
+def partition_name(start: datetime) -> str:
+    """Return the table name of the partition starting at ``start``."""
+    return f"{PARENT_TABLE}_p{start:%Y%m%d}"
+
+
+def _parse_bound(value: str) -> datetime:
+    """Parse a timestamptz literal as rendered by PostgreSQL."""
+    # Python 3.10 needs "+00:00" rather than PostgreSQL's "+00"
+    if re.search(r"[+-]\d\d$", value):
+        value += ":00"
+    return datetime.fromisoformat(value)
+
+
+async def is_partitioned(conn: AsyncConnection) -> bool:
+    """Return whether the attacks table is declared partitioned."""
+    result = await conn.execute(
+        text(
+            "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table "
+            "WHERE partrelid = to_regclass(:parent))"
+        ),
+        {"parent": PARENT_TABLE},
+    )
+    return bool(result.scalar())
+
+
+async def list_partitions(
+    conn: AsyncConnection,
+) -> List[Tuple[str, datetime, datetime]]:
+    """
+    List the range partitions of the attacks table.
+
+    Returns:
+        Tuples of (name, lower bound, upper bound), ordered by lower
+        bound. The default partition is not included.
+    """
+    result = await conn.execute(
+        text(
+            "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) "
+            "FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = :parent"
+        ),
+        {"parent": PARENT_TABLE},
+    )
+    partitions = []
+    for name, bounds in result.all():
+        match = _BOUNDS_PATTERN.search(bounds or "")
+        if match:
+            partitions.append((
+                name,
+                _parse_bound(match.group(1)),
+                _parse_bound(match.group(2)),
+            ))
+    return sorted(partitions, key=lambda p: p[1])
+
+
+async def ensure_partitions(
+    conn: AsyncConnection,
+    interval: str = "daily",
+    ahead: int = 7,
+    now: Optional[datetime] = None,
+) -> List[str]:
+    """
+    Create the current partition and ``ahead`` future ones.
+
+    A default partition catches rows outside every range (e.g. replayed
+    or backfilled events older than the oldest partition). Ranges that
+    overlap an existing partition, for instance after switching between
+    daily and weekly partitioning, are skipped.
+
+    Returns:
+        Names of the partitions created.
+
+    Raises:
+        PartitioningError: If the attacks table is not partitioned,
+            i.e. the schema has not been migrated.
+    """
+    if conn.dialect.name != "postgresql":
+        return []
+
+    if not await is_partitioned(conn):
+        raise PartitioningError(
+            f"Table {PARENT_TABLE} is not partitioned. "
+            "Run 'tenebrinet initdb' to apply migrations."
+        )
+
+    await conn.execute(
+        text(
+            f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} "
+            f"PARTITION OF {PARENT_TABLE} DEFAULT"
+        )
+    )
+
+    existing = await list_partitions(conn)
+    step = partition_step(interval)
+    start = partition_start(now or datetime.now(timezone.utc), interval)
+    created = []
+
+    for i in range(ahead + 1):
+        lower = start + i * step
+        upper = lower + step
+        if any(lo < upper and lower < hi for _, lo, hi in existing):
+            continue
+
+        name = partition_name(lower)
+        try:
+            async with conn.begin_nested():
+                await conn.execute(
+                    text(
+                        f"CREATE TABLE {name} PARTITION OF {PARENT_TABLE} "
+                        f"FOR VALUES FROM ('{lower.isoformat()}') "
+                        f"TO ('{upper.isoformat()}')"
+                    )
+                )
+        except Exception as e:
+            # Typically the default partition already holds rows in range
+            logger.warning(
+                "attack_partition_create_failed",
+                partition=name,
+                error=str(e),
+            )
+            continue
+        created.append(name)
+        logger.info("attack_partition_created", partition=name)
+
+    return created
+
+
+async def drop_expired_partitions(
+    conn: AsyncConnection,
+    retention_days: int,
+    now: Optional[datetime] = None,
+) -> List[str]:
+    """
+    Drop partitions whose whole range is older than the retention period.
+
+    Sessions, credentials and session commands belonging to the attacks
+    of a partition are deleted, through their ``attack_id`` indexes,
+    right before it is dropped, since they are not linked by foreign
+    keys that could cascade. The attack rollups of the partition's range
+    go with it; rows kept in the default partition keep theirs.
+
+    Returns:
+        Names of the partitions dropped.
+    """
+    if conn.dialect.name != "postgresql":
+        return []
+
+    cutoff = (now or datetime.now(timezone.utc)) - timedelta(
+        days=retention_days
+    )
+    dropped = []
+    for name, lower, upper in await list_partitions(conn):
+        if upper <= cutoff:
+            await _delete_children(conn, name)
+            await conn.execute(text(f"DROP TABLE IF EXISTS {name}"))
+            # Statistics follow the retained data
+            await conn.execute(
+                text(
+                    "DELETE FROM attack_rollups "
+                    "WHERE bucket >= :lower AND bucket < :upper"
+                ),
+                {"lower": lower, "upper": upper},
+            )
+            dropped.append(name)
+            logger.info(
+                "attack_partition_dropped",
+                partition=name,
+                upper_bound=upper.isoformat(),
+            )
+    return dropped
+
+
+async def _delete_children(conn: AsyncConnection, partition: str) -> None:
+    """Delete the child rows of the attacks in one partition."""
+    await conn.execute(
+        text(
+            "DELETE FROM session_commands WHERE session_id IN "
+            "(SELECT s.id FROM sessions s "
+            f"JOIN {partition} a ON a.id = s.attack_id)"
+        )
+    )
+    for table in ("sessions", "credentials"):
+        await conn.execute(
+            text(
+                f"DELETE FROM {table} "
+                f"WHERE attack_id IN (SELECT id FROM {partition})"
+            )
+        )
+
+
+async def maintain_partitions(
+    engine: AsyncEngine, config: DatabaseConfig
+) -> None:
+    """
+    Create upcoming partitions and apply retention once.
+
+    Payload blobs left unreferenced by dropped partitions are swept in a
+    separate transaction, so the partition locks are not held meanwhile.
+    """
+    # Imported here: blobs depends on database, which imports this module
+    from tenebrinet.core.blobs import payload_blobs
+
+    dropped: List[str] = []
+    async with engine.begin() as conn:
+        await ensure_partitions(
+            conn,
+            interval=config.partition_interval,
+            ahead=config.partitions_ahead,
+        )
+        if config.retention_days is not None:
+            dropped = await drop_expired_partitions(
+                conn, config.retention_days
+            )
+    if dropped:
+        async with engine.begin() as conn:
+            await payload_blobs.sweep(conn)
+
+
+async def run_partition_maintenance(
+    engine: AsyncEngine,
+    config: DatabaseConfig,
+    interval: float = 3600.0,
+) -> None:
+    """Run partition maintenance periodically until cancelled."""
+    if engine.dialect.name != "postgresql":
+        return
+    while True:
+        try:
+            await maintain_partitions(engine, config)
+        except Exception as e:
+            logger.error("attack_partition_maintenance_failed", error=str(e))
+        await asyncio.sleep(interval)
@@ -0,0 +1,108 @@
+# tenebrinet/core/rollups.py
+"""
+Incrementally maintained attack rollups for TenebriNET.
+
+Every batch of attacks written by the event sink is summarized into
+per-minute counts keyed by service, threat type and country
+(``attack_rollups``), updated in the same transaction as the raw rows,
+so spool replays and retries cannot double count, and the statistics
+endpoint reads a few rows per minute of history instead of scanning the
+attacks table. Distinct attacker IPs come from the streaming aggregates
+(see ``tenebrinet.core.aggregates``).
+"""
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Sequence, Tuple
+
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from tenebrinet.core.database import upsert_counters
+from tenebrinet.core.models import Attack, AttackRollup
+
+
+def _as_utc(timestamp: datetime) -> datetime:
+    if timestamp.tzinfo is None:
+        return timestamp.replace(tzinfo=timezone.utc)
+    return timestamp.astimezone(timezone.utc)
+
+
+def minute_bucket(timestamp: datetime) -> datetime:
+    """Truncate a timestamp to the start of its UTC minute."""
+    return _as_utc(timestamp).replace(second=0, microsecond=0)
+
+
+def _rollup_key(row: Dict[str, Any]) -> Tuple[datetime, str, str, str]:
+    return (
+        minute_bucket(row["timestamp"]),
+        row["service"],
+        row.get("threat_type") or "",
+        row.get("country") or "",
+    )
+
+
+def summarize_attacks(
+    rows: Sequence[Dict[str, Any]],
+) -> List[Dict[str, Any]]:
+    """
+    Aggregate attack rows into rollup increments.
+
+    Args:
+        rows: Attack column values as queued by the services.
+
+    Returns:
+        attack_rollups rows with unique keys.
+    """
+    counts: Dict[Tuple[datetime, str, str, str], int] = defaultdict(int)
+
+    for row in rows:
+        seen = _as_utc(row.get("timestamp") or datetime.now(timezone.utc))
+        counts[_rollup_key({**row, "timestamp": seen})] += 1
+
+    return [
+        {
+            "bucket": bucket,
+            "service": service,
+            "threat_type": threat_type,
+            "country": country,
+            "count": count,
+        }
+        for (bucket, service, threat_type, country), count in counts.items()
+    ]
+
+
+async def apply_attack_rollups(
+    session: AsyncSession, rows: Sequence[Dict[str, Any]]
+) -> None:
+    """
+    Add a batch of newly inserted attacks to the rollups.
+
+    Must run in the same transaction as the insert of ``rows``.
+    """
+    if not rows:
+        return
+    await upsert_counters(
+        session, AttackRollup, summarize_attacks(rows), increment=["count"]
+    )
+
+
+async def remove_attack_from_rollups(
+    session: AsyncSession, attack: Attack
+) -> None:
+    """Subtract a deleted attack from its rollup bucket."""
+    bucket, service, threat_type, country = _rollup_key({
+        "timestamp": attack.timestamp,
+        "service": attack.service,
+        "threat_type": attack.threat_type,
+        "country": attack.country,
+    })
+    await session.execute(
+        update(AttackRollup)
+        .where(
+            AttackRollup.bucket == bucket,
+            AttackRollup.service == service,
+            AttackRollup.threat_type == threat_type,
+            AttackRollup.country == country,
+        )
+        .values(count=AttackRollup.count - 1)
+    )
@@ -0,0 +1,600 @@
+# tenebrinet/core/sink.py
+"""
+Write-behind event sink for TenebriNET.
+
+Honeypot services hand captured events to a shared, bounded in-memory
+queue instead of opening a database session per event. A background
+task drains the queue and writes the events as multi-row statements,
+flushing whenever a batch fills up or the flush interval elapses.
+
+If the database is unavailable, batches are appended to an on-disk
+spool (see ``tenebrinet.core.spool``) and replayed once it recovers.
+Only connection failures are spooled. A batch the database rejects is
+split and retried in halves, so only the events that fail on their own
+are moved to the spool's dead-letter file; so is a spooled batch that
+fails replay ``max_replay_attempts`` times.
+"""
+import asyncio
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+)
+
+import structlog
+from sqlalchemy import update
+from sqlalchemy.exc import (
+    DataError,
+    DBAPIError,
+    DisconnectionError,
+    IntegrityError,
+    InterfaceError,
+    OperationalError,
+)
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from tenebrinet.core import database
+from tenebrinet.core.aggregates import attack_aggregates
+from tenebrinet.core.blobs import payload_blobs
+from tenebrinet.core.config import IngestConfig
+from tenebrinet.core.metrics import (
+    EVENT_BATCH_SIZE,
+    EVENT_FLUSH_FAILURES,
+    EVENT_FLUSH_SECONDS,
+    EVENT_QUEUE_DEPTH,
+    EVENTS_DEAD_LETTERED,
+    EVENTS_DROPPED,
+    EVENTS_ENQUEUED,
+    EVENTS_FLUSHED,
+    EVENTS_REPLAYED,
+    EVENTS_SPOOLED,
+    SPOOL_SEGMENTS,
+)
+from tenebrinet.core.credentials import apply_credential_pairs
+from tenebrinet.core.models import Attack, Credential
+from tenebrinet.core.rollups import apply_attack_rollups
+from tenebrinet.core.spool import EventSpool, decode_records, encode_records
+
+
+logger = structlog.get_logger()
+
+
+class Event(NamedTuple):
+    """A single pending write."""
+
+    op: str  # "insert" or "update"
+    model: Any
+    values: Dict[str, Any]
+
+
+# Sentinel used to tell the flush task to drain and exit
+_STOP = Event("stop", None, {})
+
+
+def is_transient(error: BaseException) -> bool:
+    """
+    Return whether a failed write may succeed if retried later.
+
+    Connection and operational failures (the database is down, a
+    connection was dropped, the pool timed out) are transient. Rejected
+    rows, serialization errors and code bugs are not: retrying them
+    would fail the same way.
+    """
+    if isinstance(error, DBAPIError) and error.connection_invalidated:
+        return True
+    return isinstance(
+        error,
+        (
+            OperationalError,
+            InterfaceError,
+            DisconnectionError,
+            PoolTimeoutError,
+            OSError,
+            asyncio.TimeoutError,
+        ),
+    )
+
+
+class EventSink:
+    """
+    Bounded write-behind queue shared by all honeypot services.
+
+    Inserts are grouped per model and written in foreign-key order so
+    that a batch may contain an attack together with the sessions and
+    credentials that reference it. Attack rollups, credential pair
+    counts and payload blobs are written in the same transaction.
+    Updates are applied after inserts as bulk updates by primary key.
+
+    Callers must supply primary keys (and event timestamps) themselves,
+    since rows are only written after the call returns.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+        max_queue_size: int = 10000,
+        session_factory: Optional[Callable[[], Any]] = None,
+        spool: Optional[EventSpool] = None,
+        spool_replay_interval: float = 5.0,
+        max_replay_attempts: int = 3,
+    ) -> None:
+        """
+        Initialize the event sink.
+
+        Args:
+            batch_size: Maximum number of events written per flush.
+            flush_interval: Seconds to wait for a batch to fill up
+                before writing what has been collected.
+            max_queue_size: Maximum number of events held in memory.
+            session_factory: Callable returning an AsyncSession context
+                manager. Defaults to ``database.IngestSessionLocal``.
+            spool: Optional on-disk spool used while the database is
+                unavailable.
+            spool_replay_interval: Seconds between spool replay attempts.
+            max_replay_attempts: Failed replays of a spooled batch before
+                it is moved to the dead-letter file.
+        """
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue_size = max_queue_size
+        self._session_factory = session_factory
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._direct_writes: Set[asyncio.Task] = set()
+        self.spool = spool
+        self.spool_replay_interval = spool_replay_interval
+        self.max_replay_attempts = max_replay_attempts
+        # Failed replays per (segment, record offset), for this process
+        self._replay_failures: Dict[Tuple[Path, int], int] = {}
+        self._spooling = False
+        self._stopping = asyncio.Event()
+        self._replay_task: Optional[asyncio.Task] = None
+        self._sync_task: Optional[asyncio.Task] = None
+
+    def configure(self, config: IngestConfig) -> None:
+        """Apply settings from the ``ingest`` configuration section."""
+        self.batch_size = config.batch_size
+        self.flush_interval = config.flush_interval
+        self.max_queue_size = config.max_queue_size
+        self.spool_replay_interval = config.spool_replay_interval
+        self.max_replay_attempts = config.spool_max_replay_attempts
+        if config.spool_enabled:
+            self.spool = EventSpool(
+                config.spool_dir,
+                segment_size=config.spool_segment_mb * 1024 * 1024,
+                fsync_interval=config.spool_fsync_interval,
+            )
+        else:
+            self.spool = None
+
+    @property
+    def running(self) -> bool:
+        """Whether the background flush task is active."""
+        return self._task is not None and not self._task.done()
+
+    @property
+    def pending(self) -> int:
+        """Number of events waiting to be flushed."""
+        return self._queue.qsize() if self._queue else 0
+
+    async def start(self) -> None:
+        """Start the background flush task."""
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._task = asyncio.create_task(self._run())
+        self._stopping = asyncio.Event()
+        if self.spool is not None:
+            # Leftovers from a previous run must be replayed first
+            self._spooling = self.spool.has_backlog
+            self._replay_task = asyncio.create_task(self._replay_loop())
+            if self.spool.fsync_interval > 0:
+                self._sync_task = asyncio.create_task(self._sync_loop())
+        logger.info(
+            "event_sink_started",
+            batch_size=self.batch_size,
+            flush_interval=self.flush_interval,
+            max_queue_size=self.max_queue_size,
+        )
+
+    async def stop(self) -> None:
+        """Flush all queued events and stop the background task."""
+        if not self.running or not self._queue or not self._task:
+            return
+        await self._queue.put(_STOP)
+        await self._task
+        self._task = None
+        self._stopping.set()
+        if self._replay_task is not None:
+            await self._replay_task
+            self._replay_task = None
+        if self._sync_task is not None:
+            await self._sync_task
+            self._sync_task = None
+        if self.spool is not None:
+            self.spool.close()
+        logger.info("event_sink_stopped")
+
+    async def put(self, model: Any, values: Dict[str, Any]) -> None:
+        """
+        Queue a row insert, waiting for space if the queue is full.
+
+        Args:
+            model: ORM model class the row belongs to.
+            values: Column values, including the primary key.
+        """
+        await self._put(Event("insert", model, values))
+
+    async def put_update(self, model: Any, values: Dict[str, Any]) -> None:
+        """
+        Queue an update of an existing row, keyed by primary key.
+
+        Args:
+            model: ORM model class the row belongs to.
+            values: Primary key plus the columns to change.
+        """
+        await self._put(Event("update", model, values))
+
+    def put_nowait(self, model: Any, values: Dict[str, Any]) -> bool:
+        """
+        Queue a row insert without waiting.
+
+        Returns:
+            True if the event was queued, False if the queue was full
+            and the event was dropped.
+        """
+        event = Event("insert", model, values)
+        if not self.running or not self._queue:
+            task = asyncio.get_running_loop().create_task(
+                self._write([event])
+            )
+            self._direct_writes.add(task)
+            task.add_done_callback(self._direct_writes.discard)
+            return True
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            EVENTS_DROPPED.labels(table=model.__tablename__).inc()
+            return False
+        EVENTS_ENQUEUED.labels(table=model.__tablename__).inc()
+        EVENT_QUEUE_DEPTH.set(self._queue.qsize())
+        return True
+
+    async def flush(self) -> None:
+        """Write everything currently queued without stopping the sink."""
+        if not self._queue:
+            return
+        batch: List[Event] = []
+        while True:
+            try:
+                event = self._queue.get_nowait()
+            except asyncio.QueueEmpty:
+                break
+            if event is _STOP:
+                # Keep the stop request for the flush task
+                self._queue.put_nowait(event)
+                break
+            batch.append(event)
+        if batch:
+            await self._write(batch)
+
+    async def _put(self, event: Event) -> None:
+        """Queue an event, or write it directly if the sink is idle."""
+        if not self.running or not self._queue:
+            # Not started (e.g. a service used outside the CLI):
+            # fall back to a synchronous single-event write.
+            await self._write([event])
+            return
+        await self._queue.put(event)
+        EVENTS_ENQUEUED.labels(table=event.model.__tablename__).inc()
+        EVENT_QUEUE_DEPTH.set(self._queue.qsize())
+
+    async def _run(self) -> None:
+        """Collect batches from the queue and write them until stopped."""
+        assert self._queue is not None
+        loop = asyncio.get_running_loop()
+        stopping = False
+
+        while not stopping:
+            first = await self._queue.get()
+            if first is _STOP:
+                break
+
+            batch = [first]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    event = self._queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        event = await asyncio.wait_for(
+                            self._queue.get(), timeout
+                        )
+                    except asyncio.TimeoutError:
+                        break
+                if event is _STOP:
+                    stopping = True
+                    break
+                batch.append(event)
+
+            EVENT_QUEUE_DEPTH.set(self._queue.qsize())
+            await self._write(batch)
+
+        # Drain anything queued behind the stop request
+        await self.flush()
+
+    async def _write(self, batch: List[Event]) -> None:
+        """
+        Persist a batch, falling back to the spool if the database fails.
+
+        While the spool holds a backlog, new batches are appended to it as
+        well so that replay preserves the original write order. Batches
+        failing for any reason other than a connection problem are not
+        spooled, since retrying them cannot succeed. They are split in
+        halves and written again, in order, until the failing events are
+        isolated; those are logged and go to the dead-letter file when a
+        spool is configured.
+        """
+        if self._spooling and self.spool is not None:
+            self._spool_batch(batch)
+            return
+
+        try:
+            await self._commit_batch(batch)
+        except Exception as e:
+            EVENT_FLUSH_FAILURES.inc()
+            if is_transient(e):
+                self._database_unavailable(batch, e)
+            elif len(batch) > 1:
+                # Keep the rest of the batch from sharing a bad event's
+                # fate; halves after a connection failure are spooled
+                middle = len(batch) // 2
+                await self._write(batch[:middle])
+                await self._write(batch[middle:])
+            else:
+                self._reject(batch, e)
+
+    def _database_unavailable(
+        self, batch: List[Event], error: Exception
+    ) -> None:
+        """Spool a batch that failed to reach the database."""
+        if self.spool is None:
+            logger.error(
+                "event_sink_flush_failed",
+                error=str(error),
+                events=len(batch),
+            )
+            return
+        logger.warning(
+            "event_sink_database_unavailable",
+            error=str(error),
+            events=len(batch),
+        )
+        self._spooling = True
+        self._spool_batch(batch)
+
+    def _reject(self, batch: List[Event], error: Exception) -> None:
+        """Log a batch the database rejected and dead-letter it."""
+        logger.error(
+            "event_sink_flush_rejected",
+            error=str(error),
+            error_type=type(error).__name__,
+            events=len(batch),
+        )
+        if self.spool is None:
+            return
+        try:
+            payload = self._encode_batch(batch)
+        except Exception as encode_error:
+            logger.error(
+                "event_dead_letter_write_failed",
+                error=str(encode_error),
+                events=len(batch),
+            )
+            return
+        self._dead_letter(payload, len(batch))
+
+    async def _commit_batch(self, batch: List[Event]) -> None:
+        """Write a batch of events in a single transaction."""
+        inserts: Dict[Any, List[Dict[str, Any]]] = defaultdict(list)
+        updates: Dict[Any, List[Dict[str, Any]]] = defaultdict(list)
+        for event in batch:
+            target = inserts if event.op == "insert" else updates
+            target[event.model].append(event.values)
+
+        # Parents before children so foreign keys resolve within a batch
+        table_order = {
+            table: index
+            for index, table in enumerate(database.Base.metadata.sorted_tables)
+        }
+        session_factory = self._session_factory or database.IngestSessionLocal
+
+        # Large payload parts are stored once and referenced by hash
+        blobs: Dict[str, str] = {}
+        if Attack in inserts:
+            inserts[Attack], blobs = payload_blobs.split(inserts[Attack])
+
+        started = time.perf_counter()
+        async with session_factory() as session:
+            await payload_blobs.store(session, blobs)
+            if Credential in inserts:
+                # Count the pairs; the rows then only reference them
+                inserts[Credential] = await apply_credential_pairs(
+                    session, inserts[Credential], inserts.get(Attack, [])
+                )
+            for model in sorted(
+                inserts, key=lambda m: table_order.get(m.__table__, 0)
+            ):
+                await database.bulk_insert(session, model, inserts[model])
+            # Keep the stats rollups in step with the raw rows
+            await apply_attack_rollups(session, inserts.get(Attack, []))
+            for model, rows in updates.items():
+                await session.execute(update(model), rows)
+            await session.commit()
+        payload_blobs.remember(blobs)
+        attack_aggregates.observe(inserts.get(Attack, []))
+
+        EVENT_FLUSH_SECONDS.observe(time.perf_counter() - started)
+        EVENT_BATCH_SIZE.observe(len(batch))
+        for model, rows in inserts.items():
+            EVENTS_FLUSHED.labels(table=model.__tablename__).inc(len(rows))
+        for model, rows in updates.items():
+            EVENTS_FLUSHED.labels(table=model.__tablename__).inc(len(rows))
+        logger.debug("event_sink_flushed", events=len(batch))
+
+    # --- Spool fallback ---
+
+    @staticmethod
+    def _encode_batch(batch: List[Event]) -> bytes:
+        """Serialize a batch into a spool record."""
+        return encode_records([
+            {
+                "op": event.op,
+                "table": event.model.__tablename__,
+                "values": event.values,
+            }
+            for event in batch
+        ])
+
+    def _spool_batch(self, batch: List[Event]) -> None:
+        """Append a batch to the on-disk spool."""
+        assert self.spool is not None
+        try:
+            self.spool.append(self._encode_batch(batch))
+        except Exception as e:
+            logger.error(
+                "event_spool_write_failed",
+                error=str(e),
+                events=len(batch),
+            )
+            return
+        EVENTS_SPOOLED.inc(len(batch))
+
+    def _dead_letter(self, payload: bytes, events: int) -> None:
+        """Move an encoded batch to the spool's dead-letter file."""
+        assert self.spool is not None
+        try:
+            path = self.spool.quarantine(payload)
+        except Exception as e:
+            logger.error(
+                "event_dead_letter_write_failed",
+                error=str(e),
+                events=events,
+            )
+            return
+        EVENTS_DEAD_LETTERED.inc(events)
+        logger.warning("event_dead_lettered", path=str(path), events=events)
+
+    async def _sync_loop(self) -> None:
+        """Fsync spooled writes every ``fsync_interval`` seconds."""
+        assert self.spool is not None
+        while not self._stopping.is_set():
+            try:
+                await asyncio.wait_for(
+                    self._stopping.wait(), self.spool.fsync_interval
+                )
+            except asyncio.TimeoutError:
+                pass
+            try:
+                self.spool.sync()
+            except OSError as e:
+                logger.error("event_spool_sync_failed", error=str(e))
+
+    async def _replay_loop(self) -> None:
+        """Periodically replay the spool when it holds a backlog."""
+        assert self.spool is not None
+        while not self._stopping.is_set():
+            try:
+                await asyncio.wait_for(
+                    self._stopping.wait(), self.spool_replay_interval
+                )
+            except asyncio.TimeoutError:
+                pass
+            if self._spooling:
+                await self.replay()
+
+    async def replay(self) -> bool:
+        """
+        Replay spooled batches into the database in order.
+
+        A connection failure stops the replay until the next attempt. A
+        batch the database rejects is moved to the dead-letter file right
+        away; one failing for another reason is retried on later replays
+        and moved there after ``max_replay_attempts`` failures, so that
+        a single bad record cannot stall the spool.
+
+        Returns:
+            True if the spool was fully drained and live writes resumed.
+        """
+        if self.spool is None:
+            return True
+
+        models = {
+            mapper.class_.__tablename__: mapper.class_
+            for mapper in database.Base.registry.mappers
+        }
+        self.spool.rotate()
+        for segment in self.spool.segments():
+            for offset, payload in self.spool.read(segment):
+                events = 0
+                try:
+                    batch = [
+                        Event(r["op"], models[r["table"]], r["values"])
+                        for r in decode_records(payload)
+                    ]
+                    events = len(batch)
+                    await self._commit_batch(batch)
+                except Exception as e:
+                    if is_transient(e):
+                        logger.warning(
+                            "event_spool_replay_failed", error=str(e)
+                        )
+                        SPOOL_SEGMENTS.set(len(self.spool.segments()))
+                        return False
+                    key = (segment, offset)
+                    attempts = self._replay_failures.get(key, 0) + 1
+                    logger.error(
+                        "event_spool_replay_rejected",
+                        error=str(e),
+                        error_type=type(e).__name__,
+                        events=events,
+                        attempt=attempts,
+                    )
+                    if (
+                        not isinstance(e, (IntegrityError, DataError))
+                        and attempts < self.max_replay_attempts
+                    ):
+                        self._replay_failures[key] = attempts
+                        SPOOL_SEGMENTS.set(len(self.spool.segments()))
+                        return False
+                    self._replay_failures.pop(key, None)
+                    self._dead_letter(payload, events)
+                else:
+                    EVENTS_REPLAYED.inc(len(batch))
+                self.spool.ack(segment, offset)
+            self.spool.remove(segment)
+            logger.info("event_spool_segment_replayed", path=str(segment))
+
+        SPOOL_SEGMENTS.set(0)
+        if self.spool.has_backlog:
+            # New batches were spooled while replaying; catch up next time
+            return False
+        self._spooling = False
+        logger.info("event_spool_drained")
+        return True
+
+
+# Global event sink instance
+event_sink = EventSink()
@@ -0,0 +1,269 @@
+# tenebrinet/core/spool.py
+"""
+Durable on-disk event spool for TenebriNET.
+
+When the database is unreachable the event sink appends its batches to
+a local append-only spool instead of dropping them. The spool is a
+directory of rotating segment files; each record is a length-prefixed,
+CRC-checked blob holding one encoded batch. Segments are replayed in
+order once the database recovers and removed after they are fully
+committed. Batches the database rejects are moved to a dead-letter file
+next to the segments so they neither block replay nor get lost.
+"""
+import json
+import os
+import struct
+import time
+import uuid
+import zlib
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Iterator, List, Optional, Tuple
+
+import structlog
+
+
+logger = structlog.get_logger()
+
+# Record header: payload length and CRC32 of the payload
+_HEADER = struct.Struct(">II")
+
+_SEGMENT_PREFIX = "segment-"
+_SEGMENT_SUFFIX = ".spool"
+_ACK_SUFFIX = ".ack"
+_DEAD_LETTER = "dead-letter.spool"
+
+
+def _encode_value(value: Any) -> Any:
+    """JSON fallback encoder for the column types events carry."""
+    if isinstance(value, uuid.UUID):
+        return {"__uuid__": str(value)}
+    if isinstance(value, datetime):
+        return {"__datetime__": value.isoformat()}
+    raise TypeError(f"Cannot spool value of type {type(value).__name__}")
+
+
+def _decode_object(obj: dict) -> Any:
+    """JSON object hook reversing ``_encode_value``."""
+    if "__uuid__" in obj:
+        return uuid.UUID(obj["__uuid__"])
+    if "__datetime__" in obj:
+        return datetime.fromisoformat(obj["__datetime__"])
+    return obj
+
+
+def encode_records(records: List[dict]) -> bytes:
+    """Serialize a list of event dictionaries for the spool."""
+    return json.dumps(
+        records, default=_encode_value, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def decode_records(data: bytes) -> List[dict]:
+    """Deserialize a spooled batch back into event dictionaries."""
+    return json.loads(data.decode("utf-8"), object_hook=_decode_object)
+
+
+class EventSpool:
+    """
+    Append-only segment spool.
+
+    Writes go through a buffered file handle and are fsynced at most once
+    per ``fsync_interval`` seconds (every write when the interval is 0).
+    Appends only sync once the interval has passed, so the owner calls
+    ``sync`` on a timer to bound how long a quiet spool stays unsynced.
+    Replay progress within a segment is tracked in a small ``.ack`` file
+    so a crash during replay does not re-insert committed batches.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        segment_size: int = 64 * 1024 * 1024,
+        fsync_interval: float = 1.0,
+    ) -> None:
+        """
+        Initialize the spool.
+
+        Args:
+            directory: Directory holding the segment files.
+            segment_size: Size in bytes after which a new segment starts.
+            fsync_interval: Minimum seconds between fsync calls.
+        """
+        self.directory = Path(directory)
+        self.segment_size = segment_size
+        self.fsync_interval = fsync_interval
+        self._file: Optional[Any] = None
+        self._current: Optional[Path] = None
+        self._current_size = 0
+        self._dirty = False
+        self._last_fsync = 0.0
+
+    # --- Writing ---
+
+    def append(self, payload: bytes) -> None:
+        """Append one record, rotating the segment if it is full."""
+        if self._file is None or self._current_size >= self.segment_size:
+            self._open_segment()
+        assert self._file is not None
+
+        header = _HEADER.pack(len(payload), zlib.crc32(payload))
+        self._file.write(header)
+        self._file.write(payload)
+        self._current_size += len(header) + len(payload)
+        self._dirty = True
+
+        if time.monotonic() - self._last_fsync >= self.fsync_interval:
+            self.sync()
+
+    def quarantine(self, payload: bytes) -> Path:
+        """
+        Append a record to the dead-letter file and fsync it.
+
+        The file uses the segment record format, so ``read`` can be used
+        to inspect it, but it is never replayed.
+
+        Returns:
+            Path of the dead-letter file.
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / _DEAD_LETTER
+        with open(path, "ab") as f:
+            f.write(_HEADER.pack(len(payload), zlib.crc32(payload)))
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        return path
+
+    def sync(self) -> None:
+        """Flush buffered writes and fsync the current segment."""
+        if self._file is None or not self._dirty:
+            return
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._dirty = False
+        self._last_fsync = time.monotonic()
+
+    def rotate(self) -> None:
+        """Close the current segment so it becomes eligible for replay."""
+        if self._file is None:
+            return
+        self.sync()
+        self._file.close()
+        self._file = None
+        if self._current is not None and self._current_size == 0:
+            self._current.unlink(missing_ok=True)
+        self._current = None
+        self._current_size = 0
+
+    def close(self) -> None:
+        """Close the spool, keeping any unreplayed segments on disk."""
+        self.rotate()
+
+    def _open_segment(self) -> None:
+        """Start a new segment after the highest existing one."""
+        self.rotate()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        existing = self._all_segments()
+        next_index = self._segment_index(existing[-1]) + 1 if existing else 0
+        self._current = self.directory / (
+            f"{_SEGMENT_PREFIX}{next_index:012d}{_SEGMENT_SUFFIX}"
+        )
+        self._file = open(self._current, "ab", buffering=1024 * 1024)
+        self._current_size = 0
+        logger.info("event_spool_segment_opened", path=str(self._current))
+
+    # --- Reading ---
+
+    @property
+    def has_backlog(self) -> bool:
+        """Whether any spooled data is waiting to be replayed."""
+        return self._current_size > 0 or bool(self.segments())
+
+    def segments(self) -> List[Path]:
+        """Return closed segments in replay order."""
+        return [s for s in self._all_segments() if s != self._current]
+
+    def read(self, segment: Path) -> Iterator[Tuple[int, bytes]]:
+        """
+        Iterate over unacknowledged records in a segment.
+
+        Yields:
+            Tuples of (offset after the record, payload). A corrupt
+            record is skipped by scanning forward to the next valid
+            record; a truncated tail, e.g. from a crash mid-write, ends
+            iteration.
+        """
+        offset = self._read_ack(segment)
+        with open(segment, "rb") as f:
+            f.seek(offset)
+            while True:
+                header = f.read(_HEADER.size)
+                if len(header) < _HEADER.size:
+                    return
+                length, checksum = _HEADER.unpack(header)
+                payload = f.read(length)
+                if len(payload) == length and zlib.crc32(payload) == checksum:
+                    offset += _HEADER.size + length
+                    yield offset, payload
+                    continue
+
+                resumed = self._resync(f, offset + 1)
+                logger.warning(
+                    "event_spool_corrupt_record",
+                    path=str(segment),
+                    offset=offset,
+                    skipped_bytes=(
+                        resumed - offset if resumed is not None else None
+                    ),
+                )
+                if resumed is None:
+                    return
+                offset = resumed
+                f.seek(offset)
+
+    @staticmethod
+    def _resync(f: Any, start: int) -> Optional[int]:
+        """Return the offset of the next valid record at or after ``start``."""
+        f.seek(start)
+        data = f.read()
+        for position in range(len(data) - _HEADER.size + 1):
+            length, checksum = _HEADER.unpack_from(data, position)
+            end = position + _HEADER.size + length
+            # Batches are never empty, so a zero length is not a record
+            if length == 0 or end > len(data):
+                continue
+            if zlib.crc32(data[position + _HEADER.size:end]) == checksum:
+                return start + position
+        return None
+
+    def ack(self, segment: Path, offset: int) -> None:
+        """Record that everything before ``offset`` has been replayed."""
+        ack_path = segment.with_suffix(_ACK_SUFFIX)
+        tmp_path = ack_path.with_suffix(".tmp")
+        tmp_path.write_text(str(offset))
+        os.replace(tmp_path, ack_path)
+
+    def remove(self, segment: Path) -> None:
+        """Delete a fully replayed segment."""
+        segment.unlink(missing_ok=True)
+        segment.with_suffix(_ACK_SUFFIX).unlink(missing_ok=True)
+
+    def _read_ack(self, segment: Path) -> int:
+        ack_path = segment.with_suffix(_ACK_SUFFIX)
+        try:
+            return int(ack_path.read_text())
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    def _all_segments(self) -> List[Path]:
+        if not self.directory.exists():
+            return []
+        return sorted(
+            self.directory.glob(f"{_SEGMENT_PREFIX}*{_SEGMENT_SUFFIX}"),
+            key=self._segment_index,
+        )
+
+    @staticmethod
+    def _segment_index(path: Path) -> int:
+        return int(path.name[len(_SEGMENT_PREFIX):-len(_SEGMENT_SUFFIX)])
@@ -156,7 +156,7 @@ async function updateDashboard() {
     try {
         const [stats, attacks] = await Promise.all([
             fetch(`${API_BASE}/attacks/stats`).then(r => r.json()),
-            fetch(`${API_BASE}/attacks?per_page=10`).then(r => r.json())
+            fetch(`${API_BASE}/attacks?per_page=10&count=none`).then(r => r.json())
         ]);
 
         updateStats(stats);
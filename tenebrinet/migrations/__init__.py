@@ -0,0 +1,8 @@
+# tenebrinet/migrations/__init__.py
+"""
+Alembic migration environment for the TenebriNET database schema.
+
+Apply migrations with ``tenebrinet initdb`` (or ``alembic upgrade head``
+from the repository root). Partitions of the attacks table are not
+migrations; they are managed by :mod:`tenebrinet.core.partitions`.
+"""
@@ -0,0 +1,85 @@
+# tenebrinet/migrations/env.py
+"""
+Alembic environment for TenebriNET.
+
+Migrations run on an existing connection when one is passed through
+``config.attributes["connection"]`` (as ``tenebrinet initdb`` does), and
+otherwise on a new async engine for ``DATABASE_URL``.
+"""
+import asyncio
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from tenebrinet.core import models  # noqa: F401  (registers the tables)
+from tenebrinet.core.database import DATABASE_URL, Base
+from tenebrinet.core.partitions import PARENT_TABLE
+
+
+config = context.config
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+
+def _database_url() -> str:
+    return config.get_main_option("sqlalchemy.url") or DATABASE_URL
+
+
+def _include_object(obj, name, type_, reflected, compare_to) -> bool:
+    """Keep attack partitions out of autogenerate comparisons."""
+    if (
+        type_ == "table"
+        and reflected
+        and compare_to is None
+        and name.startswith(f"{PARENT_TABLE}_")
+    ):
+        return False
+    return True
+
+
+def do_run_migrations(connection: Connection) -> None:
+    """Run migrations on a synchronous connection."""
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        include_object=_include_object,
+        # SQLite can only alter tables by copying them
+        render_as_batch=connection.dialect.name == "sqlite",
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_offline() -> None:
+    """Emit the migration SQL without connecting to a database."""
+    context.configure(
+        url=_database_url(),
+        target_metadata=target_metadata,
+        include_object=_include_object,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+async def run_async_migrations() -> None:
+    """Run migrations on a new async engine."""
+    engine = create_async_engine(_database_url())
+    async with engine.connect() as connection:
+        await connection.run_sync(do_run_migrations)
+    await engine.dispose()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    connection = config.attributes.get("connection")
+    if connection is None:
+        asyncio.run(run_async_migrations())
+    else:
+        do_run_migrations(connection)
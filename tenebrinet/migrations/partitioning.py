@@ -0,0 +1,291 @@
+# tenebrinet/migrations/partitioning.py
+"""
+Conversion of the attacks table to a range-partitioned table.
+
+Used by the revision that partitions databases created from the
+initial schema. On PostgreSQL the table is rebuilt as ``PARTITION BY
+RANGE (timestamp)``: a partitioned copy is created next to it, the rows
+are copied into daily partitions, and the copy is swapped in with its
+primary key and indexes. Both dialects get the ``(id, timestamp)``
+primary key the models declare, and the foreign keys from sessions and
+credentials to attacks are replaced by indexes, since a foreign key to a
+partitioned table would have to include the timestamp.
+
+Every step checks the current schema first, so the conversion can run
+on databases that are already (partly) converted.
+"""
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from tenebrinet.core.partitions import (
+    DEFAULT_PARTITION,
+    PARENT_TABLE,
+    partition_name,
+    partition_step,
+)
+
+
+# Tables whose attack_id referenced attacks.id
+CHILD_TABLES = ("sessions", "credentials")
+
+# Names used for the unnamed constraints of the initial schema on SQLite
+_NAMING_CONVENTION = {
+    "pk": "%(table_name)s_pkey",
+    "fk": "fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s",
+}
+
+_PRIMARY_KEY = f"{PARENT_TABLE}_pkey"
+_OLD_TABLE = f"{PARENT_TABLE}_unpartitioned"
+
+
+def _offline() -> bool:
+    return op.get_context().as_sql
+
+
+def _dialect() -> str:
+    return op.get_context().dialect.name
+
+
+def is_partitioned() -> bool:
+    """Return whether the attacks table already has the partitioned layout."""
+    bind = op.get_bind()
+    if _dialect() == "postgresql":
+        return bool(
+            bind.execute(
+                sa.text(
+                    "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table "
+                    "WHERE partrelid = to_regclass(:table))"
+                ),
+                {"table": PARENT_TABLE},
+            ).scalar()
+        )
+    primary_key = sa.inspect(bind).get_pk_constraint(PARENT_TABLE)
+    return primary_key["constrained_columns"] == ["id", "timestamp"]
+
+
+def create_session_commands() -> None:
+    """Create the session_commands table unless it exists."""
+    if not _offline() and sa.inspect(op.get_bind()).has_table(
+        "session_commands"
+    ):
+        return
+    op.create_table(
+        "session_commands",
+        sa.Column("id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("session_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("seq", sa.Integer(), nullable=False),
+        sa.Column("timestamp", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("command", sa.Text(), nullable=False),
+        sa.ForeignKeyConstraint(["session_id"], ["sessions.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_session_commands_session_id", "session_commands", ["session_id"]
+    )
+
+
+def detach_children() -> None:
+    """Replace the foreign keys to attacks.id by attack_id indexes."""
+    for table in CHILD_TABLES:
+        index = f"ix_{table}_attack_id"
+        foreign_keys: List[Optional[str]] = []
+        indexes = set()
+        if not _offline():
+            inspector = sa.inspect(op.get_bind())
+            foreign_keys = [
+                fk["name"] for fk in inspector.get_foreign_keys(table)
+                if fk["referred_table"] == PARENT_TABLE
+            ]
+            indexes = {ix["name"] for ix in inspector.get_indexes(table)}
+        elif _dialect() == "postgresql":
+            # The initial schema's default constraint name
+            foreign_keys = [f"{table}_attack_id_fkey"]
+
+        if _dialect() == "sqlite":
+            if not foreign_keys and index in indexes:
+                continue
+            with op.batch_alter_table(
+                table,
+                recreate="always",
+                naming_convention=_NAMING_CONVENTION,
+            ) as batch_op:
+                if foreign_keys:
+                    batch_op.drop_constraint(
+                        f"fk_{table}_attack_id_{PARENT_TABLE}",
+                        type_="foreignkey",
+                    )
+                if index not in indexes:
+                    batch_op.create_index(index, ["attack_id"])
+            continue
+
+        for name in filter(None, foreign_keys):
+            op.drop_constraint(name, table, type_="foreignkey")
+        if index not in indexes:
+            op.create_index(index, table, ["attack_id"])
+
+
+def _fill_missing_timestamps() -> None:
+    # The timestamp becomes part of the primary key
+    attacks = sa.table(PARENT_TABLE, sa.column("timestamp"))
+    op.execute(
+        attacks.update()
+        .where(attacks.c.timestamp.is_(None))
+        .values(timestamp=sa.func.now())
+    )
+
+
+def _partition_days(table: str) -> List[datetime]:
+    """Return the start of every UTC day holding rows of ``table``."""
+    if _offline():
+        return []
+    rows = op.get_bind().execute(
+        sa.text(
+            "SELECT DISTINCT date_trunc('day', timestamp AT TIME ZONE 'UTC') "
+            f"FROM {table}"
+        )
+    )
+    return sorted(day.replace(tzinfo=timezone.utc) for day, in rows)
+
+
+def _postgresql_partition() -> None:
+    indexes: List[str] = []
+    if not _offline():
+        indexes = [
+            definition
+            for definition, in op.get_bind().execute(
+                sa.text(
+                    "SELECT indexdef FROM pg_indexes "
+                    "WHERE tablename = :table AND indexname <> :primary_key"
+                ),
+                {"table": PARENT_TABLE, "primary_key": _PRIMARY_KEY},
+            )
+        ]
+    else:
+        indexes = [
+            f"CREATE INDEX ix_{PARENT_TABLE}_ip ON {PARENT_TABLE} (ip)",
+            f"CREATE INDEX ix_{PARENT_TABLE}_timestamp "
+            f"ON {PARENT_TABLE} (timestamp)",
+        ]
+
+    op.rename_table(PARENT_TABLE, _OLD_TABLE)
+    op.execute(
+        f"CREATE TABLE {PARENT_TABLE} "
+        f"(LIKE {_OLD_TABLE} INCLUDING DEFAULTS) "
+        "PARTITION BY RANGE (timestamp)"
+    )
+    op.execute(
+        f"CREATE TABLE {DEFAULT_PARTITION} "
+        f"PARTITION OF {PARENT_TABLE} DEFAULT"
+    )
+    # Existing rows go to daily partitions so retention can drop them
+    step = partition_step()
+    for lower in _partition_days(_OLD_TABLE):
+        op.execute(
+            f"CREATE TABLE {partition_name(lower)} "
+            f"PARTITION OF {PARENT_TABLE} "
+            f"FOR VALUES FROM ('{lower.isoformat()}') "
+            f"TO ('{(lower + step).isoformat()}')"
+        )
+    op.execute(f"INSERT INTO {PARENT_TABLE} SELECT * FROM {_OLD_TABLE}")
+    op.drop_table(_OLD_TABLE)
+
+    # Built after the copy, on the rows in place
+    op.create_primary_key(_PRIMARY_KEY, PARENT_TABLE, ["id", "timestamp"])
+    for definition in indexes:
+        op.execute(definition)
+
+
+def partition_attacks() -> None:
+    """
+    Convert a database with the initial schema to the partitioned layout.
+
+    Creates session_commands, detaches sessions and credentials from
+    attacks and rebuilds attacks with the ``(id, timestamp)`` primary
+    key, partitioned on PostgreSQL. Rows without a timestamp get the
+    time of the migration.
+    """
+    create_session_commands()
+    detach_children()
+    if not _offline() and is_partitioned():
+        return
+
+    _fill_missing_timestamps()
+    if _dialect() == "postgresql":
+        _postgresql_partition()
+        return
+
+    with op.batch_alter_table(
+        PARENT_TABLE,
+        recreate="always",
+        naming_convention=_NAMING_CONVENTION,
+    ) as batch_op:
+        batch_op.drop_constraint(_PRIMARY_KEY, type_="primary")
+        batch_op.alter_column(
+            "timestamp",
+            existing_type=sa.DateTime(timezone=True),
+            nullable=False,
+        )
+        batch_op.create_primary_key(_PRIMARY_KEY, ["id", "timestamp"])
+
+
+def unpartition_attacks() -> None:
+    """Restore the initial schema's attacks, sessions and credentials."""
+    if _dialect() == "postgresql":
+        indexes: List[str] = []
+        if not _offline():
+            indexes = [
+                definition.replace(" ON ONLY ", " ON ")
+                for definition, in op.get_bind().execute(
+                    sa.text(
+                        "SELECT indexdef FROM pg_indexes "
+                        "WHERE tablename = :table "
+                        "AND indexname <> :primary_key"
+                    ),
+                    {"table": PARENT_TABLE, "primary_key": _PRIMARY_KEY},
+                )
+            ]
+        partitioned = f"{PARENT_TABLE}_partitioned"
+        op.rename_table(PARENT_TABLE, partitioned)
+        op.execute(
+            f"CREATE TABLE {PARENT_TABLE} "
+            f"(LIKE {partitioned} INCLUDING DEFAULTS)"
+        )
+        op.execute(f"INSERT INTO {PARENT_TABLE} SELECT * FROM {partitioned}")
+        # Takes the partitions with it
+        op.drop_table(partitioned)
+        op.alter_column(PARENT_TABLE, "timestamp", nullable=True)
+        op.create_primary_key(_PRIMARY_KEY, PARENT_TABLE, ["id"])
+        for definition in indexes:
+            op.execute(definition)
+    else:
+        with op.batch_alter_table(
+            PARENT_TABLE,
+            recreate="always",
+            naming_convention=_NAMING_CONVENTION,
+        ) as batch_op:
+            batch_op.drop_constraint(_PRIMARY_KEY, type_="primary")
+            batch_op.alter_column(
+                "timestamp",
+                existing_type=sa.DateTime(timezone=True),
+                nullable=True,
+            )
+            batch_op.create_primary_key(_PRIMARY_KEY, ["id"])
+
+    for table in CHILD_TABLES:
+        with op.batch_alter_table(
+            table, naming_convention=_NAMING_CONVENTION
+        ) as batch_op:
+            batch_op.drop_index(f"ix_{table}_attack_id")
+            batch_op.create_foreign_key(
+                f"fk_{table}_attack_id_{PARENT_TABLE}"
+                if _dialect() == "sqlite"
+                else f"{table}_attack_id_fkey",
+                PARENT_TABLE,
+                ["attack_id"],
+                ["id"],
+            )
+    op.drop_table("session_commands")
@@ -0,0 +1,65 @@
+"""Initial schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17 00:00:00
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # The schema create_all produced before migrations were introduced;
+    # databases created that way are stamped at this revision
+    op.create_table(
+        "attacks",
+        sa.Column("id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("ip", sa.String(length=45), nullable=False),
+        sa.Column("timestamp", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("service", sa.String(length=50), nullable=False),
+        sa.Column("payload", sa.JSON(), nullable=True),
+        sa.Column("threat_type", sa.String(length=50), nullable=True),
+        sa.Column("confidence", sa.Float(), nullable=True),
+        sa.Column("country", sa.String(length=2), nullable=True),
+        sa.Column("asn", sa.Integer(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_attacks_ip", "attacks", ["ip"])
+    op.create_index("ix_attacks_timestamp", "attacks", ["timestamp"])
+
+    op.create_table(
+        "sessions",
+        sa.Column("id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("attack_id", postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column("start_time", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("end_time", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("commands", sa.JSON(), nullable=True),
+        sa.ForeignKeyConstraint(["attack_id"], ["attacks.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+    op.create_table(
+        "credentials",
+        sa.Column("id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("attack_id", postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column("username", sa.String(length=255), nullable=False),
+        sa.Column("password", sa.String(length=255), nullable=False),
+        sa.Column("success", sa.Boolean(), nullable=True),
+        sa.ForeignKeyConstraint(["attack_id"], ["attacks.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("credentials")
+    op.drop_table("sessions")
+    op.drop_table("attacks")
@@ -0,0 +1,32 @@
+"""Partitioned attacks and session commands
+
+Converts the initial schema to the layout of the partitioned attacks
+table: adds session_commands, replaces the foreign keys from sessions
+and credentials to attacks by attack_id indexes, and rebuilds attacks
+with an (id, timestamp) primary key, partitioned by range of timestamp
+on PostgreSQL. Existing rows are copied into daily partitions.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 00:00:00
+"""
+from typing import Sequence, Union
+
+from tenebrinet.migrations.partitioning import (
+    partition_attacks,
+    unpartition_attacks,
+)
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    partition_attacks()
+
+
+def downgrade() -> None:
+    unpartition_attacks()
@@ -0,0 +1,47 @@
+"""Composite indexes for the attacks API filters
+
+Serve the service, threat_type and country filters of list_attacks,
+which order by timestamp descending, and the GROUP BY queries of the
+attack statistics.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 00:00:00
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_INDEXES = {
+    "ix_attacks_service_timestamp": "service",
+    "ix_attacks_threat_type_timestamp": "threat_type",
+    "ix_attacks_country_timestamp": "country",
+}
+
+
+def upgrade() -> None:
+    # Databases adopted from create_all may already have them
+    existing = set()
+    if not op.get_context().as_sql:
+        existing = {
+            index["name"]
+            for index in sa.inspect(op.get_bind()).get_indexes("attacks")
+        }
+    for name, column in _INDEXES.items():
+        if name in existing:
+            continue
+        op.create_index(
+            name, "attacks", [column, sa.text('"timestamp" DESC')]
+        )
+
+
+def downgrade() -> None:
+    for name in _INDEXES:
+        op.drop_index(name, table_name="attacks")
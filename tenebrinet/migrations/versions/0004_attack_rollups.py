@@ -0,0 +1,54 @@
+"""Attack rollups for statistics
+
+Adds per-minute attack counts (attack_rollups), maintained by the event
+sink, and backfills them from the existing attacks.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 00:00:00
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Minute bucket expressions matching how each backend stores timestamps
+_BUCKET = {
+    "postgresql": "date_trunc('minute', timestamp)",
+    "sqlite": "strftime('%Y-%m-%d %H:%M:00.000000', timestamp)",
+}
+
+
+def upgrade() -> None:
+    op.create_table(
+        "attack_rollups",
+        sa.Column("bucket", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("service", sa.String(length=50), nullable=False),
+        sa.Column("threat_type", sa.String(length=50), nullable=False),
+        sa.Column("country", sa.String(length=2), nullable=False),
+        sa.Column("count", sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint(
+            "bucket", "service", "threat_type", "country"
+        ),
+    )
+
+    bucket = _BUCKET.get(op.get_context().dialect.name)
+    if bucket is None:
+        return
+    op.execute(
+        "INSERT INTO attack_rollups "
+        "(bucket, service, threat_type, country, count) "
+        f"SELECT {bucket}, service, coalesce(threat_type, ''), "
+        "coalesce(country, ''), count(*) FROM attacks "
+        "GROUP BY 1, 2, 3, 4"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("attack_rollups")
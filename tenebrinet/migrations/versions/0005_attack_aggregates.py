@@ -0,0 +1,74 @@
+"""Streaming attack aggregate checkpoints
+
+Adds attack_aggregates, holding each ingest node's checkpointed daily
+and all-time counts and HyperLogLog sketches of distinct attacker IPs,
+and backfills it from the existing attacks under the node name
+"backfill".
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 00:00:00
+"""
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_NODE = "backfill"
+
+
+def upgrade() -> None:
+    aggregates = op.create_table(
+        "attack_aggregates",
+        sa.Column("node", sa.String(length=255), nullable=False),
+        sa.Column("period", sa.String(length=10), nullable=False),
+        sa.Column("total", sa.BigInteger(), nullable=False),
+        sa.Column("by_service", sa.JSON(), nullable=False),
+        sa.Column("ip_sketch", sa.LargeBinary(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint("node", "period"),
+    )
+    if op.get_context().as_sql:
+        return
+
+    from tenebrinet.core.aggregates import StreamingAggregates
+
+    attacks = sa.table(
+        "attacks",
+        sa.column("ip", sa.String()),
+        sa.column("timestamp", sa.DateTime(timezone=True)),
+        sa.column("service", sa.String()),
+    )
+    collector = StreamingAggregates(node_id=BACKFILL_NODE)
+    result = op.get_bind().execute(
+        sa.select(attacks.c.ip, attacks.c.timestamp, attacks.c.service)
+        .execution_options(stream_results=True, yield_per=10000)
+    )
+    for chunk in result.mappings().partitions():
+        collector.observe([dict(row) for row in chunk])
+
+    now = datetime.now(timezone.utc)
+    rows = [
+        {
+            "node": BACKFILL_NODE,
+            "period": period,
+            "total": aggregate.total,
+            "by_service": dict(aggregate.by_service),
+            "ip_sketch": aggregate.sketch.to_bytes(),
+            "updated_at": now,
+        }
+        for period, aggregate in collector.pending.items()
+    ]
+    if rows:
+        op.bulk_insert(aggregates, rows)
+
+
+def downgrade() -> None:
+    op.drop_table("attack_aggregates")
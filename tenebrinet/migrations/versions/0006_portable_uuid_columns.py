@@ -0,0 +1,46 @@
+"""Portable UUID columns
+
+The UUID columns were declared with the PostgreSQL UUID type. On SQLite
+that yields columns named UUID, which get NUMERIC affinity and can turn
+hex strings that look like numbers into numbers. This revision retypes
+them as CHAR(32) on SQLite; PostgreSQL keeps its native UUID columns
+and is not changed.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17 00:00:00
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0006"
+down_revision: Union[str, None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+UUID_COLUMNS = {
+    "attacks": ["id"],
+    "sessions": ["id", "attack_id"],
+    "credentials": ["id", "attack_id"],
+    "session_commands": ["id", "session_id"],
+}
+
+
+def _retype(type_: sa.types.TypeEngine) -> None:
+    if op.get_context().dialect.name != "sqlite":
+        return
+    for table, columns in UUID_COLUMNS.items():
+        with op.batch_alter_table(table, recreate="always") as batch_op:
+            for column in columns:
+                batch_op.alter_column(column, type_=type_)
+
+
+def upgrade() -> None:
+    _retype(sa.Uuid())
+
+
+def downgrade() -> None:
+    _retype(sa.UUID())
@@ -0,0 +1,140 @@
+"""Deduplicated credential pairs
+
+Adds credential_pairs, holding each distinct username/password pair
+once with its attempt and success counts, backfills it from the stored
+credentials and replaces their username and password columns with a
+reference to the pair.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17 00:00:00
+"""
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0007"
+down_revision: Union[str, None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Temporary lookup index used while rewriting the credentials
+_LOOKUP_INDEX = "ix_credential_pairs_username_password"
+
+
+def _as_datetime(value, default: datetime) -> datetime:
+    # SQLite returns aggregated timestamps as strings
+    if value is None:
+        return default
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def upgrade() -> None:
+    pairs = op.create_table(
+        "credential_pairs",
+        sa.Column("id", sa.BigInteger(), autoincrement=False, nullable=False),
+        sa.Column("username", sa.String(length=255), nullable=False),
+        sa.Column("password", sa.String(length=255), nullable=False),
+        sa.Column("attempts", sa.BigInteger(), nullable=False),
+        sa.Column("successes", sa.BigInteger(), nullable=False),
+        sa.Column("first_seen", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("last_seen", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_credential_pairs_attempts",
+        "credential_pairs",
+        ["attempts", "id"],
+    )
+    with op.batch_alter_table("credentials") as batch_op:
+        batch_op.add_column(sa.Column("pair_id", sa.BigInteger()))
+
+    if not op.get_context().as_sql:
+        from tenebrinet.core.credentials import pair_id
+
+        bind = op.get_bind()
+        now = datetime.now(timezone.utc)
+        result = bind.execute(sa.text(
+            "SELECT c.username, c.password, count(*), "
+            "sum(CASE WHEN c.success THEN 1 ELSE 0 END), "
+            "min(a.timestamp), max(a.timestamp) "
+            "FROM credentials c LEFT JOIN attacks a ON a.id = c.attack_id "
+            "GROUP BY c.username, c.password"
+        ))
+        rows = [
+            {
+                "id": pair_id(username, password),
+                "username": username,
+                "password": password,
+                "attempts": attempts,
+                "successes": successes or 0,
+                "first_seen": _as_datetime(first_seen, now),
+                "last_seen": _as_datetime(last_seen, now),
+            }
+            for username, password, attempts, successes, first_seen, last_seen
+            in result
+        ]
+        if rows:
+            op.bulk_insert(pairs, rows)
+            op.create_index(
+                _LOOKUP_INDEX, "credential_pairs", ["username", "password"]
+            )
+            op.execute(
+                "UPDATE credentials SET pair_id = ("
+                "SELECT p.id FROM credential_pairs p "
+                "WHERE p.username = credentials.username "
+                "AND p.password = credentials.password)"
+            )
+            op.drop_index(_LOOKUP_INDEX, table_name="credential_pairs")
+
+    with op.batch_alter_table("credentials") as batch_op:
+        batch_op.alter_column(
+            "pair_id", existing_type=sa.BigInteger(), nullable=False
+        )
+        batch_op.create_index(
+            "ix_credentials_pair_id", ["pair_id"], unique=False
+        )
+        batch_op.create_foreign_key(
+            "fk_credentials_pair_id_credential_pairs",
+            "credential_pairs",
+            ["pair_id"],
+            ["id"],
+        )
+        batch_op.drop_column("username")
+        batch_op.drop_column("password")
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("credentials") as batch_op:
+        batch_op.add_column(sa.Column("username", sa.String(length=255)))
+        batch_op.add_column(sa.Column("password", sa.String(length=255)))
+    op.execute(
+        "UPDATE credentials SET "
+        "username = (SELECT p.username FROM credential_pairs p "
+        "WHERE p.id = credentials.pair_id), "
+        "password = (SELECT p.password FROM credential_pairs p "
+        "WHERE p.id = credentials.pair_id)"
+    )
+    with op.batch_alter_table("credentials") as batch_op:
+        batch_op.alter_column(
+            "username", existing_type=sa.String(length=255), nullable=False
+        )
+        batch_op.alter_column(
+            "password", existing_type=sa.String(length=255), nullable=False
+        )
+        batch_op.drop_constraint(
+            "fk_credentials_pair_id_credential_pairs", type_="foreignkey"
+        )
+        batch_op.drop_index("ix_credentials_pair_id")
+        batch_op.drop_column("pair_id")
+    op.drop_index(
+        "ix_credential_pairs_attempts", table_name="credential_pairs"
+    )
+    op.drop_table("credential_pairs")
@@ -17,6 +17,8 @@ from sklearn.compose import ColumnTransformer
 from sklearn.pipeline import Pipeline
 from sklearn.impute import SimpleImputer
 
+from tenebrinet.utils.normalization import canonicalize
+
 
 class FeatureExtractor(BaseEstimator, TransformerMixin):
     """
@@ -115,19 +117,22 @@ class FeatureExtractor(BaseEstimator, TransformerMixin):
 
             # Payload analysis
             payload_str = str(payload).lower()
+            # Keywords are counted in the decoded payload, so encoded
+            # variants count alike
+            canonical = canonicalize(payload_str)
 
             # Keyword counting
             sqli_keywords = len(re.findall(
                 r"(union|select|insert|drop|update|where|from)",
-                payload_str
+                canonical
             ))
             xss_keywords = len(re.findall(
                 r"(script|alert|onload|onerror|img|svg|iframe)",
-                payload_str
+                canonical
             ))
             path_traversal_keywords = len(re.findall(
                 r"(\.\./|\.\.\\|/etc/passwd|c:\\windows)",
-                payload_str
+                canonical
             ))
 
             # User Agent analysis
@@ -13,8 +13,8 @@ import uuid
 import structlog
 
 from tenebrinet.core.config import FTPServiceConfig
-from tenebrinet.core.database import AsyncSessionLocal
 from tenebrinet.core.models import Attack, Credential, Session
+from tenebrinet.core.sink import event_sink
 
 
 logger = structlog.get_logger()
@@ -670,55 +670,54 @@ class FTPClientHandler:
     # --- Database Recording ---
 
     async def _record_attack(self) -> None:
-        """Record the attack in the database."""
+        """Queue the attack and its session for recording."""
         try:
-            async with AsyncSessionLocal() as session:
-                attack = Attack(
-                    ip=self.client_ip,
-                    service="ftp",
-                    threat_type="credential_attack",
-                    payload={
-                        "username": self.username,
-                        "anonymous": self.username == "anonymous",
-                    },
-                )
-                session.add(attack)
-                await session.flush()
-                self.attack_id = attack.id  # type: ignore
-
-                # Create session record
-                sess = Session(
-                    attack_id=attack.id,  # type: ignore
-                    commands=self.commands,
-                )
-                session.add(sess)
-                await session.flush()
-                self.session_id = sess.id  # type: ignore
-
-                await session.commit()
-                logger.info(
-                    "ftp_attack_recorded",
-                    attack_id=str(attack.id),
-                    client_ip=self.client_ip,
-                )
+            now = datetime.now(timezone.utc)
+            attack_id = uuid.uuid4()
+            await event_sink.put(Attack, {
+                "id": attack_id,
+                "ip": self.client_ip,
+                "timestamp": now,
+                "service": "ftp",
+                "threat_type": "credential_attack",
+                "payload": {
+                    "username": self.username,
+                    "anonymous": self.username == "anonymous",
+                },
+            })
+            self.attack_id = attack_id
+
+            # Create session record
+            session_id = uuid.uuid4()
+            await event_sink.put(Session, {
+                "id": session_id,
+                "attack_id": attack_id,
+                "start_time": now,
+                "commands": list(self.commands),
+            })
+            self.session_id = session_id
+
+            logger.info(
+                "ftp_attack_recorded",
+                attack_id=str(attack_id),
+                client_ip=self.client_ip,
+            )
         except Exception as e:
             logger.error("ftp_attack_record_failed", error=str(e))
 
     async def _record_credential(self) -> None:
-        """Record captured credentials."""
+        """Queue captured credentials for recording."""
         if not self.attack_id:
             return
 
         try:
-            async with AsyncSessionLocal() as session:
-                credential = Credential(
-                    attack_id=self.attack_id,
-                    username=self.username or "",
-                    password=self.password or "",
-                    success=True,
-                )
-                session.add(credential)
-                await session.commit()
+            await event_sink.put(Credential, {
+                "id": uuid.uuid4(),
+                "attack_id": self.attack_id,
+                "username": self.username or "",
+                "password": self.password or "",
+                "success": True,
+            })
         except Exception as e:
             logger.error("ftp_credential_record_failed", error=str(e))
 
@@ -728,14 +727,11 @@ class FTPClientHandler:
             return
 
         try:
-            async with AsyncSessionLocal() as session:
-                result = await session.get(Session, self.session_id)
-                if result:
-                    # Explicitly cast or ignore type check for SQLAlchemy
-                    # model assignment if mypy complains about Column vs Type
-                    result.end_time = datetime.now(timezone.utc)  # type: ignore  # noqa: E501
-                    result.commands = self.commands  # type: ignore
-                    await session.commit()
+            await event_sink.put_update(Session, {
+                "id": self.session_id,
+                "end_time": datetime.now(timezone.utc),
+                "commands": list(self.commands),
+            })
         except Exception as e:
             logger.error("ftp_session_close_failed", error=str(e))
 
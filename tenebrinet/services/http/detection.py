@@ -0,0 +1,834 @@
+# tenebrinet/services/http/detection.py
+"""
+Threat detection for the HTTP honeypot.
+
+``ThreatMatcher`` compiles the signatures once and reports every matching
+category of a request in one call:
+
+* the regex rules of each attack category are run in order over the
+  lowercased request text until one matches;
+* suspicious path prefixes are checked with a single ``str.startswith``
+  over a tuple of prefixes;
+* scanner user agent signatures are plain substring checks.
+
+Patterns are matched against the canonical form of the request (decoded
+and lowercased, see ``tenebrinet.utils.normalization``), so they are
+written in lowercase and compiled without ``re.IGNORECASE``, which
+roughly halves the cost of every search. Every rule counts its hits and
+the time spent evaluating it, so expensive or dead rules can be found and
+pruned.
+
+``SignatureRules`` loads the rules from a YAML file (see
+``config/http_rules.yml``) and swaps in a new matcher whenever the file
+changes, without restarting the listener.
+
+``ThreatDetector`` keeps the event loop responsive when bodies are large
+or crafted to make the patterns backtrack: small requests are matched
+inline, larger ones in a bounded pool of worker processes where each
+match is stopped once it used ``cpu_budget`` seconds of CPU time. A
+stopped match, or one that finds the pool busy, falls back to matching
+the request's first ``inline_max_chars`` characters inline.
+
+Verdicts of inline matched requests are cached under a hash of the
+canonical method, path, query, body and user agent, so the identical
+requests mass scanners send from many addresses are matched once.
+"""
+import asyncio
+import functools
+import hashlib
+import multiprocessing
+import os
+import re
+import signal
+import time
+from concurrent.futures import BrokenExecutor, Future, ProcessPoolExecutor
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+)
+
+from pydantic import BaseModel, ConfigDict, Field
+import structlog
+import yaml
+
+from tenebrinet.core.cache import TTLCache
+from tenebrinet.core.metrics import (
+    HTTP_DETECTION_CACHE_HITS,
+    HTTP_DETECTION_CACHE_MISSES,
+    HTTP_DETECTION_OFFLOAD_QUEUE,
+    HTTP_DETECTION_OFFLOADED,
+    HTTP_DETECTION_QUEUE_FULL,
+    HTTP_DETECTION_TIMEOUTS,
+    HTTP_RULE_EVAL_SECONDS,
+    HTTP_RULE_HITS,
+    HTTP_RULE_RELOADS,
+)
+from tenebrinet.utils.normalization import canonicalize
+
+
+logger = structlog.get_logger()
+
+
+# Common attack patterns to detect, in priority order. The first three
+# are the classic OWASP SQL injection signatures as they apply to
+# canonical input, where percent-encoding is already decoded (no leading
+# group or ``\w*`` either, so the regex engine can skip ahead).
+ATTACK_PATTERNS = {
+    "sql_injection": [
+        r"['#]|--",
+        r"=.*(?:'|--|;)",
+        r"'or",
+        r"union.*select",
+        r"select.*from",
+        r"insert.*into",
+        r"drop.*table",
+        r"update.*set",
+        r"delete.*from",
+    ],
+    "xss": [
+        r"<script[^>]*>",
+        r"javascript:",
+        r"on\w+\s*=",
+        r"<img[^>]+onerror",
+        r"<svg[^>]+onload",
+    ],
+    "path_traversal": [
+        r"\.\./",
+        r"\.\.\\",
+        r"/etc/passwd",
+        r"/etc/shadow",
+        r"c:\\windows",
+    ],
+    "command_injection": [
+        r";\s*\w+",
+        r"\|\s*\w+",
+        r"`[^`]+`",
+        r"\$\([^)]+\)",
+        r"&&\s*\w+",
+    ],
+    "lfi_rfi": [
+        r"(file|php|zip|data|expect|input|phar)://",
+        r"\.php\?",
+        r"include\s*\(",
+        r"require\s*\(",
+    ],
+}
+
+# Suspicious paths that attackers commonly probe
+SUSPICIOUS_PATHS = [
+    "/wp-admin",
+    "/wp-login.php",
+    "/administrator",
+    "/admin",
+    "/phpmyadmin",
+    "/mysql",
+    "/.git",
+    "/.env",
+    "/config",
+    "/backup",
+    "/.htaccess",
+    "/wp-config.php",
+    "/xmlrpc.php",
+    "/shell",
+    "/cmd",
+    "/eval",
+    "/api/v1",
+    "/graphql",
+    "/.well-known",
+    "/robots.txt",
+    "/sitemap.xml",
+]
+
+# User agent substrings of common scanners
+SCANNER_SIGNATURES = [
+    "nikto", "sqlmap", "nmap", "masscan", "zgrab",
+    "gobuster", "dirbuster", "wfuzz", "burp", "acunetix",
+    "nessus", "qualys", "openvas", "w3af", "skipfish",
+]
+
+RECONNAISSANCE = "reconnaissance"
+SCANNER = "scanner"
+# Threat type of requests matching no signature
+PROBE = "probe"
+
+
+# Names of the rules matching suspicious paths and scanner user agents
+PATHS_RULE = "suspicious_paths"
+SCANNERS_RULE = "scanner_signatures"
+
+# A signature pattern, optionally named: "pattern" or ("name", "pattern")
+RuleSpec = Union[str, Tuple[str, str]]
+
+# Bound ``search`` method of a compiled pattern
+_Search = Callable[[str], Any]
+
+
+class SignatureRule:
+    """A compiled signature with its hit and evaluation time counts."""
+
+    __slots__ = ("name", "category", "pattern", "regex", "hits", "eval_ns")
+
+    def __init__(
+        self, name: str, category: str, pattern: Optional[str] = None
+    ) -> None:
+        self.name = name
+        self.category = category
+        self.pattern = pattern
+        self.regex = re.compile(pattern) if pattern is not None else None
+        self.hits = 0
+        self.eval_ns = 0
+
+
+def canonical_request(
+    path: str,
+    query: str = "",
+    body: Optional[str] = None,
+    user_agent: str = "",
+) -> Tuple[str, str, Optional[str], str]:
+    """
+    Canonicalize the matched parts of a request.
+
+    ``+`` in the query and body is decoded as a space; an empty body
+    becomes None.
+
+    Returns:
+        Tuple of (path, query, body, user_agent).
+    """
+    return (
+        canonicalize(path),
+        canonicalize(query, plus_as_space=True),
+        canonicalize(body, plus_as_space=True) if body else None,
+        canonicalize(user_agent),
+    )
+
+
+class ThreatMatcher:
+    """Precompiled matcher over all HTTP threat signatures."""
+
+    def __init__(
+        self,
+        attack_patterns: Optional[Mapping[str, Sequence[RuleSpec]]] = None,
+        suspicious_paths: Optional[Iterable[str]] = None,
+        scanner_signatures: Optional[Iterable[str]] = None,
+    ) -> None:
+        """
+        Compile the signatures.
+
+        Args:
+            attack_patterns: Lowercase regexes per category, in priority
+                order. Unnamed patterns are named ``<category>_<index>``.
+                Defaults to ``ATTACK_PATTERNS``.
+            suspicious_paths: Path prefixes reported as reconnaissance.
+                Defaults to ``SUSPICIOUS_PATHS``.
+            scanner_signatures: User agent substrings reported as
+                scanners. Defaults to ``SCANNER_SIGNATURES``.
+
+        Raises:
+            ValueError: If a pattern is invalid or two rules share a name.
+        """
+        self.attack_patterns: Dict[str, List[Tuple[str, str]]] = {
+            category: [
+                (f"{category}_{index}", spec) if isinstance(spec, str)
+                else (spec[0], spec[1])
+                for index, spec in enumerate(specs)
+            ]
+            for category, specs in (
+                ATTACK_PATTERNS if attack_patterns is None
+                else attack_patterns
+            ).items()
+        }
+        self.suspicious_paths: List[str] = list(
+            SUSPICIOUS_PATHS if suspicious_paths is None else suspicious_paths
+        )
+        self.scanner_signatures: List[str] = list(
+            SCANNER_SIGNATURES if scanner_signatures is None
+            else scanner_signatures
+        )
+
+        # Each rule with its compiled search, per category
+        self._categories: List[List[Tuple[SignatureRule, _Search]]] = []
+        for category, specs in self.attack_patterns.items():
+            rules: List[Tuple[SignatureRule, _Search]] = []
+            for name, pattern in specs:
+                try:
+                    rule = SignatureRule(name, category, pattern)
+                except re.error as e:
+                    raise ValueError(
+                        f"Invalid pattern of rule {name!r}: {e}"
+                    ) from e
+                assert rule.regex is not None
+                rules.append((rule, rule.regex.search))
+            if rules:
+                self._categories.append(rules)
+        self._paths_rule = SignatureRule(PATHS_RULE, RECONNAISSANCE)
+        self._scanners_rule = SignatureRule(SCANNERS_RULE, SCANNER)
+        self._path_prefixes: Tuple[str, ...] = tuple(
+            path.lower() for path in self.suspicious_paths
+        )
+        self._scanners: Tuple[str, ...] = tuple(
+            signature.lower() for signature in self.scanner_signatures
+        )
+
+        names = [rule.name for rule in self.rules]
+        duplicates = sorted({name for name in names if names.count(name) > 1})
+        if duplicates:
+            raise ValueError(f"Duplicate rule names: {', '.join(duplicates)}")
+
+    @property
+    def rules(self) -> List[SignatureRule]:
+        """All rules, in evaluation order."""
+        return [
+            rule for rules in self._categories for rule, _ in rules
+        ] + [self._paths_rule, self._scanners_rule]
+
+    def match(
+        self,
+        path: str,
+        query: str = "",
+        body: Optional[str] = None,
+        user_agent: str = "",
+    ) -> List[str]:
+        """
+        Return every threat category a request matches.
+
+        Inputs are canonicalized first (see ``canonical_request``), then
+        matched by ``match_canonical``.
+
+        Args:
+            path: Request path.
+            query: Raw query string.
+            body: Request body, if any.
+            user_agent: User-Agent header value.
+
+        Returns:
+            Matching categories in priority order: attack categories, then
+            reconnaissance, then scanner.
+        """
+        return self.match_canonical(
+            *canonical_request(path, query, body, user_agent)
+        )
+
+    def match_canonical(
+        self,
+        path: str,
+        query: str,
+        body: Optional[str],
+        user_agent: str,
+    ) -> List[str]:
+        """
+        Return every threat category a canonicalized request matches.
+
+        Rules are searched in the path and query (``<path>?<query>``)
+        and, separately, in the body, so a pattern cannot span from the
+        query into the body. The rules of a category are evaluated in
+        order until one matches; each evaluation is timed and each match
+        counted on its rule.
+
+        Args:
+            path: Canonical request path.
+            query: Canonical query string.
+            body: Canonical request body, if any.
+            user_agent: Canonical User-Agent header value.
+
+        Returns:
+            Matching categories in priority order, as for ``match``.
+        """
+        clock = time.perf_counter_ns
+        text = f"{path}?{query}"
+
+        found = []
+        for rules in self._categories:
+            for rule, search in rules:
+                started = clock()
+                matched = search(text) or (body is not None and search(body))
+                rule.eval_ns += clock() - started
+                if matched:
+                    rule.hits += 1
+                    found.append(rule.category)
+                    break
+
+        started = clock()
+        matched = path.startswith(self._path_prefixes)
+        self._paths_rule.eval_ns += clock() - started
+        if matched:
+            self._paths_rule.hits += 1
+            found.append(RECONNAISSANCE)
+
+        started = clock()
+        matched = any(signature in user_agent for signature in self._scanners)
+        self._scanners_rule.eval_ns += clock() - started
+        if matched:
+            self._scanners_rule.hits += 1
+            found.append(SCANNER)
+        return found
+
+    def classify(
+        self,
+        path: str,
+        query: str = "",
+        body: Optional[str] = None,
+        user_agent: str = "",
+    ) -> str:
+        """Return the highest priority threat type of a request."""
+        found = self.match(path, query, body, user_agent)
+        return found[0] if found else PROBE
+
+
+# Matcher over the built-in signatures
+default_matcher = ThreatMatcher()
+
+
+class _NamedRule(BaseModel):
+    name: str
+    pattern: str
+
+
+class RulesFile(BaseModel):
+    """Contents of an HTTP signature rules file."""
+
+    model_config = ConfigDict(extra="forbid")
+
+    # Categories in priority order; rules are a pattern or name/pattern
+    attacks: Dict[str, List[Union[_NamedRule, str]]] = Field(
+        default_factory=dict
+    )
+    suspicious_paths: List[str] = Field(default_factory=list)
+    scanner_signatures: List[str] = Field(default_factory=list)
+
+    def matcher(self) -> ThreatMatcher:
+        """Compile the rules."""
+        return ThreatMatcher(
+            attack_patterns={
+                category: [
+                    rule if isinstance(rule, str)
+                    else (rule.name, rule.pattern)
+                    for rule in rules
+                ]
+                for category, rules in self.attacks.items()
+            },
+            suspicious_paths=self.suspicious_paths,
+            scanner_signatures=self.scanner_signatures,
+        )
+
+
+class SignatureRules:
+    """HTTP threat signatures, reloaded when their rules file changes."""
+
+    def __init__(
+        self, path: Optional[str] = None, reload_interval: float = 5.0
+    ) -> None:
+        """
+        Initialize the rules.
+
+        Args:
+            path: YAML rules file; None uses the built-in signatures.
+            reload_interval: Seconds between checks of the file, and
+                between exports of the rule counters to Prometheus.
+        """
+        self.path = path
+        self.reload_interval = reload_interval
+        self.matcher = ThreatMatcher()
+        # Modification time and size of the loaded file
+        self._version: Optional[Tuple[int, int]] = None
+        # Counts already exported, by rule object
+        self._exported: Dict[int, Tuple[int, int]] = {}
+
+    def load(self) -> None:
+        """
+        Compile the rules file and make it the current matcher.
+
+        Raises:
+            OSError: If the file cannot be read.
+            ValueError: If the file or one of its patterns is invalid.
+        """
+        if self.path is None:
+            raise ValueError("No rules file configured")
+        stat = os.stat(self.path)
+        with open(self.path, "r", encoding="utf-8") as f:
+            try:
+                data = yaml.safe_load(f) or {}
+            except yaml.YAMLError as e:
+                raise ValueError(f"Invalid YAML: {e}") from e
+        matcher = RulesFile.model_validate(data).matcher()
+
+        self.export_stats()
+        # One assignment: requests see either the old or the new rules
+        self.matcher = matcher
+        self._exported = {}
+        self._version = (stat.st_mtime_ns, stat.st_size)
+        logger.info(
+            "http_rules_loaded", path=self.path, rules=len(matcher.rules)
+        )
+
+    def reload_if_changed(self) -> bool:
+        """
+        Load the rules file again if it changed since it was loaded.
+
+        A file that fails to load is logged and skipped until it changes
+        again; the current rules stay in use.
+
+        Returns:
+            True if new rules were loaded.
+        """
+        if self.path is None:
+            return False
+        try:
+            stat = os.stat(self.path)
+        except OSError as e:
+            logger.warning(
+                "http_rules_unavailable", path=self.path, error=str(e)
+            )
+            return False
+        version = (stat.st_mtime_ns, stat.st_size)
+        if version == self._version:
+            return False
+
+        try:
+            self.load()
+        except (OSError, ValueError) as e:
+            self._version = version
+            HTTP_RULE_RELOADS.labels(result="failed").inc()
+            logger.error(
+                "http_rules_reload_failed", path=self.path, error=str(e)
+            )
+            return False
+        HTTP_RULE_RELOADS.labels(result="loaded").inc()
+        return True
+
+    def export_stats(self) -> None:
+        """Add the rule counts since the last export to Prometheus."""
+        for rule in self.matcher.rules:
+            hits, eval_ns = self._exported.get(id(rule), (0, 0))
+            if rule.hits > hits:
+                HTTP_RULE_HITS.labels(
+                    category=rule.category, rule=rule.name
+                ).inc(rule.hits - hits)
+            if rule.eval_ns > eval_ns:
+                HTTP_RULE_EVAL_SECONDS.labels(
+                    category=rule.category, rule=rule.name
+                ).inc((rule.eval_ns - eval_ns) / 1e9)
+            self._exported[id(rule)] = (rule.hits, rule.eval_ns)
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Return the hit count and evaluation time of the current rules."""
+        return [
+            {
+                "rule": rule.name,
+                "category": rule.category,
+                "hits": rule.hits,
+                "eval_seconds": rule.eval_ns / 1e9,
+            }
+            for rule in self.matcher.rules
+        ]
+
+    async def run(self) -> None:
+        """Watch the rules file and export rule counters until cancelled."""
+        try:
+            while True:
+                await asyncio.sleep(self.reload_interval)
+                self.reload_if_changed()
+                self.export_stats()
+        finally:
+            self.export_stats()
+
+
+class DetectionBudgetExceeded(Exception):
+    """Raised in a worker when a match used up its CPU time budget."""
+
+
+# Matcher of a detection worker process, set by _init_worker
+_worker_matcher: Optional[ThreatMatcher] = None
+
+
+def _on_budget_exceeded(signum, frame) -> None:
+    raise DetectionBudgetExceeded()
+
+
+def _init_worker(
+    attack_patterns: Mapping[str, Sequence[RuleSpec]],
+    suspicious_paths: List[str],
+    scanner_signatures: List[str],
+) -> None:
+    """Compile the signatures in a new worker process."""
+    global _worker_matcher
+    _worker_matcher = ThreatMatcher(
+        attack_patterns, suspicious_paths, scanner_signatures
+    )
+    if hasattr(signal, "setitimer"):
+        signal.signal(signal.SIGPROF, _on_budget_exceeded)
+
+
+def _match_in_worker(
+    path: str,
+    query: str,
+    body: Optional[str],
+    user_agent: str,
+    cpu_budget: float,
+) -> Optional[List[str]]:
+    """
+    Match a request in a worker process.
+
+    The regex engine checks for signals while it runs, so a profiling
+    timer interrupts even a backtracking search. Platforms without
+    ``signal.setitimer`` run matches without a budget. Rule counters of
+    worker processes are not reported.
+
+    Returns:
+        The matching categories, or None if the budget ran out.
+    """
+    assert _worker_matcher is not None, "worker was not initialized"
+    has_timer = hasattr(signal, "setitimer")
+    try:
+        if has_timer:
+            signal.setitimer(signal.ITIMER_PROF, cpu_budget)
+        try:
+            return _worker_matcher.match(path, query, body, user_agent)
+        finally:
+            if has_timer:
+                signal.setitimer(signal.ITIMER_PROF, 0)
+    except DetectionBudgetExceeded:
+        return None
+
+
+def verdict_key(
+    method: str,
+    path: str,
+    query: str,
+    body: Optional[str],
+    user_agent: str,
+) -> str:
+    """Return the verdict cache key of a ``canonical_request`` result."""
+    canonical = "\0".join(
+        (method.upper(), path, query, body or "", user_agent)
+    )
+    return hashlib.blake2b(
+        canonical.encode("utf-8", "surrogatepass"), digest_size=16
+    ).hexdigest()
+
+
+class ThreatDetector:
+    """Matches requests inline or in worker processes by size."""
+
+    def __init__(
+        self,
+        matcher: Optional[ThreatMatcher] = None,
+        rules: Optional[SignatureRules] = None,
+        inline_max_chars: int = 4096,
+        workers: int = 2,
+        cpu_budget: float = 0.25,
+        max_queue: int = 64,
+        cache_entries: int = 10000,
+        cache_ttl: float = 300.0,
+    ) -> None:
+        """
+        Initialize the detector.
+
+        Args:
+            matcher: Signatures to match. Defaults to ``default_matcher``.
+            rules: Reloadable signatures to match instead of ``matcher``;
+                workers are restarted when the rules change.
+            inline_max_chars: Largest request (path, query and body
+                characters) matched on the event loop.
+            workers: Worker processes for larger requests.
+            cpu_budget: CPU seconds an offloaded match may use.
+            max_queue: Offloaded matches in flight before larger requests
+                are matched inline on their first ``inline_max_chars``
+                characters.
+            cache_entries: Verdicts of inline matched requests kept for
+                identical requests; 0 disables the verdict cache.
+            cache_ttl: Seconds a cached verdict is reused.
+        """
+        self._matcher = matcher or default_matcher
+        self.rules = rules
+        self.inline_max_chars = inline_max_chars
+        self.workers = workers
+        self.cpu_budget = cpu_budget
+        self.max_queue = max_queue
+        self.timeouts = 0
+        self.cache_ttl = cache_ttl
+        self._cache: Optional[TTLCache] = (
+            TTLCache(max_entries=cache_entries) if cache_entries else None
+        )
+        self._cache_matcher: Optional[ThreatMatcher] = None
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._executor_matcher: Optional[ThreatMatcher] = None
+        self._pending: Set[Future] = set()
+
+    @property
+    def matcher(self) -> ThreatMatcher:
+        """The signatures currently matched."""
+        if self.rules is not None:
+            return self.rules.matcher
+        return self._matcher
+
+    @property
+    def queue_depth(self) -> int:
+        """Offloaded matches waiting for or running in a worker."""
+        return len(self._pending)
+
+    def _pool(self) -> ProcessPoolExecutor:
+        matcher = self.matcher
+        if (
+            self._executor is not None
+            and self._executor_matcher is not matcher
+        ):
+            # Rules were reloaded; running matches finish on the old pool
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        if self._executor is None:
+            # Spawned rather than forked: the honeypot process runs
+            # threads (database drivers, executors) that fork would copy
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(
+                    matcher.attack_patterns,
+                    matcher.suspicious_paths,
+                    matcher.scanner_signatures,
+                ),
+            )
+            self._executor_matcher = matcher
+        return self._executor
+
+    def _done(self, loop: asyncio.AbstractEventLoop, future: Future) -> None:
+        # Runs in the executor's management thread; the pending set
+        # belongs to the event loop
+        try:
+            loop.call_soon_threadsafe(self._finished, future)
+        except RuntimeError:
+            # The loop is closed, nothing reads the set any more
+            self._finished(future)
+
+    def _finished(self, future: Future) -> None:
+        self._pending.discard(future)
+        HTTP_DETECTION_OFFLOAD_QUEUE.dec()
+
+    def _match_prefix(
+        self,
+        path: str,
+        query: str,
+        body: Optional[str],
+        user_agent: str,
+    ) -> List[str]:
+        remaining = max(0, self.inline_max_chars - len(path) - len(query))
+        return self.matcher.match(
+            path, query, body[:remaining] if body else body, user_agent
+        )
+
+    def _match_inline(
+        self,
+        method: str,
+        path: str,
+        query: str,
+        body: Optional[str],
+        user_agent: str,
+    ) -> List[str]:
+        matcher = self.matcher
+        if self._cache is None:
+            return matcher.match(path, query, body, user_agent)
+        if matcher is not self._cache_matcher:
+            # Rules were reloaded; earlier verdicts may be wrong
+            self._cache.clear()
+            self._cache_matcher = matcher
+
+        # Canonicalized once for both the key and the signatures
+        canonical = canonical_request(path, query, body, user_agent)
+        key = verdict_key(method, *canonical)
+        found = self._cache.get(key)
+        if found is not None:
+            HTTP_DETECTION_CACHE_HITS.inc()
+            return list(found)
+        HTTP_DETECTION_CACHE_MISSES.inc()
+        found = matcher.match_canonical(*canonical)
+        self._cache.set(key, tuple(found), self.cache_ttl)
+        return found
+
+    async def match(
+        self,
+        path: str,
+        query: str = "",
+        body: Optional[str] = None,
+        user_agent: str = "",
+        method: str = "GET",
+    ) -> List[str]:
+        """
+        Return every threat category a request matches.
+
+        See ``ThreatMatcher.match``; requests larger than
+        ``inline_max_chars`` are matched in a worker process. Verdicts of
+        smaller requests are cached, so identical requests replayed by
+        scanners skip the signatures (and their rule counters).
+        """
+        size = len(path) + len(query) + (len(body) if body else 0)
+        if size <= self.inline_max_chars:
+            return self._match_inline(method, path, query, body, user_agent)
+
+        if len(self._pending) >= self.max_queue:
+            HTTP_DETECTION_QUEUE_FULL.inc()
+            logger.warning(
+                "http_detection_queue_full",
+                pending=len(self._pending),
+                limit=self.max_queue,
+            )
+            return self._match_prefix(path, query, body, user_agent)
+
+        try:
+            future = self._pool().submit(
+                _match_in_worker,
+                path,
+                query,
+                body,
+                user_agent,
+                self.cpu_budget,
+            )
+            self._pending.add(future)
+            HTTP_DETECTION_OFFLOAD_QUEUE.inc()
+            HTTP_DETECTION_OFFLOADED.inc()
+            future.add_done_callback(
+                functools.partial(self._done, asyncio.get_running_loop())
+            )
+            found = await asyncio.wrap_future(future)
+        except BrokenExecutor as e:
+            # A worker died; start a new pool for the next request
+            logger.error("http_detection_pool_broken", error=str(e))
+            self._executor = None
+            return self._match_prefix(path, query, body, user_agent)
+
+        if found is None:
+            self.timeouts += 1
+            HTTP_DETECTION_TIMEOUTS.inc()
+            logger.warning(
+                "http_detection_budget_exceeded",
+                size=size,
+                cpu_budget=self.cpu_budget,
+            )
+            return self._match_prefix(path, query, body, user_agent)
+        return found
+
+    async def classify(
+        self,
+        path: str,
+        query: str = "",
+        body: Optional[str] = None,
+        user_agent: str = "",
+        method: str = "GET",
+    ) -> str:
+        """Return the highest priority threat type of a request."""
+        found = await self.match(path, query, body, user_agent, method)
+        return found[0] if found else PROBE
+
+    def close(self) -> None:
+        """Stop the worker processes."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -5,91 +5,32 @@ HTTP Honeypot Server implementation.
 Provides a fake web server that simulates a vulnerable CMS (WordPress)
 to capture web-based attacks and attacker reconnaissance.
 """
-import re
-from typing import Optional
+import asyncio
+import uuid
+from datetime import datetime, timezone
+from typing import Optional, Set
 
 from aiohttp import web
 import structlog
 
 from tenebrinet.core.config import HTTPServiceConfig
-from tenebrinet.core.database import AsyncSessionLocal
+from tenebrinet.core.metrics import (
+    HTTP_PENDING_RECORDS,
+    HTTP_RECORD_LIMIT_HITS,
+)
 from tenebrinet.core.models import Attack, Credential
+from tenebrinet.core.sink import event_sink
+from tenebrinet.services.http.detection import (  # noqa: F401
+    ATTACK_PATTERNS,
+    SUSPICIOUS_PATHS,
+    SignatureRules,
+    ThreatDetector,
+)
 
 
 logger = structlog.get_logger()
 
 
-# Common attack patterns to detect
-ATTACK_PATTERNS = {
-    "sql_injection": [
-        r"(\%27)|(\')|(\-\-)|(\%23)|(#)",
-        r"((\%3D)|(=))[^\n]*((\%27)|(\')|(\-\-)|(\%3B)|(;))",
-        r"\w*((\%27)|(\'))((\%6F)|o|(\%4F))((\%72)|r|(\%52))",
-        r"union.*select",
-        r"select.*from",
-        r"insert.*into",
-        r"drop.*table",
-        r"update.*set",
-        r"delete.*from",
-    ],
-    "xss": [
-        r"<script[^>]*>",
-        r"javascript:",
-        r"on\w+\s*=",
-        r"<img[^>]+onerror",
-        r"<svg[^>]+onload",
-    ],
-    "path_traversal": [
-        r"\.\./",
-        r"\.\.\\",
-        r"%2e%2e%2f",
-        r"%2e%2e/",
-        r"\.\.%2f",
-        r"/etc/passwd",
-        r"/etc/shadow",
-        r"c:\\windows",
-    ],
-    "command_injection": [
-        r";\s*\w+",
-        r"\|\s*\w+",
-        r"`[^`]+`",
-        r"\$\([^)]+\)",
-        r"&&\s*\w+",
-    ],
-    "lfi_rfi": [
-        r"(file|php|zip|data|expect|input|phar)://",
-        r"\.php\?",
-        r"include\s*\(",
-        r"require\s*\(",
-    ],
-}
-
-# Suspicious paths that attackers commonly probe
-SUSPICIOUS_PATHS = [
-    "/wp-admin",
-    "/wp-login.php",
-    "/administrator",
-    "/admin",
-    "/phpmyadmin",
-    "/mysql",
-    "/.git",
-    "/.env",
-    "/config",
-    "/backup",
-    "/.htaccess",
-    "/wp-config.php",
-    "/xmlrpc.php",
-    "/shell",
-    "/cmd",
-    "/eval",
-    "/api/v1",
-    "/graphql",
-    "/.well-known",
-    "/robots.txt",
-    "/sitemap.xml",
-]
-
-
 class HTTPHoneypot:
     """
     HTTP Honeypot service that simulates a vulnerable web server.
@@ -107,6 +48,21 @@ class HTTPHoneypot:
         self.runner: Optional[web.AppRunner] = None
         self.site: Optional[web.TCPSite] = None
         self._running = False
+        self._pending_records: Set[asyncio.Task] = set()
+        self.record_limit_hits = 0
+        self.rules = SignatureRules(
+            config.rules_file, config.rules_reload_interval
+        )
+        self._rules_task: Optional[asyncio.Task] = None
+        self.detector = ThreatDetector(
+            rules=self.rules,
+            inline_max_chars=config.detection_inline_max_chars,
+            workers=config.detection_workers,
+            cpu_budget=config.detection_cpu_budget,
+            max_queue=config.detection_max_queue,
+            cache_entries=config.detection_cache_entries,
+            cache_ttl=config.detection_cache_ttl,
+        )
 
     async def start(self) -> None:
         """Start the HTTP honeypot server."""
@@ -122,6 +78,9 @@ class HTTPHoneypot:
         )
 
         try:
+            if self.rules.path:
+                self.rules.load()
+
             self.app = web.Application(
                 middlewares=[self._request_logger_middleware]
             )
@@ -133,6 +92,7 @@ class HTTPHoneypot:
             self.site = web.TCPSite(self.runner, self.host, self.port)
             await self.site.start()
 
+            self._rules_task = asyncio.create_task(self.rules.run())
             self._running = True
             logger.info(
                 "http_honeypot_started",
@@ -157,6 +117,17 @@ class HTTPHoneypot:
 
         if self.runner:
             await self.runner.cleanup()
+        self.detector.close()
+        if self._rules_task:
+            self._rules_task.cancel()
+            await asyncio.gather(self._rules_task, return_exceptions=True)
+            self._rules_task = None
+
+        # Let background recordings reach the event sink
+        if self._pending_records:
+            await asyncio.gather(
+                *self._pending_records, return_exceptions=True
+            )
 
         self._running = False
         logger.info("http_honeypot_stopped")
@@ -213,26 +184,83 @@ class HTTPHoneypot:
             threat_type=threat_type,
         )
 
-        # Record to database
-        await self._record_attack(
-            client_ip=client_ip,
-            request=request,
-            body=body,
-            threat_type=threat_type,
-        )
+        if not self.config.background_recording:
+            await self._record_attack(
+                client_ip=client_ip,
+                request=request,
+                body=body,
+                threat_type=threat_type,
+            )
 
         try:
             response = await handler(request)
-            return response
         except web.HTTPException:
+            await self._record_in_background(
+                client_ip, request, body, threat_type
+            )
             raise
         except Exception as e:
             logger.error("http_handler_error", error=str(e))
-            return web.Response(
+            response = web.Response(
                 text="Internal Server Error",
                 status=500,
             )
 
+        await self._record_in_background(
+            client_ip, request, body, threat_type
+        )
+        return response
+
+    async def _record_in_background(
+        self,
+        client_ip: str,
+        request: web.Request,
+        body: Optional[str],
+        threat_type: str,
+    ) -> None:
+        """
+        Record an attack in the background without delaying the response.
+
+        At most ``max_pending_records`` recordings run concurrently. Past
+        that limit the event is recorded inline instead, so events are
+        never dropped and pending work stays bounded.
+        """
+        if not self.config.background_recording:
+            return
+
+        if len(self._pending_records) >= self.config.max_pending_records:
+            self.record_limit_hits += 1
+            HTTP_RECORD_LIMIT_HITS.inc()
+            logger.warning(
+                "http_record_pending_limit_reached",
+                pending=len(self._pending_records),
+                limit=self.config.max_pending_records,
+            )
+            await self._record_attack(
+                client_ip=client_ip,
+                request=request,
+                body=body,
+                threat_type=threat_type,
+            )
+            return
+
+        task = asyncio.create_task(
+            self._record_attack(
+                client_ip=client_ip,
+                request=request,
+                body=body,
+                threat_type=threat_type,
+            )
+        )
+        self._pending_records.add(task)
+        task.add_done_callback(self._record_done)
+        HTTP_PENDING_RECORDS.set(len(self._pending_records))
+
+    def _record_done(self, task: asyncio.Task) -> None:
+        """Forget a finished background recording."""
+        self._pending_records.discard(task)
+        HTTP_PENDING_RECORDS.set(len(self._pending_records))
+
     def _get_client_ip(self, request: web.Request) -> str:
         """Extract the client IP from the request."""
         # Check for proxy headers
@@ -256,36 +284,13 @@ class HTTPHoneypot:
         self, request: web.Request, body: Optional[str]
     ) -> str:
         """Detect the type of attack based on request patterns."""
-        path = request.path.lower()
-        query = str(request.query_string).lower()
-        combined = f"{path}?{query}"
-
-        if body:
-            combined += f" {body.lower()}"
-
-        # Check for attack patterns
-        for threat_type, patterns in ATTACK_PATTERNS.items():
-            for pattern in patterns:
-                if re.search(pattern, combined, re.IGNORECASE):
-                    return threat_type
-
-        # Check for suspicious path probing
-        for suspicious_path in SUSPICIOUS_PATHS:
-            if path.startswith(suspicious_path.lower()):
-                return "reconnaissance"
-
-        # Check for common scanners
-        user_agent = request.headers.get("User-Agent", "").lower()
-        scanner_signatures = [
-            "nikto", "sqlmap", "nmap", "masscan", "zgrab",
-            "gobuster", "dirbuster", "wfuzz", "burp", "acunetix",
-            "nessus", "qualys", "openvas", "w3af", "skipfish",
-        ]
-        for scanner in scanner_signatures:
-            if scanner in user_agent:
-                return "scanner"
-
-        return "probe"
+        return await self.detector.classify(
+            request.path,
+            str(request.query_string),
+            body,
+            request.headers.get("User-Agent", ""),
+            request.method,
+        )
 
     async def _record_attack(
         self,
@@ -294,66 +299,64 @@ class HTTPHoneypot:
         body: Optional[str],
         threat_type: str,
     ) -> None:
-        """Record the attack attempt in the database."""
+        """Queue the attack attempt for recording."""
         try:
-            async with AsyncSessionLocal() as session:
-                attack = Attack(
-                    ip=client_ip,
-                    service="http",
-                    threat_type=threat_type,
-                    payload={
-                        "method": request.method,
-                        "path": request.path,
-                        "query": str(request.query_string),
-                        "headers": dict(request.headers),
-                        "body": body[:1000] if body else None,
-                        "user_agent": request.headers.get("User-Agent", ""),
-                    },
-                )
-                session.add(attack)
-                await session.commit()
-
-                logger.debug(
-                    "http_attack_recorded",
-                    attack_id=str(attack.id),
-                    client_ip=client_ip,
-                    threat_type=threat_type,
-                )
+            attack_id = uuid.uuid4()
+            await event_sink.put(Attack, {
+                "id": attack_id,
+                "ip": client_ip,
+                "timestamp": datetime.now(timezone.utc),
+                "service": "http",
+                "threat_type": threat_type,
+                "payload": {
+                    "method": request.method,
+                    "path": request.path,
+                    "query": str(request.query_string),
+                    "headers": dict(request.headers),
+                    "body": body[:1000] if body else None,
+                    "user_agent": request.headers.get("User-Agent", ""),
+                },
+            })
+
+            logger.debug(
+                "http_attack_recorded",
+                attack_id=str(attack_id),
+                client_ip=client_ip,
+                threat_type=threat_type,
+            )
         except Exception as e:
             logger.error("http_attack_record_failed", error=str(e))
 
     async def _record_credential(
         self, client_ip: str, username: str, password: str
     ) -> None:
-        """Record captured credentials."""
+        """Queue captured credentials for recording."""
         try:
-            async with AsyncSessionLocal() as session:
-                attack = Attack(
-                    ip=client_ip,
-                    service="http",
-                    threat_type="credential_attack",
-                    payload={
-                        "type": "login_attempt",
-                        "username": username,
-                    },
-                )
-                session.add(attack)
-                await session.flush()
-
-                credential = Credential(
-                    attack_id=attack.id,
-                    username=username,
-                    password=password,
-                    success=False,
-                )
-                session.add(credential)
-                await session.commit()
-
-                logger.warning(
-                    "http_credential_captured",
-                    client_ip=client_ip,
-                    username=username,
-                )
+            attack_id = uuid.uuid4()
+            await event_sink.put(Attack, {
+                "id": attack_id,
+                "ip": client_ip,
+                "timestamp": datetime.now(timezone.utc),
+                "service": "http",
+                "threat_type": "credential_attack",
+                "payload": {
+                    "type": "login_attempt",
+                    "username": username,
+                },
+            })
+            await event_sink.put(Credential, {
+                "id": uuid.uuid4(),
+                "attack_id": attack_id,
+                "username": username,
+                "password": password,
+                "success": False,
+            })
+
+            logger.warning(
+                "http_credential_captured",
+                client_ip=client_ip,
+                username=username,
+            )
         except Exception as e:
             logger.error("http_credential_record_failed", error=str(e))
 
@@ -686,4 +689,6 @@ define('AUTH_KEY', 'fake_auth_key_here');
             "host": self.host,
             "port": self.port,
             "fake_cms": self.fake_cms,
+            "pending_records": len(self._pending_records),
+            "record_limit_hits": self.record_limit_hits,
         }
@@ -8,18 +8,26 @@ a minimal shell environment for attacker interaction logging.
 import asyncio
 import uuid
 from datetime import datetime, timezone
-from typing import Optional, List, Any
+from typing import Any, Coroutine, Dict, List, Optional, Set
 
 import asyncssh
 import structlog
 
 from tenebrinet.core.config import SSHServiceConfig
-from tenebrinet.core.database import AsyncSessionLocal
-from tenebrinet.core.models import Attack, Credential, Session
+from tenebrinet.core.models import (
+    Attack,
+    Credential,
+    Session,
+    SessionCommand,
+)
+from tenebrinet.core.sink import event_sink
 
 
 logger = structlog.get_logger()
 
+# Number of buffered commands that triggers a flush to the event sink
+COMMAND_FLUSH_SIZE = 16
+
 
 class SSHHoneypotServer(asyncssh.SSHServer):
     """
@@ -89,39 +97,35 @@ class SSHHoneypotServer(asyncssh.SSHServer):
         return True
 
     async def _record_attack(self, username: str, password: str) -> None:
-        """Record the attack attempt in the database."""
+        """Queue the attack attempt for recording."""
         try:
-            async with AsyncSessionLocal() as session:
-                # Create the attack record
-                attack = Attack(
-                    ip=self.client_ip or "unknown",
-                    service="ssh",
-                    threat_type="credential_attack",
-                    payload={
-                        "username": username,
-                        "password_length": len(password),
-                    },
-                )
-                session.add(attack)
-                await session.flush()
-
-                self.attack_id = attack.id  # type: ignore
-
-                # Create the credential record
-                credential = Credential(
-                    attack_id=attack.id,  # type: ignore
-                    username=username,
-                    password=password,
-                    success=True,  # We let them "succeed"
-                )
-                session.add(credential)
-
-                await session.commit()
-                logger.info(
-                    "ssh_attack_recorded",
-                    attack_id=str(attack.id),
-                    client_ip=self.client_ip,
-                )
+            attack_id = uuid.uuid4()
+            await event_sink.put(Attack, {
+                "id": attack_id,
+                "ip": self.client_ip or "unknown",
+                "timestamp": datetime.now(timezone.utc),
+                "service": "ssh",
+                "threat_type": "credential_attack",
+                "payload": {
+                    "username": username,
+                    "password_length": len(password),
+                },
+            })
+            self.attack_id = attack_id
+
+            await event_sink.put(Credential, {
+                "id": uuid.uuid4(),
+                "attack_id": attack_id,
+                "username": username,
+                "password": password,
+                "success": True,  # We let them "succeed"
+            })
+
+            logger.info(
+                "ssh_attack_recorded",
+                attack_id=str(attack_id),
+                client_ip=self.client_ip,
+            )
         except Exception as e:
             logger.error(
                 "ssh_attack_record_failed",
@@ -140,11 +144,19 @@ class SSHHoneypotSession(asyncssh.SSHServerSession):
         self.commands: list = []
         self.session_id: Optional[uuid.UUID] = None
         self._chan: Optional[asyncssh.SSHServerChannel] = None
+        self._command_buffer: List[Dict[str, Any]] = []
+        self._command_seq = 0
+        self._closed = False
 
     def connection_made(self, chan: asyncssh.SSHServerChannel) -> None:
         """Called when the session channel is opened."""
         self._chan = chan
 
+    def connection_lost(self, exc: Optional[Exception]) -> None:
+        """Called when the channel closes, including abrupt disconnects."""
+        if not self._closed:
+            self.server.honeypot.close_in_background(self._close_session())
+
     def shell_requested(self) -> bool:
         """Handle shell request."""
         logger.info(
@@ -296,43 +308,54 @@ class SSHHoneypotSession(asyncssh.SSHServerSession):
         return ""
 
     async def _create_session_record(self) -> None:
-        """Create a session record in the database."""
+        """Queue a session record for the current attack."""
         if not self.server.attack_id:
             return
 
         try:
-            async with AsyncSessionLocal() as db_session:
-                session = Session(
-                    attack_id=self.server.attack_id,  # type: ignore
-                    commands=[],
-                )
-                db_session.add(session)
-                await db_session.commit()
-                self.session_id = session.id  # type: ignore
-                logger.info(
-                    "ssh_session_created",
-                    session_id=str(session.id),
-                    attack_id=str(self.server.attack_id),
-                )
+            session_id = uuid.uuid4()
+            await event_sink.put(Session, {
+                "id": session_id,
+                "attack_id": self.server.attack_id,
+                "start_time": datetime.now(timezone.utc),
+                "commands": [],
+            })
+            self.session_id = session_id
+            logger.info(
+                "ssh_session_created",
+                session_id=str(session_id),
+                attack_id=str(self.server.attack_id),
+            )
         except Exception as e:
             logger.error("ssh_session_create_failed", error=str(e))
 
     async def _record_command(self, command: str) -> None:
-        """Record a command in the session."""
+        """
+        Buffer a command, flushing once enough have accumulated.
+
+        Commands that finish after the session was closed are written
+        directly: the final flush has already run.
+        """
         if not self.session_id:
             return
 
+        self._command_seq += 1
+        self._command_buffer.append({
+            "id": uuid.uuid4(),
+            "session_id": self.session_id,
+            "seq": self._command_seq,
+            "timestamp": datetime.now(timezone.utc),
+            "command": command,
+        })
+        if self._closed or len(self._command_buffer) >= COMMAND_FLUSH_SIZE:
+            await self._flush_commands()
+
+    async def _flush_commands(self) -> None:
+        """Append buffered commands to the session command log."""
+        buffered, self._command_buffer = self._command_buffer, []
         try:
-            async with AsyncSessionLocal() as db_session:
-                result = await db_session.get(Session, self.session_id)
-                if result:
-                    commands: List[Any] = result.commands or []  # type: ignore
-                    commands.append({
-                        "cmd": command,
-                        "timestamp": datetime.now(timezone.utc).isoformat(),
-                    })
-                    result.commands = commands  # type: ignore
-                    await db_session.commit()
+            for row in buffered:
+                await event_sink.put(SessionCommand, row)
         except Exception as e:
             logger.error("ssh_command_record_failed", error=str(e))
 
@@ -345,7 +368,7 @@ class SSHHoneypotSession(asyncssh.SSHServerSession):
         )
 
         # Update session end time
-        asyncio.create_task(self._close_session())
+        self.server.honeypot.close_in_background(self._close_session())
 
         if self._chan:
             self._chan.write("\r\nlogout\r\n")
@@ -353,16 +376,20 @@ class SSHHoneypotSession(asyncssh.SSHServerSession):
         return True
 
     async def _close_session(self) -> None:
-        """Close the session and record end time."""
+        """Flush pending commands and record the session end time."""
+        if self._closed:
+            return
+        self._closed = True
+
         if not self.session_id:
             return
 
+        await self._flush_commands()
         try:
-            async with AsyncSessionLocal() as db_session:
-                result = await db_session.get(Session, self.session_id)
-                if result:
-                    result.end_time = datetime.now(timezone.utc)  # type: ignore  # noqa: E501
-                    await db_session.commit()
+            await event_sink.put_update(Session, {
+                "id": self.session_id,
+                "end_time": datetime.now(timezone.utc),
+            })
         except Exception as e:
             logger.error("ssh_session_close_failed", error=str(e))
 
@@ -381,6 +408,8 @@ class SSHHoneypot:
         self.banner = config.banner
         self.server: Optional[asyncssh.SSHAcceptor] = None
         self._running = False
+        # Session closes still flushing to the event sink
+        self._pending_closes: Set[asyncio.Task] = set()
 
     async def start(self) -> None:
         """Start the SSH honeypot server."""
@@ -421,6 +450,17 @@ class SSHHoneypot:
             )
             raise
 
+    def close_in_background(self, close: Coroutine[Any, Any, None]) -> None:
+        """
+        Run a session close without blocking the connection callback.
+
+        The task is kept until it finishes, so ``stop`` can wait for the
+        final command flush and end time of every closed session.
+        """
+        task = asyncio.create_task(close)
+        self._pending_closes.add(task)
+        task.add_done_callback(self._pending_closes.discard)
+
     def _create_session(self, stdin, stdout, stderr):
         """Create a session handler - not used with session_factory."""
         pass
@@ -437,6 +477,11 @@ class SSHHoneypot:
             self.server.close()
             await self.server.wait_closed()
 
+        if self._pending_closes:
+            await asyncio.gather(
+                *self._pending_closes, return_exceptions=True
+            )
+
         self._running = False
         logger.info("ssh_honeypot_stopped")
 
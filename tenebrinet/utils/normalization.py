@@ -0,0 +1,103 @@
+# tenebrinet/utils/normalization.py
+"""
+Canonicalization of HTTP request inputs.
+
+Attackers encode payloads to slip past signatures: ``%252e%252e%252f``
+(double URL encoding), ``%u003c`` or ``\\u003c`` (unicode escapes),
+``&lt;script&gt;`` (HTML entities), full-width characters and mixed case.
+``canonicalize`` undoes these encodings so one lowercase signature covers
+every variant:
+
+1. unicode escapes, percent-encoding and HTML entities are decoded
+   repeatedly, up to ``MAX_DECODE_DEPTH`` rounds or until nothing changes;
+2. compatibility characters are folded (NFKC);
+3. runs of whitespace become a single space;
+4. the result is lowercased.
+
+Scanners replay identical URLs constantly, so results for inputs of up to
+``MEMO_MAX_CHARS`` characters are memoized in an LRU keyed by the raw
+input. Attackers choose the inputs, so the memo is bounded by size as
+well as count: ``MEMO_ENTRIES`` keys and results of at most
+``MEMO_MAX_CHARS`` characters each hold about 3 MiB of ASCII text, or
+9 MiB if every character takes four bytes. Longer inputs (bodies,
+padded payloads) are canonicalized on every call.
+"""
+import html
+import re
+import unicodedata
+from functools import lru_cache
+from urllib.parse import unquote, unquote_plus
+
+
+# Decoding rounds; each undoes one layer of encoding
+MAX_DECODE_DEPTH = 4
+
+# Memoized results, and the largest input memoized; together they bound
+# the memo's size (see above)
+MEMO_ENTRIES = 4096
+MEMO_MAX_CHARS = 256
+
+_UNICODE_ESCAPE = re.compile(
+    r"%u([0-9a-fA-F]{4})|\\u([0-9a-fA-F]{4})|\\x([0-9a-fA-F]{2})"
+)
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _unescape_unicode(match: re.Match) -> str:
+    return chr(int(next(group for group in match.groups() if group), 16))
+
+
+def decode_once(text: str, plus_as_space: bool = False) -> str:
+    """
+    Remove one layer of encoding.
+
+    Args:
+        text: Input to decode.
+        plus_as_space: Decode ``+`` as a space, as in query strings and
+            form bodies.
+
+    Returns:
+        The text with unicode escapes, percent-encoding and HTML entities
+        decoded once.
+    """
+    if "%u" in text or "\\" in text:
+        text = _UNICODE_ESCAPE.sub(_unescape_unicode, text)
+    text = unquote_plus(text) if plus_as_space else unquote(text)
+    if "&" in text:
+        text = html.unescape(text)
+    return text
+
+
+def _canonicalize(text: str, plus_as_space: bool) -> str:
+    for _ in range(MAX_DECODE_DEPTH):
+        decoded = decode_once(text, plus_as_space)
+        if decoded == text:
+            break
+        text = decoded
+    text = unicodedata.normalize("NFKC", text)
+    return _WHITESPACE.sub(" ", text).lower()
+
+
+_memoized = lru_cache(maxsize=MEMO_ENTRIES)(_canonicalize)
+
+
+def canonicalize(text: str, plus_as_space: bool = False) -> str:
+    """
+    Return the canonical form of a request input.
+
+    Args:
+        text: Raw path, query string, body or header value.
+        plus_as_space: Decode ``+`` as a space, as in query strings and
+            form bodies.
+
+    Returns:
+        The decoded, whitespace-folded, lowercased text.
+    """
+    if len(text) > MEMO_MAX_CHARS:
+        return _canonicalize(text, plus_as_space)
+    return _memoized(text, plus_as_space)
+
+
+def memo_info():
+    """Return the hit and miss statistics of the memo."""
+    return _memoized.cache_info()
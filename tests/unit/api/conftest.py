@@ -0,0 +1,49 @@
+# tests/unit/api/conftest.py
+"""
+Shared fixtures for API tests.
+"""
+import pytest
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import (
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+
+from tenebrinet.api.main import app
+from tenebrinet.core.database import (
+    Base,
+    get_db_session,
+    get_read_db_session,
+)
+
+
+@pytest.fixture
+async def session_factory(tmp_path):
+    """Provide a session factory bound to a throwaway SQLite database."""
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'api.db'}"
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(
+        bind=engine, class_=AsyncSession, expire_on_commit=False
+    )
+    await engine.dispose()
+
+
+@pytest.fixture
+async def api_client(session_factory):
+    """Provide an API client whose routes use ``session_factory``."""
+
+    async def override():
+        async with session_factory() as session:
+            yield session
+
+    app.dependency_overrides[get_db_session] = override
+    app.dependency_overrides[get_read_db_session] = override
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        yield client
+    app.dependency_overrides.clear()
@@ -0,0 +1,63 @@
+# tests/unit/api/test_archive.py
+"""
+Unit tests for the archive API endpoints.
+"""
+import uuid
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+import pytest
+
+from tenebrinet.core.archive import AttackArchive
+from tenebrinet.core.database import bulk_insert
+from tenebrinet.core.models import Attack
+
+
+pytest.importorskip("pyarrow")
+
+
+@pytest.fixture
+async def archived(tmp_path, session_factory):
+    """Archive three attacks and serve them through the global archive."""
+    async with session_factory() as session:
+        await bulk_insert(session, Attack, [
+            {
+                "id": uuid.uuid4(),
+                "timestamp": datetime(2025, 1, 1, i, tzinfo=timezone.utc),
+                "ip": "10.0.0.1",
+                "service": service,
+                "payload": {"n": i},
+            }
+            for i, service in enumerate(("ssh", "ssh", "ftp"))
+        ])
+        await session.commit()
+    archive = AttackArchive(
+        directory=str(tmp_path / "archive"), session_factory=session_factory
+    )
+    await archive.archive()
+    with patch("tenebrinet.api.routes.archive.attack_archive", archive):
+        yield
+
+
+async def test_list_archived_attacks(archived, api_client):
+    """Archived attacks are listed with the usual attack fields."""
+    response = await api_client.get(
+        "/api/v1/archive/attacks", params={"service": "ssh"}
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["count"] == 2
+    assert {item["payload"]["n"] for item in data["items"]} == {0, 1}
+
+
+async def test_archive_stats(archived, api_client):
+    """Stats count archived attacks by the requested field."""
+    response = await api_client.get(
+        "/api/v1/archive/stats", params={"group_by": "service"}
+    )
+    assert response.status_code == 200
+    assert response.json() == {
+        "group_by": "service",
+        "total": 3,
+        "counts": {"ssh": 2, "ftp": 1},
+    }
@@ -0,0 +1,37 @@
+# tests/unit/api/test_credentials.py
+"""
+Unit tests for the credential API endpoints.
+"""
+from datetime import datetime, timezone
+
+from tenebrinet.core.credentials import pair_id
+from tenebrinet.core.models import CredentialPair
+
+
+async def test_top_credentials(session_factory, api_client):
+    """Pairs are listed by attempts, most attempted first."""
+    seen = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    async with session_factory() as session:
+        session.add_all([
+            CredentialPair(
+                id=pair_id(username, "123456"),
+                username=username,
+                password="123456",
+                attempts=attempts,
+                successes=0,
+                first_seen=seen,
+                last_seen=seen,
+            )
+            for username, attempts in [("root", 50), ("pi", 3), ("admin", 9)]
+        ])
+        await session.commit()
+
+    response = await api_client.get(
+        "/api/v1/credentials/top", params={"limit": 2}
+    )
+
+    assert response.status_code == 200
+    items = response.json()["items"]
+    assert [(i["username"], i["attempts"]) for i in items] == [
+        ("root", 50), ("admin", 9),
+    ]
@@ -0,0 +1,120 @@
+# tests/unit/api/test_export.py
+"""
+Unit tests for the streaming attack export.
+"""
+import csv
+import io
+import json
+import uuid
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+import pytest
+
+from tenebrinet.api.export import (
+    EXPORT_COLUMNS,
+    export_query,
+    parquet_available,
+    stream_batches,
+)
+from tenebrinet.core.models import Attack
+from tenebrinet.core.sink import EventSink
+
+
+@pytest.fixture
+async def attacks(session_factory):
+    """Write five attacks and route export sessions to the test database."""
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    sink = EventSink(session_factory=session_factory)
+    for i in range(5):
+        await sink.put(Attack, {
+            "id": uuid.uuid4(),
+            "ip": f"10.0.0.{i}",
+            "service": "ssh" if i % 2 == 0 else "http",
+            "timestamp": start + timedelta(minutes=i),
+            "payload": {"n": i},
+        })
+    with patch("tenebrinet.core.database.AsyncSessionLocal", session_factory):
+        yield
+
+
+async def test_stream_batches_respects_batch_size(attacks):
+    """Rows arrive in cursor-sized batches."""
+    sizes = [
+        len(rows) async for rows in stream_batches(export_query(), 2)
+    ]
+    assert sizes == [2, 2, 1]
+
+
+async def test_export_ndjson_with_filters(attacks, api_client):
+    """NDJSON export applies the listing filters, oldest first."""
+    response = await api_client.get(
+        "/api/v1/attacks/export", params={"service": "ssh"}
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["ip"] for row in rows] == ["10.0.0.0", "10.0.0.2", "10.0.0.4"]
+    assert rows[0]["payload"] == {"n": 0}
+    assert set(rows[0]) == set(EXPORT_COLUMNS)
+
+
+async def test_export_csv(attacks, api_client):
+    """CSV export has a header row and JSON-encoded payloads."""
+    response = await api_client.get(
+        "/api/v1/attacks/export", params={"format": "csv"}
+    )
+    assert response.status_code == 200
+
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert len(rows) == 5
+    assert json.loads(rows[4]["payload"]) == {"n": 4}
+    assert rows[0]["threat_type"] == ""
+
+
+async def test_export_parquet_without_pyarrow(attacks, api_client):
+    """Parquet export reports the missing optional dependency."""
+    if parquet_available():
+        pytest.skip("pyarrow is installed")
+    response = await api_client.get(
+        "/api/v1/attacks/export", params={"format": "parquet"}
+    )
+    assert response.status_code == 501
+
+
+async def test_export_parquet(attacks, api_client):
+    """Parquet export round-trips through pyarrow."""
+    pq = pytest.importorskip("pyarrow.parquet")
+    response = await api_client.get(
+        "/api/v1/attacks/export", params={"format": "parquet"}
+    )
+    assert response.status_code == 200
+
+    table = pq.read_table(io.BytesIO(response.content))
+    assert table.num_rows == 5
+    assert table.column_names == list(EXPORT_COLUMNS)
+
+
+async def test_export_and_get_rehydrate_payload_blobs(
+    session_factory, api_client
+):
+    """Payload parts stored as blobs come back inline."""
+    headers = {f"X-Header-{i}": "x" * 40 for i in range(10)}
+    attack_id = uuid.uuid4()
+    sink = EventSink(session_factory=session_factory)
+    await sink.put(Attack, {
+        "id": attack_id,
+        "ip": "10.0.0.9",
+        "service": "http",
+        "timestamp": datetime(2026, 1, 1, tzinfo=timezone.utc),
+        "payload": {"method": "GET", "headers": headers},
+    })
+
+    response = await api_client.get(f"/api/v1/attacks/{attack_id}")
+    assert response.json()["payload"] == {"method": "GET", "headers": headers}
+
+    with patch("tenebrinet.core.database.AsyncSessionLocal", session_factory):
+        response = await api_client.get("/api/v1/attacks/export")
+    row = json.loads(response.text)
+    assert row["payload"]["headers"] == headers
@@ -0,0 +1,117 @@
+# tests/unit/api/test_pagination.py
+"""
+Unit tests for keyset pagination of the attacks listing.
+"""
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from tenebrinet.api.pagination import decode_cursor, encode_cursor
+from tenebrinet.core.models import Attack
+
+
+@pytest.fixture
+async def client(session_factory, api_client):
+    """Provide an API client backed by a seeded SQLite database."""
+    base = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    async with session_factory() as session:
+        for i in range(25):
+            session.add(Attack(
+                id=uuid.uuid4(),
+                ip=f"10.0.0.{i}",
+                # Pairs of attacks share a timestamp to exercise the tiebreak
+                timestamp=base + timedelta(minutes=i // 2),
+                service="ssh" if i % 2 else "http",
+            ))
+        await session.commit()
+    return api_client
+
+
+class TestCursor:
+    """Tests for cursor encoding."""
+
+    def test_round_trip(self):
+        """A cursor decodes to the key it was built from."""
+        ts = datetime(2026, 1, 1, 12, 30, 15, 123456, tzinfo=timezone.utc)
+        row_id = uuid.uuid4()
+        assert decode_cursor(encode_cursor(ts, row_id)) == (ts, row_id)
+
+    def test_invalid_cursor(self):
+        """Garbage cursors raise ValueError."""
+        with pytest.raises(ValueError):
+            decode_cursor("not-a-cursor")
+
+
+class TestListAttacksPagination:
+    """Tests for page and cursor modes of GET /api/v1/attacks."""
+
+    async def test_page_mode_unchanged(self, client):
+        """Page mode keeps returning totals and page counts."""
+        response = await client.get("/api/v1/attacks?page=2&per_page=10")
+        body = response.json()
+        assert response.status_code == 200
+        assert body["total"] == 25
+        assert body["page"] == 2
+        assert body["pages"] == 3
+        assert len(body["items"]) == 10
+        assert body["next_cursor"] is not None
+
+    async def test_cursor_walks_all_rows_once(self, client):
+        """Following next_cursor visits every attack exactly once."""
+        seen = []
+        response = await client.get("/api/v1/attacks?per_page=10")
+        body = response.json()
+        seen.extend(item["id"] for item in body["items"])
+        while body["next_cursor"]:
+            response = await client.get(
+                "/api/v1/attacks",
+                params={"per_page": 10, "cursor": body["next_cursor"]},
+            )
+            body = response.json()
+            assert body["total"] is None
+            assert body["count_type"] == "none"
+            assert body["page"] is None
+            seen.extend(item["id"] for item in body["items"])
+
+        assert len(seen) == 25
+        assert len(set(seen)) == 25
+
+    async def test_cursor_with_filter_and_total(self, client):
+        """Filters apply to cursor pages and totals can be requested."""
+        first = (
+            await client.get("/api/v1/attacks?per_page=5&service=ssh")
+        ).json()
+        response = await client.get(
+            "/api/v1/attacks",
+            params={
+                "per_page": 5,
+                "service": "ssh",
+                "cursor": first["next_cursor"],
+                "count": "exact",
+            },
+        )
+        body = response.json()
+        assert body["total"] == 12
+        assert body["count_type"] == "exact"
+        assert len(body["items"]) == 5
+        assert all(item["service"] == "ssh" for item in body["items"])
+
+    async def test_invalid_cursor_rejected(self, client):
+        """A malformed cursor is a client error."""
+        response = await client.get("/api/v1/attacks?cursor=bogus")
+        assert response.status_code == 400
+
+    async def test_count_none_skips_total(self, client):
+        """count=none returns no total, as the dashboard poll uses."""
+        body = (await client.get("/api/v1/attacks?count=none")).json()
+        assert body["total"] is None
+        assert body["pages"] is None
+        assert body["count_type"] == "none"
+        assert len(body["items"]) == 20
+
+    async def test_count_estimate_falls_back_to_exact(self, client):
+        """Backends without planner estimates return an exact count."""
+        body = (await client.get("/api/v1/attacks?count=estimate")).json()
+        assert body["total"] == 25
+        assert body["count_type"] == "exact"
@@ -0,0 +1,120 @@
+# tests/unit/api/test_stats.py
+"""
+Unit tests for the attack statistics endpoint.
+"""
+import uuid
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, patch
+
+from sqlalchemy import delete
+
+from tenebrinet.core.aggregates import StreamingAggregates
+from tenebrinet.core.models import Attack, AttackRollup
+from tenebrinet.core.sink import EventSink
+
+
+async def _write(session_factory, rows) -> None:
+    """Write attacks through the sink and checkpoint their aggregates."""
+    sink = EventSink(session_factory=session_factory)
+    aggregates = StreamingAggregates(
+        node_id="test", session_factory=session_factory
+    )
+    with patch("tenebrinet.core.sink.attack_aggregates", aggregates):
+        for ip, service, threat_type, country, timestamp in rows:
+            await sink.put(Attack, {
+                "id": uuid.uuid4(),
+                "ip": ip,
+                "service": service,
+                "threat_type": threat_type,
+                "country": country,
+                "timestamp": timestamp,
+            })
+    await aggregates.checkpoint()
+
+
+async def _stats(session_factory, api_client) -> dict:
+    cache = "tenebrinet.core.cache.cache"
+    with patch(f"{cache}.get", AsyncMock(return_value=None)), \
+         patch(f"{cache}.set", AsyncMock()), \
+         patch("tenebrinet.core.database.AsyncSessionLocal", session_factory):
+        response = await api_client.get("/api/v1/attacks/stats")
+    return response.json()
+
+
+async def test_stats_from_rollups(session_factory, api_client):
+    """Stats reflect attacks written through the event sink."""
+    now = datetime.now(timezone.utc)
+    await _write(session_factory, [
+        ("10.0.0.1", "ssh", "credential_attack", "US", now),
+        ("10.0.0.1", "ssh", "credential_attack", "US", now),
+        ("10.0.0.2", "http", "sql_injection", "CN", now),
+        ("10.0.0.3", "ftp", None, None, now - timedelta(days=2)),
+    ])
+
+    stats = await _stats(session_factory, api_client)
+    assert stats["total_attacks"] == 4
+    assert stats["attacks_today"] == 3
+    assert stats["unique_ips"] == 3
+    assert stats["attacks_by_service"] == {"ssh": 2, "http": 1, "ftp": 1}
+    assert stats["attacks_by_threat_type"] == {
+        "credential_attack": 2, "sql_injection": 1
+    }
+    assert stats["top_countries"][0] == {"country": "US", "count": 2}
+
+
+async def test_stats_cover_retained_rollups(session_factory, api_client):
+    """Unique IPs count only the days whose rollups are retained."""
+    now = datetime.now(timezone.utc)
+    expired = now - timedelta(days=40)
+    await _write(session_factory, [
+        ("10.0.0.1", "ssh", None, None, now),
+        ("10.0.0.2", "ssh", None, None, now - timedelta(days=2)),
+        ("10.0.0.3", "ssh", None, None, expired),
+    ])
+    async with session_factory() as session:
+        # As retention does when it drops the expired partition
+        await session.execute(
+            delete(AttackRollup).where(
+                AttackRollup.bucket < now - timedelta(days=30)
+            )
+        )
+        await session.commit()
+
+    stats = await _stats(session_factory, api_client)
+    assert stats["total_attacks"] == 2
+    assert stats["unique_ips"] == 2
+
+
+async def test_daily_stats_merge_sketches(session_factory, api_client):
+    """Daily stats count distinct IPs per day and once over the range."""
+    aggregates = StreamingAggregates(
+        node_id="test", session_factory=session_factory
+    )
+    day = datetime(2026, 1, 1, 12, tzinfo=timezone.utc)
+    aggregates.observe([
+        {"ip": "10.0.0.1", "service": "ssh", "timestamp": day},
+        {"ip": "10.0.0.2", "service": "http", "timestamp": day},
+        {"ip": "10.0.0.1", "service": "ssh",
+         "timestamp": day + timedelta(days=1)},
+    ])
+    await aggregates.checkpoint()
+
+    response = await api_client.get(
+        "/api/v1/attacks/daily",
+        params={"start_date": "2026-01-01", "end_date": "2026-01-03"},
+    )
+    body = response.json()
+    assert response.status_code == 200
+    assert [item["attacks"] for item in body["items"]] == [2, 1, 0]
+    assert [item["unique_ips"] for item in body["items"]] == [2, 1, 0]
+    assert body["items"][0]["attacks_by_service"] == {"ssh": 1, "http": 1}
+    assert body["unique_ips"] == 2
+
+
+async def test_daily_stats_rejects_reversed_range(api_client):
+    """A start date after the end date is a client error."""
+    response = await api_client.get(
+        "/api/v1/attacks/daily",
+        params={"start_date": "2026-01-03", "end_date": "2026-01-01"},
+    )
+    assert response.status_code == 400
@@ -0,0 +1,154 @@
+# tests/unit/core/test_aggregates.py
+"""Unit tests for streaming attack aggregates."""
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy.ext.asyncio import (
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+
+from tenebrinet.core.aggregates import (
+    ALL_TIME,
+    StreamingAggregates,
+    day_periods,
+    load_aggregates,
+)
+from tenebrinet.core.database import Base
+
+
+@pytest.fixture
+async def session_factory(tmp_path):
+    """Provide a session factory bound to a throwaway SQLite database."""
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'aggregates.db'}"
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(
+        bind=engine, class_=AsyncSession, expire_on_commit=False
+    )
+    await engine.dispose()
+
+
+def _attack(ip: str, day: int, service: str = "ssh") -> dict:
+    return {
+        "ip": ip,
+        "service": service,
+        "timestamp": datetime(2026, 1, day, 12, tzinfo=timezone.utc),
+    }
+
+
+def test_observe_counts_per_day_and_all_time():
+    """Each attack counts towards its day and the all-time period."""
+    aggregates = StreamingAggregates(node_id="a")
+    aggregates.observe([
+        _attack("10.0.0.1", 1),
+        _attack("10.0.0.1", 1, "http"),
+        _attack("10.0.0.2", 2),
+    ])
+
+    pending = aggregates.pending
+    assert set(pending) == {"2026-01-01", "2026-01-02", ALL_TIME}
+    assert pending["2026-01-01"].total == 2
+    assert pending["2026-01-01"].by_service == {"ssh": 1, "http": 1}
+    assert pending["2026-01-01"].unique_ips == 1
+    assert pending[ALL_TIME].total == 3
+    assert pending[ALL_TIME].unique_ips == 2
+
+
+async def test_checkpoints_accumulate_and_merge_nodes(session_factory):
+    """Checkpoints add up per node and readers merge all nodes."""
+    first = StreamingAggregates(node_id="a", session_factory=session_factory)
+    second = StreamingAggregates(node_id="b", session_factory=session_factory)
+
+    first.observe([_attack("10.0.0.1", 1)])
+    await first.checkpoint()
+    first.observe([_attack("10.0.0.2", 1)])
+    await first.checkpoint()
+    second.observe([_attack("10.0.0.2", 1), _attack("10.0.0.3", 2)])
+    await second.checkpoint()
+    assert first.pending == {}
+
+    async with session_factory() as session:
+        merged = await load_aggregates(
+            session, ["2026-01-01", "2026-01-02", ALL_TIME]
+        )
+    assert merged["2026-01-01"].total == 3
+    assert merged["2026-01-01"].unique_ips == 2
+    assert merged[ALL_TIME].total == 4
+    assert merged[ALL_TIME].unique_ips == 3
+
+
+async def test_failed_checkpoint_keeps_increments():
+    """Increments survive a checkpoint that cannot reach the database."""
+
+    def unavailable():
+        raise ConnectionRefusedError("database is down")
+
+    aggregates = StreamingAggregates(
+        node_id="a", session_factory=unavailable
+    )
+    aggregates.observe([_attack("10.0.0.1", 1)])
+    await aggregates.checkpoint()
+    aggregates.observe([_attack("10.0.0.2", 1)])
+    assert aggregates.pending[ALL_TIME].total == 2
+
+
+async def test_cancelled_checkpoint_keeps_increments():
+    """Increments survive a checkpoint cancelled while writing."""
+    blocked = asyncio.Event()
+
+    class HangingSession:
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc_info):
+            return False
+
+        async def execute(self, statement):
+            blocked.set()
+            await asyncio.Event().wait()
+
+    aggregates = StreamingAggregates(
+        node_id="a", session_factory=HangingSession
+    )
+    aggregates.observe([_attack("10.0.0.1", 1)])
+    task = asyncio.create_task(aggregates.checkpoint())
+    await blocked.wait()
+    aggregates.observe([_attack("10.0.0.2", 1)])
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    assert aggregates.pending[ALL_TIME].total == 2
+
+
+async def test_stop_waits_for_running_checkpoint(session_factory):
+    """Stopping does not cancel the loop and writes a final checkpoint."""
+    aggregates = StreamingAggregates(
+        node_id="a",
+        checkpoint_interval=0.01,
+        session_factory=session_factory,
+    )
+    await aggregates.start()
+    aggregates.observe([_attack("10.0.0.1", 1)])
+    await aggregates.stop()
+    aggregates.observe([_attack("10.0.0.2", 1)])
+    await aggregates.stop()
+
+    assert aggregates.pending == {}
+    async with session_factory() as session:
+        merged = await load_aggregates(session, [ALL_TIME])
+    assert merged[ALL_TIME].total == 2
+
+
+def test_day_periods():
+    """Day ranges are inclusive."""
+    from datetime import date
+
+    assert day_periods(date(2026, 1, 30), date(2026, 2, 1)) == [
+        "2026-01-30", "2026-01-31", "2026-02-01"
+    ]
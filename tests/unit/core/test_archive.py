@@ -0,0 +1,228 @@
+# tests/unit/core/test_archive.py
+"""Unit tests for the Parquet attack archive."""
+import uuid
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import (
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+
+from tenebrinet.core.archive import AttackArchive
+from tenebrinet.core.blobs import BLOB_REFS_KEY
+from tenebrinet.core.credentials import pair_id
+from tenebrinet.core.database import Base, bulk_insert
+from tenebrinet.core.models import (
+    Attack,
+    Credential,
+    CredentialPair,
+    PayloadBlob,
+    Session,
+    SessionCommand,
+)
+
+
+pytest.importorskip("pyarrow")
+
+NOW = datetime(2026, 6, 1, 12, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+async def session_factory(tmp_path):
+    """Provide a session factory bound to a throwaway SQLite database."""
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'archive.db'}"
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(
+        bind=engine, class_=AsyncSession, expire_on_commit=False
+    )
+    await engine.dispose()
+
+
+@pytest.fixture
+async def archive(tmp_path, session_factory):
+    """Archive attacks older than 30 days, with 3 old days and 1 recent."""
+    rows = []
+    for days_ago in (40, 35, 35, 31, 2):
+        for i, service in enumerate(("ssh", "http")):
+            rows.append({
+                "id": uuid.uuid4(),
+                "timestamp": NOW - timedelta(days=days_ago, minutes=i),
+                "ip": f"10.0.0.{days_ago}",
+                "service": service,
+                "threat_type": "port_scan" if service == "http" else None,
+                "payload": {"days_ago": days_ago},
+            })
+    async with session_factory() as session:
+        await bulk_insert(session, Attack, rows)
+        await session.commit()
+    return AttackArchive(
+        directory=str(tmp_path / "archive"),
+        after_days=30,
+        batch_size=3,
+        session_factory=session_factory,
+    )
+
+
+async def _remaining(session_factory, model=Attack) -> int:
+    async with session_factory() as session:
+        return (
+            await session.execute(select(func.count()).select_from(model))
+        ).scalar()
+
+
+async def test_archive_moves_old_days_to_parquet(archive, session_factory):
+    """Each old day becomes one file and leaves the database."""
+    assert await archive.archive(now=NOW) == 8
+    assert await _remaining(session_factory) == 2
+
+    files = sorted(archive.directory.glob("date=*/*.parquet"))
+    assert [path.parent.name for path in files] == [
+        "date=2026-04-22", "date=2026-04-27", "date=2026-05-01",
+    ]
+    assert not list(archive.directory.glob("date=*/.tmp-*"))
+
+    # Nothing left to archive
+    assert await archive.archive(now=NOW) == 0
+
+
+async def test_archive_day_is_idempotent(
+    archive, session_factory, monkeypatch
+):
+    """Rerunning a day after a failed delete overwrites the same file."""
+    day = (NOW - timedelta(days=35)).date()
+
+    def failing_delete(*args):
+        raise RuntimeError("crashed")
+
+    with monkeypatch.context() as patched:
+        patched.setattr("tenebrinet.core.archive.delete", failing_delete)
+        with pytest.raises(RuntimeError):
+            await archive.archive_day(day)
+    first = list(archive.directory.glob("date=*/*.parquet"))
+    assert len(first) == 1
+    assert await _remaining(session_factory) == 10
+
+    assert await archive.archive_day(day) == 4
+    assert list(archive.directory.glob("date=*/*.parquet")) == first
+    assert len(archive.scan()) == 4
+
+
+async def test_archive_deletes_sessions_and_credentials(
+    archive, session_factory
+):
+    """Children of archived attacks go with them, others stay."""
+    async with session_factory() as session:
+        attacks = (await session.execute(select(Attack.id))).scalars()
+        pair = CredentialPair(
+            id=pair_id("root", "toor"),
+            username="root",
+            password="toor",
+            first_seen=NOW,
+            last_seen=NOW,
+        )
+        session.add(pair)
+        for attack_id in attacks:
+            ssh = Session(attack_id=attack_id)
+            session.add(ssh)
+            await session.flush()
+            session.add(SessionCommand(session_id=ssh.id, seq=0, command="id"))
+            session.add(Credential(attack_id=attack_id, pair_id=pair.id))
+        await session.commit()
+
+    await archive.archive(now=NOW)
+
+    for model in (Session, SessionCommand, Credential):
+        assert await _remaining(session_factory, model) == 2
+
+
+async def test_archive_sweeps_blobs_of_archived_attacks(
+    archive, session_factory
+):
+    """Blobs only archived attacks referenced are deleted."""
+    async with session_factory() as session:
+        for digest in ("a" * 64, "b" * 64):
+            session.add(PayloadBlob(digest=digest, content="{}", size=2))
+        attacks = (await session.execute(select(Attack))).scalars()
+        for attack in attacks:
+            old = attack.timestamp.date() < (NOW - timedelta(days=30)).date()
+            digest = "a" * 64 if old else "b" * 64
+            attack.payload = {BLOB_REFS_KEY: {"body": digest}}
+        await session.commit()
+
+    await archive.archive(now=NOW)
+
+    async with session_factory() as session:
+        stored = (await session.execute(select(PayloadBlob.digest))).all()
+    assert stored == [("b" * 64,)]
+
+
+async def test_archive_day_uses_snapshot_on_postgresql(
+    archive, session_factory
+):
+    """The snapshot isolation is requested before the transaction starts."""
+    requested = []
+
+    class PostgresSession(AsyncSession):
+        def get_bind(self, *args, **kwargs):
+            bind = MagicMock()
+            bind.dialect.name = "postgresql"
+            return bind
+
+        async def connection(self, **kwargs):
+            if "execution_options" in kwargs:
+                assert not self.in_transaction()
+                # SQLite has no REPEATABLE READ
+                requested.append(kwargs.pop("execution_options"))
+            return await super().connection(**kwargs)
+
+    archive._session_factory = async_sessionmaker(
+        bind=session_factory.kw["bind"], class_=PostgresSession
+    )
+
+    assert await archive.archive_day((NOW - timedelta(days=35)).date()) == 4
+    assert requested == [{"isolation_level": "REPEATABLE READ"}]
+
+
+async def test_scan_filters_and_decodes_payloads(archive):
+    """Scans apply date, service and IP filters."""
+    await archive.archive(now=NOW)
+
+    assert len(archive.scan()) == 8
+    rows = archive.scan(service="http", ip="10.0.0.35")
+    assert len(rows) == 2
+    assert rows[0]["payload"] == {"days_ago": 35}
+    assert rows[0]["timestamp"].tzinfo is not None
+
+    start = NOW - timedelta(days=36)
+    end = NOW - timedelta(days=32)
+    assert {row["ip"] for row in archive.scan(start=start, end=end)} == {
+        "10.0.0.35"
+    }
+    assert len(archive.scan(limit=3)) == 3
+
+
+async def test_aggregate_counts_by_field(archive):
+    """Aggregates count one column; missing values count under ""."""
+    await archive.archive(now=NOW)
+
+    assert archive.aggregate("service") == {"ssh": 4, "http": 4}
+    assert archive.aggregate("threat_type") == {"port_scan": 4, "": 4}
+    assert archive.aggregate("date", service="ssh") == {
+        "2026-04-22": 1, "2026-04-27": 2, "2026-05-01": 1,
+    }
+    with pytest.raises(ValueError):
+        archive.aggregate("payload")
+
+
+def test_empty_archive(tmp_path):
+    """An archive directory that does not exist yet reads as empty."""
+    archive = AttackArchive(directory=str(tmp_path / "missing"))
+    assert archive.scan() == []
+    assert archive.aggregate() == {}
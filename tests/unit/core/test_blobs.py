@@ -0,0 +1,125 @@
+# tests/unit/core/test_blobs.py
+"""Unit tests for content-addressed payload blobs."""
+import json
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import (
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+
+from tenebrinet.core.blobs import BLOB_REFS_KEY, PayloadBlobs, blob_digest
+from tenebrinet.core.database import Base
+from tenebrinet.core.models import Attack, PayloadBlob
+from tenebrinet.core.sink import EventSink
+
+
+HEADERS = {f"X-Header-{i}": "x" * 20 for i in range(10)}
+
+
+@pytest.fixture
+async def session_factory(tmp_path):
+    """Provide a session factory bound to a throwaway SQLite database."""
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'blobs.db'}"
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(
+        bind=engine, class_=AsyncSession, expire_on_commit=False
+    )
+    await engine.dispose()
+
+
+def _attack(payload: dict) -> dict:
+    return {
+        "id": uuid.uuid4(),
+        "ip": "10.0.0.1",
+        "service": "http",
+        "timestamp": datetime.now(timezone.utc),
+        "payload": payload,
+    }
+
+
+def test_split_replaces_large_components():
+    """Only components of at least min_size bytes become references."""
+    blobs = PayloadBlobs(min_size=64)
+    row = _attack({"method": "GET", "headers": HEADERS, "body": None})
+
+    (split,), stored = blobs.split([row])
+
+    assert split["payload"]["method"] == "GET"
+    assert "headers" not in split["payload"]
+    digest = split["payload"][BLOB_REFS_KEY]["headers"]
+    assert list(stored) == [digest]
+    assert digest == blob_digest(stored[digest])
+    # The queued row is left untouched for the spool
+    assert row["payload"]["headers"] == HEADERS
+
+
+def test_split_disabled():
+    """A minimum size of 0 keeps payloads inline."""
+    row = _attack({"headers": HEADERS})
+    assert PayloadBlobs(min_size=0).split([row]) == ([row], {})
+
+
+async def test_sink_stores_each_blob_once(session_factory):
+    """Identical components are stored once and rehydrated on read."""
+    blobs = PayloadBlobs(min_size=64)
+    sink = EventSink(session_factory=session_factory)
+    with pytest.MonkeyPatch.context() as patched:
+        patched.setattr("tenebrinet.core.sink.payload_blobs", blobs)
+        for i in range(3):
+            await sink.put(Attack, _attack({"n": i, "headers": HEADERS}))
+
+    async with session_factory() as session:
+        assert (
+            await session.execute(
+                select(func.count()).select_from(PayloadBlob)
+            )
+        ).scalar() == 1
+        payloads = (
+            await session.execute(
+                select(Attack.payload).order_by(Attack.timestamp)
+            )
+        ).scalars().all()
+
+    # A fresh store has to read the blob from the database
+    reader = PayloadBlobs()
+    async with session_factory() as session:
+        await reader.rehydrate(session, payloads)
+    assert payloads == [{"n": i, "headers": HEADERS} for i in range(3)]
+
+
+async def test_rehydrate_keeps_unknown_references(session_factory):
+    """References to missing blobs are left in place."""
+    payload = {"n": 1, BLOB_REFS_KEY: {"body": "0" * 64}}
+    async with session_factory() as session:
+        await PayloadBlobs().rehydrate(session, [payload, None])
+    assert payload == {"n": 1, BLOB_REFS_KEY: {"body": "0" * 64}}
+
+
+async def test_sweep_deletes_unreferenced_blobs(session_factory):
+    """Blobs are deleted once no stored attack references them."""
+    blobs = PayloadBlobs(min_size=64)
+    sink = EventSink(session_factory=session_factory)
+    kept, dropped = _attack({"headers": HEADERS}), _attack({"body": "y" * 99})
+    with pytest.MonkeyPatch.context() as patched:
+        patched.setattr("tenebrinet.core.sink.payload_blobs", blobs)
+        await sink.put(Attack, kept)
+        await sink.put(Attack, dropped)
+
+    async with session_factory() as session:
+        await session.execute(
+            delete(Attack).where(Attack.id == dropped["id"])
+        )
+        assert await blobs.sweep(await session.connection(), chunk=1) == 1
+        await session.commit()
+
+        stored = (await session.execute(select(PayloadBlob.digest))).all()
+    headers = json.dumps(HEADERS, sort_keys=True, separators=(",", ":"))
+    assert stored == [(blob_digest(headers),)]
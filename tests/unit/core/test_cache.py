@@ -0,0 +1,262 @@
+# tests/unit/core/test_cache.py
+"""Unit tests for the two-tier cache."""
+import asyncio
+import json
+import time
+
+import pytest
+
+from tenebrinet.core.cache import CacheManager, TTLCache
+from tenebrinet.core.config import RedisConfig
+
+
+class FakePipeline:
+    """Records pipelined commands and runs them on ``execute``."""
+
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self.commands.append((name, args, kwargs))
+        return queue
+
+    async def execute(self):
+        self.client.round_trips += 1
+        results = []
+        for name, args, kwargs in self.commands:
+            results.append(await getattr(self.client, name)(*args, **kwargs))
+        return results
+
+
+class FakeRedis:
+    """Dict-backed stand-in for the Redis client."""
+
+    def __init__(self):
+        self.data = {}
+        self.sets = {}
+        self.ttls = {}
+        self.round_trips = 0
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    async def mget(self, keys):
+        self.round_trips += 1
+        return [self.data.get(key) for key in keys]
+
+    async def setex(self, key, ttl, value):
+        self.data[key] = value
+
+    async def sadd(self, key, *members):
+        self.sets.setdefault(key, set()).update(m.encode() for m in members)
+
+    async def eval(self, script, numkeys, key, ttl):
+        # Only the tag TTL script is evaluated
+        if self.ttls.get(key, -1) < ttl:
+            self.ttls[key] = ttl
+            return 1
+        return 0
+
+    async def smembers(self, key):
+        return set(self.sets.get(key, ()))
+
+    async def delete(self, *keys):
+        deleted = 0
+        for key in keys:
+            in_data = self.data.pop(key, None) is not None
+            in_sets = self.sets.pop(key, None) is not None
+            deleted += in_data or in_sets
+        return deleted
+
+
+class BrokenRedis:
+    """Redis client whose every call fails."""
+
+    async def mget(self, keys):
+        raise ConnectionError("redis down")
+
+    def pipeline(self, transaction=True):
+        raise ConnectionError("redis down")
+
+
+def _manager(serializer="json"):
+    cache = CacheManager(
+        RedisConfig(url="redis://localhost", serializer=serializer)
+    )
+    cache.redis = FakeRedis()
+    return cache
+
+
+@pytest.fixture
+def manager():
+    """Provide a cache manager backed by a fake Redis."""
+    return _manager()
+
+
+def test_ttl_cache_expires_and_evicts():
+    """Entries expire after their TTL; the least recently used is evicted."""
+    now = [0.0]
+    local = TTLCache(max_entries=2, clock=lambda: now[0])
+    local.set("a", 1, ttl=10)
+    local.set("b", 2, ttl=1)
+    assert local.get("a") == 1  # "a" is now the most recently used
+    local.set("c", 3, ttl=10)
+    assert local.get("b") is None
+    assert local.get("a") == 1
+
+    now[0] = 11
+    assert local.get("a", "gone") == "gone"
+    assert len(local) == 1
+
+
+async def test_local_tier_answers_before_redis(manager):
+    """Values read from Redis are served from memory afterwards."""
+    manager.redis.data["key"] = json.dumps({"x": 1}).encode()
+    assert await manager.get("key") == {"x": 1}
+    assert await manager.get("key") == {"x": 1}
+    assert manager.redis.round_trips == 1
+
+
+async def test_redis_errors_are_not_raised():
+    """A Redis outage degrades to the local tier."""
+    cache = CacheManager()
+    cache.redis = BrokenRedis()
+    assert await cache.get("key") is None
+    assert await cache.set("key", 1) is False
+    assert await cache.get("key") == 1
+
+
+async def test_get_or_set_coalesces_concurrent_misses(manager):
+    """Concurrent misses of one key share a single recompute."""
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return {"total": 42}
+
+    results = await asyncio.gather(*[
+        manager.get_or_set("stats", compute, ttl=30) for _ in range(20)
+    ])
+    assert calls == 1
+    assert results == [{"total": 42}] * 20
+    assert json.loads(manager.redis.data["stats"])["value"] == {"total": 42}
+
+
+async def test_get_or_set_refreshes_stale_values_in_background(manager):
+    """Past the soft TTL the old value is served while a refresh runs."""
+    manager.redis.data["stats"] = json.dumps(
+        {"value": "old", "refresh_at": time.time() - 1}
+    ).encode()
+    refreshed = asyncio.Event()
+
+    async def compute():
+        refreshed.set()
+        return "new"
+
+    assert await manager.get_or_set(
+        "stats", compute, ttl=30, soft_ttl=20
+    ) == "old"
+    await asyncio.wait_for(refreshed.wait(), 1)
+    await asyncio.sleep(0)
+    assert await manager.get_or_set("stats", compute, ttl=30) == "new"
+
+
+async def test_get_or_set_does_not_cache_failures(manager):
+    """A failing recompute reaches every waiter and is retried later."""
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("db down")
+
+    results = await asyncio.gather(
+        manager.get_or_set("stats", fail),
+        manager.get_or_set("stats", fail),
+        return_exceptions=True,
+    )
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+    async def succeed():
+        return 1
+
+    assert await manager.get_or_set("stats", succeed) == 1
+
+
+async def test_get_many_and_set_many_batch_round_trips(manager):
+    """Batched reads and writes cost one round trip each."""
+    assert await manager.set_many({"a": 1, "b": [2]}, ttl=30)
+    manager.local.clear()
+    manager.redis.round_trips = 0
+
+    assert await manager.get_many(["a", "b", "c"]) == {"a": 1, "b": [2]}
+    assert manager.redis.round_trips == 1
+
+
+async def test_invalidate_tag_drops_tagged_keys(manager):
+    """Only the keys set with a tag are invalidated, in both tiers."""
+    await manager.set("stats:a", 1, tags=["stats"])
+    await manager.set("stats:b", 2, tags=["stats"])
+    await manager.set("other", 3)
+
+    assert await manager.invalidate_tag("stats") == 2
+    assert await manager.get_many(["stats:a", "stats:b", "other"]) == {
+        "other": 3
+    }
+    assert manager.redis.sets == {}
+
+
+async def test_tag_set_lives_as_long_as_its_keys(manager):
+    """A tag's TTL only ever grows to the longest TTL of its keys."""
+    await manager.set("stats:a", 1, ttl=30, tags=["stats"])
+    await manager.set("stats:b", 2, ttl=10, tags=["stats"])
+    assert manager.redis.ttls == {"tag:stats": 30}
+
+    await manager.set("stats:c", 3, ttl=60, tags=["stats"])
+    assert manager.redis.ttls == {"tag:stats": 60}
+
+
+def test_default_manager_uses_redis_url(monkeypatch):
+    """Without a config the manager connects to REDIS_URL."""
+    monkeypatch.setenv("REDIS_URL", "redis://cache.example:6380/2")
+    cache = CacheManager()
+
+    kwargs = cache.redis.connection_pool.connection_kwargs
+    assert (kwargs["host"], kwargs["port"], kwargs["db"]) == (
+        "cache.example", 6380, 2
+    )
+
+
+@pytest.mark.parametrize("serializer", ["json", "orjson", "msgpack"])
+async def test_serializers_round_trip(serializer):
+    """Every serializer stores values Redis can hand back."""
+    pytest.importorskip(serializer)
+    cache = _manager(serializer)
+    value = {"total": 1, "by_service": {"ssh": 1}, "top": [["US", 1]]}
+    await cache.set("key", value)
+    cache.local.clear()
+    assert await cache.get("key") == value
+
+
+async def test_in_process_cache_without_redis():
+    """Without a Redis URL the local tier is the whole cache."""
+    cache = CacheManager(RedisConfig(url=None))
+    assert cache.redis is None
+
+    await cache.set("stats:a", 1, ttl=30, tags=["stats"])
+    await cache.set("other", 2, ttl=30)
+    assert await cache.get_many(["stats:a", "other"]) == {
+        "stats:a": 1, "other": 2
+    }
+    assert await cache.invalidate_tag("stats") == 1
+    assert await cache.get("stats:a") is None
+    assert await cache.get("other") == 2
+    await cache.close()
@@ -156,3 +156,13 @@ def test_invalid_config_structure(tmp_path):
 def test_missing_file():
     with pytest.raises(FileNotFoundError):
         load_config("non_existent_file.yml")
+
+
+def test_embedded_config_is_valid():
+    """The shipped embedded-mode config needs no outside services."""
+    root = os.path.dirname(os.path.dirname(os.path.dirname(
+        os.path.dirname(os.path.abspath(__file__))
+    )))
+    config = load_config(os.path.join(root, "config", "embedded.yml"))
+    assert config.database.url.startswith("sqlite+aiosqlite://")
+    assert config.redis.url is None
@@ -0,0 +1,111 @@
+# tests/unit/core/test_credentials.py
+"""Unit tests for the deduplicated credential dictionary."""
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import (
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+
+from tenebrinet.core.credentials import pair_id, summarize_credentials
+from tenebrinet.core.database import Base
+from tenebrinet.core.models import Attack, Credential, CredentialPair
+from tenebrinet.core.sink import EventSink
+
+
+@pytest.fixture
+async def session_factory(tmp_path):
+    """Provide a session factory bound to a throwaway SQLite database."""
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'credentials.db'}"
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(
+        bind=engine, class_=AsyncSession, expire_on_commit=False
+    )
+    await engine.dispose()
+
+
+def _credential(attack_id, username="root", password="toor", success=False):
+    return {
+        "id": uuid.uuid4(),
+        "attack_id": attack_id,
+        "username": username,
+        "password": password,
+        "success": success,
+    }
+
+
+def test_pair_id_is_stable_and_unambiguous():
+    """IDs depend on the pair only and fit a signed BIGINT."""
+    assert pair_id("root", "toor") == pair_id("root", "toor")
+    assert pair_id("ro", "ottoor") != pair_id("root", "toor")
+    assert -(2 ** 63) <= pair_id("admin", "") < 2 ** 63
+
+
+def test_summarize_dates_attempts_by_attack():
+    """Pairs are counted once per batch and dated by their attack."""
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    attacks = [
+        {"id": uuid.uuid4(), "timestamp": start + timedelta(minutes=i)}
+        for i in range(3)
+    ]
+    rows = [
+        _credential(attacks[2]["id"]),
+        _credential(attacks[0]["id"], success=True),
+        _credential(attacks[1]["id"], username="admin"),
+    ]
+
+    credentials, pairs = summarize_credentials(rows, attacks)
+
+    assert [row["pair_id"] for row in credentials] == [
+        pair_id("root", "toor"),
+        pair_id("root", "toor"),
+        pair_id("admin", "toor"),
+    ]
+    assert all("username" not in row for row in credentials)
+    root = next(p for p in pairs if p["username"] == "root")
+    assert (root["attempts"], root["successes"]) == (2, 1)
+    assert root["first_seen"] == start
+    assert root["last_seen"] == start + timedelta(minutes=2)
+
+
+async def test_sink_upserts_pairs_across_batches(session_factory):
+    """Repeated pairs only add to their counters."""
+    sink = EventSink(
+        batch_size=1000, flush_interval=60, session_factory=session_factory
+    )
+    await sink.start()
+    for batch in range(3):
+        attack = {
+            "id": uuid.uuid4(),
+            "ip": "10.0.0.1",
+            "service": "ssh",
+            "timestamp": datetime(2026, 1, 1, batch, tzinfo=timezone.utc),
+        }
+        await sink.put(Attack, attack)
+        await sink.put(Credential, _credential(attack["id"]))
+        await sink.put(Credential, _credential(attack["id"], password="123"))
+        await sink.flush()
+    await sink.stop()
+
+    async with session_factory() as session:
+        pairs = (
+            await session.execute(
+                select(CredentialPair).order_by(CredentialPair.password)
+            )
+        ).scalars().all()
+        stored = (await session.execute(select(Credential))).scalars().all()
+
+    assert [(p.password, p.attempts) for p in pairs] == [
+        ("123", 3), ("toor", 3),
+    ]
+    assert pairs[1].first_seen.hour == 0
+    assert pairs[1].last_seen.hour == 2
+    assert len(stored) == 6
+    assert {c.username for c in stored} == {"root"}
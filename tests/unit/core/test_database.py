@@ -48,17 +48,32 @@ def mock_async_session_local():
 
 
 @pytest.mark.asyncio
-async def test_init_db(mock_engine, mock_base_class):
-    """Test that init_db correctly calls create_all on metadata."""
+async def test_init_db(mock_engine):
+    """init_db checks the schema revision instead of creating tables."""
     with patch('tenebrinet.core.database.engine', new=mock_engine), \
-         patch('tenebrinet.core.database.Base', new=mock_base_class):
-        from tenebrinet.core.database import init_db  # Import after patching
+         patch('tenebrinet.core.database.head_revision', return_value="0002"):
+        from tenebrinet.core.database import (  # Import after patching
+            _current_revision,
+            init_db,
+        )
 
-        await init_db()
-        mock_engine.begin.assert_called_once()
         ctx = mock_engine.begin.return_value.__aenter__.return_value
-        run_sync = ctx.run_sync
-        run_sync.assert_called_once_with(mock_base_class.metadata.create_all)
+        ctx.run_sync.return_value = "0002"
+        await init_db()
+        ctx.run_sync.assert_any_call(_current_revision)
+
+
+@pytest.mark.asyncio
+async def test_init_db_rejects_outdated_schema(mock_engine):
+    """An outdated schema is reported unless auto_migrate is enabled."""
+    from tenebrinet.core.database import SchemaVersionError, init_db
+
+    ctx = mock_engine.begin.return_value.__aenter__.return_value
+    ctx.run_sync.return_value = "0001"
+    with patch('tenebrinet.core.database.engine', new=mock_engine), \
+         patch('tenebrinet.core.database.head_revision', return_value="0002"):
+        with pytest.raises(SchemaVersionError):
+            await init_db()
 
 
 @pytest.mark.asyncio
@@ -86,3 +101,220 @@ async def test_get_db_session(
 
         mock_async_session_local.assert_called_once()
         session.close.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_bulk_insert_uses_copy_on_asyncpg():
+    """bulk_insert streams rows with COPY when running on asyncpg."""
+    import json
+    import uuid
+
+    from tenebrinet.core.database import bulk_insert
+    from tenebrinet.core.models import Attack
+
+    copy = AsyncMock()
+    raw = MagicMock()
+    raw.driver_connection.copy_records_to_table = copy
+    conn = MagicMock()
+    conn.dialect.name = "postgresql"
+    conn.dialect.driver = "asyncpg"
+    conn.get_raw_connection = AsyncMock(return_value=raw)
+    session = MagicMock()
+    session.connection = AsyncMock(return_value=conn)
+
+    attack_id = uuid.uuid4()
+    written = await bulk_insert(session, Attack, [
+        {"id": attack_id, "ip": "10.0.0.1", "service": "ssh",
+         "payload": {"username": "root"}},
+    ])
+
+    assert written == 1
+    table_name = copy.await_args.args[0]
+    columns = copy.await_args.kwargs["columns"]
+    record = copy.await_args.kwargs["records"][0]
+    assert table_name == "attacks"
+    # The timestamp default is filled in client-side
+    assert "timestamp" in columns
+    assert record[columns.index("timestamp")] is not None
+    assert record[columns.index("id")] == attack_id
+    assert json.loads(record[columns.index("payload")]) == {
+        "username": "root"
+    }
+
+
+@pytest.mark.asyncio
+async def test_bulk_insert_falls_back_to_executemany():
+    """Other backends receive a plain executemany INSERT."""
+    from tenebrinet.core.database import bulk_insert
+    from tenebrinet.core.models import Attack
+
+    conn = MagicMock()
+    conn.dialect.name = "sqlite"
+    session = MagicMock()
+    session.connection = AsyncMock(return_value=conn)
+    session.execute = AsyncMock()
+
+    rows = [{"ip": "10.0.0.1", "service": "ssh"}] * 3
+    assert await bulk_insert(session, Attack, rows) == 3
+    session.execute.assert_awaited_once()
+    assert session.execute.await_args.args[1] == rows
+    assert await bulk_insert(session, Attack, []) == 0
+
+
+@pytest.mark.asyncio
+async def test_estimate_count_uses_planner_rows():
+    """estimate_count reads the row estimate from EXPLAIN on PostgreSQL."""
+    from sqlalchemy import select
+    from sqlalchemy.dialects import postgresql
+
+    from tenebrinet.core.database import estimate_count
+    from tenebrinet.core.models import Attack
+
+    conn = MagicMock()
+    conn.dialect.name = "postgresql"
+    result = MagicMock()
+    result.scalar.return_value = [{"Plan": {"Plan Rows": 4200}}]
+    session = MagicMock()
+    session.connection = AsyncMock(return_value=conn)
+    session.execute = AsyncMock(return_value=result)
+
+    query = select(Attack).where(Attack.service == "ssh")
+    assert await estimate_count(session, query) == 4200
+
+    explain = session.execute.await_args.args[0]
+    sql = str(explain.compile(dialect=postgresql.dialect()))
+    assert sql.startswith("EXPLAIN (FORMAT JSON) SELECT 1")
+    assert "attacks.service" in sql
+
+
+@pytest.mark.asyncio
+async def test_estimate_count_unsupported_backend():
+    """Backends without planner estimates return None."""
+    from sqlalchemy import select
+
+    from tenebrinet.core.database import estimate_count
+    from tenebrinet.core.models import Attack
+
+    conn = MagicMock()
+    conn.dialect.name = "sqlite"
+    session = MagicMock()
+    session.connection = AsyncMock(return_value=conn)
+    assert await estimate_count(session, select(Attack)) is None
+
+
+@pytest.fixture
+def restore_engines(monkeypatch):
+    """Restore the module's engines after a test reconfigures them."""
+    from tenebrinet.core import database
+
+    for name in (
+        "engine",
+        "ingest_engine",
+        "replica_engine",
+        "AsyncSessionLocal",
+        "IngestSessionLocal",
+        "ReplicaSessionLocal",
+        "replica_monitor",
+        "_engine_config",
+    ):
+        monkeypatch.setattr(database, name, getattr(database, name))
+
+
+@pytest.mark.asyncio
+async def test_configure_engines_separates_pools(tmp_path, restore_engines):
+    """Query and ingest sessions draw from their own instrumented pools."""
+    from sqlalchemy import text
+
+    from tenebrinet.core import database
+    from tenebrinet.core.config import DatabaseConfig
+    from prometheus_client import REGISTRY
+
+    config = DatabaseConfig(
+        url=f"sqlite+aiosqlite:///{tmp_path / 'pools.db'}",
+        pool_size=3,
+        max_overflow=1,
+        ingest_pool_size=2,
+        ingest_max_overflow=0,
+    )
+    database.configure_engines(config)
+    query_engine = database.engine
+    database.configure_engines(config.model_copy())
+    assert database.engine is query_engine
+
+    assert database.engine.pool.size() == 3
+    assert database.ingest_engine.pool.size() == 2
+    assert database.engine.url.database == str(tmp_path / "pools.db")
+
+    def checkouts(pool: str) -> float:
+        return REGISTRY.get_sample_value(
+            "tenebrinet_db_pool_checkout_seconds_count", {"pool": pool}
+        ) or 0.0
+
+    ingest_before, query_before = checkouts("ingest"), checkouts("query")
+    async with database.IngestSessionLocal() as session:
+        await session.execute(text("SELECT 1"))
+    assert checkouts("ingest") == ingest_before + 1
+    assert checkouts("query") == query_before
+    assert database.ingest_engine.pool.checkedout() == 0
+    await database.dispose_engines()
+
+
+@pytest.mark.asyncio
+async def test_read_sessions_fall_back_when_replica_lags(
+    tmp_path, restore_engines
+):
+    """Reads use the replica until its lag exceeds the limit."""
+    from tenebrinet.core import database
+    from tenebrinet.core.config import DatabaseConfig
+
+    database.configure_engines(DatabaseConfig(
+        url=f"sqlite+aiosqlite:///{tmp_path / 'primary.db'}",
+        read_url=f"sqlite+aiosqlite:///{tmp_path / 'replica.db'}",
+        max_replica_lag=5.0,
+        replica_lag_check_interval=0,
+    ))
+    assert await database.read_session_factory() is (
+        database.ReplicaSessionLocal
+    )
+
+    with patch(
+        "tenebrinet.core.database.replica_lag", AsyncMock(return_value=30.0)
+    ):
+        assert await database.read_session_factory() is (
+            database.AsyncSessionLocal
+        )
+    await database.dispose_engines()
+
+
+@pytest.mark.asyncio
+async def test_sqlite_engines_use_wal(tmp_path, restore_engines):
+    """Embedded SQLite databases are created in WAL mode."""
+    from sqlalchemy import text
+
+    from tenebrinet.core import database
+    from tenebrinet.core.config import DatabaseConfig
+
+    path = tmp_path / "data" / "embedded.db"
+    database.configure_engines(
+        DatabaseConfig(url=f"sqlite+aiosqlite:///{path}")
+    )
+    async with database.ingest_engine.connect() as conn:
+        mode = (await conn.execute(text("PRAGMA journal_mode"))).scalar()
+        sync = (await conn.execute(text("PRAGMA synchronous"))).scalar()
+    assert mode == "wal"
+    assert sync == 1  # NORMAL
+    assert path.exists()
+    await database.dispose_engines()
+
+
+@pytest.mark.asyncio
+async def test_memory_sqlite_shares_one_engine(restore_engines):
+    """In-memory SQLite serves ingest and queries from one database."""
+    from tenebrinet.core import database
+    from tenebrinet.core.config import DatabaseConfig
+
+    database.configure_engines(
+        DatabaseConfig(url="sqlite+aiosqlite:///:memory:")
+    )
+    assert database.ingest_engine is database.engine
+    await database.dispose_engines()
@@ -0,0 +1,265 @@
+# tests/unit/core/test_migrations.py
+"""Tests for the Alembic migration tree."""
+from unittest.mock import patch
+
+import pytest
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.runtime.migration import MigrationContext
+from sqlalchemy import (
+    JSON,
+    Boolean,
+    Column,
+    DateTime,
+    Float,
+    ForeignKey,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    inspect,
+    text,
+)
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from tenebrinet.core import models  # noqa: F401
+from tenebrinet.core.credentials import pair_id
+from tenebrinet.core.database import (
+    Base,
+    SchemaVersionError,
+    _alembic_config,
+    _current_revision,
+    head_revision,
+    init_db,
+    migrate_db,
+)
+
+
+# The tables as create_all built them before migrations were introduced
+baseline = MetaData()
+Table(
+    "attacks",
+    baseline,
+    Column("id", UUID(as_uuid=True), primary_key=True),
+    Column("ip", String(45), nullable=False, index=True),
+    Column("timestamp", DateTime(timezone=True), index=True),
+    Column("service", String(50), nullable=False),
+    Column("payload", JSON),
+    Column("threat_type", String(50)),
+    Column("confidence", Float),
+    Column("country", String(2)),
+    Column("asn", Integer),
+)
+Table(
+    "sessions",
+    baseline,
+    Column("id", UUID(as_uuid=True), primary_key=True),
+    Column("attack_id", UUID(as_uuid=True), ForeignKey("attacks.id")),
+    Column("start_time", DateTime(timezone=True)),
+    Column("end_time", DateTime(timezone=True)),
+    Column("commands", JSON),
+)
+Table(
+    "credentials",
+    baseline,
+    Column("id", UUID(as_uuid=True), primary_key=True),
+    Column("attack_id", UUID(as_uuid=True), ForeignKey("attacks.id")),
+    Column("username", String(255), nullable=False),
+    Column("password", String(255), nullable=False),
+    Column("success", Boolean),
+)
+
+
+def _schema_diff(conn):
+    context = MigrationContext.configure(conn, opts={"compare_type": True})
+    return compare_metadata(context, Base.metadata)
+
+
+@pytest.fixture
+async def engine(tmp_path):
+    """Provide an engine for an empty SQLite database."""
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'migrations.db'}"
+    )
+    with patch("tenebrinet.core.database.engine", new=engine):
+        yield engine
+    await engine.dispose()
+
+
+async def test_init_db_requires_migrations(engine):
+    """Startup refuses an unmigrated database."""
+    with pytest.raises(SchemaVersionError):
+        await init_db()
+
+
+async def test_migrate_db_reaches_head(engine):
+    """Migrations build the full schema and record the head revision."""
+    await migrate_db()
+    await init_db()
+
+    async with engine.connect() as conn:
+        assert await conn.run_sync(_current_revision) == head_revision()
+        indexes = await conn.run_sync(
+            lambda c: {i["name"] for i in inspect(c).get_indexes("attacks")}
+        )
+    assert {
+        "ix_attacks_service_timestamp",
+        "ix_attacks_threat_type_timestamp",
+        "ix_attacks_country_timestamp",
+    } <= indexes
+
+
+async def test_migrations_match_models(engine):
+    """The migrated schema matches the ORM models."""
+    await migrate_db()
+
+    async with engine.connect() as conn:
+        diff = await conn.run_sync(_schema_diff)
+    assert diff == []
+
+
+async def test_migrate_db_adopts_create_all_schema(engine):
+    """Databases created before migrations existed are upgraded in place."""
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    await migrate_db()
+
+    async with engine.connect() as conn:
+        assert await conn.run_sync(_current_revision) == head_revision()
+
+
+async def test_migrate_db_converts_baseline_schema(engine):
+    """The schema of the first release is partitioned and upgraded."""
+    # Hex that SQLite's NUMERIC affinity of the old UUID columns keeps
+    attack_id, other_id = "a" * 32, "b" * 32
+    session_id, credential_id = "c" * 32, "d" * 32
+    async with engine.begin() as conn:
+        await conn.run_sync(baseline.create_all)
+        await conn.execute(text(
+            "INSERT INTO attacks (id, ip, timestamp, service) VALUES "
+            f"('{attack_id}', '10.0.0.1', '2026-01-01 12:00:00', 'ssh'), "
+            f"('{other_id}', '10.0.0.2', NULL, 'http')"
+        ))
+        await conn.execute(text(
+            "INSERT INTO sessions (id, attack_id, commands) VALUES "
+            f"('{session_id}', '{attack_id}', '[\"ls\"]')"
+        ))
+        await conn.execute(text(
+            "INSERT INTO credentials "
+            "(id, attack_id, username, password, success) VALUES "
+            f"('{credential_id}', '{attack_id}', 'root', 'toor', 0)"
+        ))
+
+    await migrate_db()
+
+    async with engine.connect() as conn:
+        assert await conn.run_sync(_current_revision) == head_revision()
+        assert await conn.run_sync(_schema_diff) == []
+        primary_key = await conn.run_sync(
+            lambda c: inspect(c).get_pk_constraint("attacks")
+        )
+        attacks = (
+            await conn.execute(text(
+                "SELECT id, timestamp IS NOT NULL FROM attacks ORDER BY id"
+            ))
+        ).all()
+        sessions = (
+            await conn.execute(text("SELECT attack_id FROM sessions"))
+        ).all()
+        credentials = (
+            await conn.execute(text("SELECT attack_id FROM credentials"))
+        ).all()
+    assert primary_key["constrained_columns"] == ["id", "timestamp"]
+    assert attacks == [(attack_id, 1), (other_id, 1)]
+    assert sessions == credentials == [(attack_id,)]
+
+
+async def test_stats_tables_backfilled_from_existing_attacks(engine):
+    """Upgrading to the stats revisions summarizes stored attacks."""
+    async with engine.begin() as conn:
+        await conn.run_sync(
+            lambda c: command.upgrade(_alembic_config(c), "0003")
+        )
+        for i, (ip, minute) in enumerate(
+            [("10.0.0.1", 1), ("10.0.0.1", 1), ("10.0.0.2", 2)]
+        ):
+            await conn.execute(
+                text(
+                    "INSERT INTO attacks (id, ip, timestamp, service) "
+                    "VALUES (:id, :ip, :ts, 'ssh')"
+                ),
+                {
+                    "id": f"{i:032x}",
+                    "ip": ip,
+                    "ts": f"2026-01-01 12:0{minute}:1{i}.000000",
+                },
+            )
+
+    await migrate_db()
+
+    async with engine.connect() as conn:
+        rollups = (
+            await conn.execute(
+                text("SELECT bucket, count FROM attack_rollups ORDER BY 1")
+            )
+        ).all()
+        periods = (
+            await conn.execute(
+                text("SELECT period, total FROM attack_aggregates ORDER BY 1")
+            )
+        ).all()
+    assert rollups == [
+        ("2026-01-01 12:01:00.000000", 2),
+        ("2026-01-01 12:02:00.000000", 1),
+    ]
+    assert periods == [("2026-01-01", 3), ("all", 3)]
+
+
+async def test_credentials_moved_to_pairs(engine):
+    """Upgrading to credential pairs deduplicates stored credentials."""
+    async with engine.begin() as conn:
+        await conn.run_sync(
+            lambda c: command.upgrade(_alembic_config(c), "0006")
+        )
+        await conn.execute(text(
+            "INSERT INTO attacks (id, ip, timestamp, service) VALUES "
+            f"('{1:032x}', '10.0.0.1', '2026-01-01 12:00:00.000000', 'ssh')"
+        ))
+        for i, (password, success) in enumerate(
+            [("toor", 0), ("toor", 1), ("123456", 0)]
+        ):
+            await conn.execute(
+                text(
+                    "INSERT INTO credentials "
+                    "(id, attack_id, username, password, success) "
+                    "VALUES (:id, :attack_id, 'root', :password, :success)"
+                ),
+                {
+                    "id": f"{i + 10:032x}",
+                    "attack_id": f"{1:032x}",
+                    "password": password,
+                    "success": success,
+                },
+            )
+
+    await migrate_db()
+
+    async with engine.connect() as conn:
+        pairs = (
+            await conn.execute(text(
+                "SELECT id, password, attempts, successes "
+                "FROM credential_pairs ORDER BY password"
+            ))
+        ).all()
+        references = (
+            await conn.execute(text(
+                "SELECT pair_id, count(*) FROM credentials GROUP BY pair_id"
+            ))
+        ).all()
+    assert [row[1:] for row in pairs] == [("123456", 1, 0), ("toor", 2, 1)]
+    assert pairs[0][0] == pair_id("root", "123456")
+    assert sorted(references) == sorted(
+        [(pairs[0][0], 1), (pairs[1][0], 2)]
+    )
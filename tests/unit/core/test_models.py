@@ -3,14 +3,15 @@
 import uuid
 from datetime import datetime, timezone
 
-from sqlalchemy.dialects import postgresql
 from sqlalchemy.orm import RelationshipProperty
 from sqlalchemy.sql.schema import CallableColumnDefault
 from sqlalchemy.sql.sqltypes import (
-    Boolean, DateTime, Float, Integer, JSON, String
+    BigInteger, Boolean, DateTime, Float, Integer, JSON, String, Uuid
 )
 
-from tenebrinet.core.models import Attack, Credential, Session
+from tenebrinet.core.models import (
+    Attack, Credential, CredentialPair, Session, SessionCommand
+)
 
 
 class TestAttackModel:
@@ -18,7 +19,7 @@ class TestAttackModel:
 
     def test_column_definitions(self):
         """Test the Attack model's column definitions and types."""
-        assert isinstance(Attack.__table__.columns.id.type, postgresql.UUID)
+        assert isinstance(Attack.__table__.columns.id.type, Uuid)
         assert Attack.__table__.columns.id.primary_key
 
         # Check that the default is a callable
@@ -36,6 +37,15 @@ class TestAttackModel:
         )
         assert Attack.__table__.columns.timestamp.index
 
+        # The partition key has to be part of the primary key
+        assert [c.name for c in Attack.__table__.primary_key.columns] == [
+            "id", "timestamp"
+        ]
+        assert (
+            Attack.__table__.dialect_options["postgresql"]["partition_by"]
+            == "RANGE (timestamp)"
+        )
+
         assert isinstance(Attack.__table__.columns.service.type, String)
         assert Attack.__table__.columns.service.nullable is False
 
@@ -78,20 +88,18 @@ class TestSessionModel:
 
     def test_column_definitions(self):
         """Test the Session model's column definitions and types."""
-        assert isinstance(Session.__table__.columns.id.type, postgresql.UUID)
+        assert isinstance(Session.__table__.columns.id.type, Uuid)
         assert Session.__table__.columns.id.primary_key
         assert isinstance(
             Session.__table__.columns.id.default, CallableColumnDefault
         )
 
         assert isinstance(
-            Session.__table__.columns.attack_id.type, postgresql.UUID
+            Session.__table__.columns.attack_id.type, Uuid
         )
-        # Check foreign key
-        fk_col = next(
-            iter(Session.__table__.columns.attack_id.foreign_keys)
-        ).column
-        assert isinstance(fk_col.type, postgresql.UUID)
+        # attacks is partitioned, so the link is an indexed plain column
+        assert not Session.__table__.columns.attack_id.foreign_keys
+        assert Session.__table__.columns.attack_id.index
 
         assert isinstance(Session.__table__.columns.start_time.type, DateTime)
         assert isinstance(
@@ -120,13 +128,35 @@ class TestSessionModel:
         assert str(attack_id) in repr_str
 
 
+class TestSessionCommandModel:
+    """Tests for the SessionCommand model."""
+
+    def test_column_definitions(self):
+        """Test the SessionCommand model's column definitions."""
+        columns = SessionCommand.__table__.columns
+        assert columns.id.primary_key
+        assert columns.session_id.nullable is False
+        assert columns.session_id.index
+        fk_col = next(iter(columns.session_id.foreign_keys)).column
+        assert fk_col.table.name == "sessions"
+        assert isinstance(columns.seq.type, Integer)
+        assert columns.command.nullable is False
+
+    def test_relationships(self):
+        """Test SessionCommand relationships."""
+        assert SessionCommand.session.property.back_populates == (
+            "command_log"
+        )
+        assert Session.command_log.property.back_populates == "session"
+
+
 class TestCredentialModel:
     """Tests for the Credential model."""
 
     def test_column_definitions(self):
         """Test the Credential model's column definitions and types."""
         assert isinstance(
-            Credential.__table__.columns.id.type, postgresql.UUID
+            Credential.__table__.columns.id.type, Uuid
         )
         assert Credential.__table__.columns.id.primary_key
         assert isinstance(
@@ -134,18 +164,18 @@ class TestCredentialModel:
         )
 
         assert isinstance(
-            Credential.__table__.columns.attack_id.type, postgresql.UUID
-        )
-        # Check foreign key
-        fk_col = next(
-            iter(Credential.__table__.columns.attack_id.foreign_keys)
-        ).column
-        assert isinstance(fk_col.type, postgresql.UUID)
-
-        assert isinstance(Credential.__table__.columns.username.type, String)
-        assert Credential.__table__.columns.username.nullable is False
-        assert isinstance(Credential.__table__.columns.password.type, String)
-        assert Credential.__table__.columns.password.nullable is False
+            Credential.__table__.columns.attack_id.type, Uuid
+        )
+        # attacks is partitioned, so the link is an indexed plain column
+        assert not Credential.__table__.columns.attack_id.foreign_keys
+        assert Credential.__table__.columns.attack_id.index
+
+        assert isinstance(
+            Credential.__table__.columns.pair_id.type, BigInteger
+        )
+        assert Credential.__table__.columns.pair_id.nullable is False
+        assert Credential.__table__.columns.pair_id.index
+        assert "username" not in Credential.__table__.columns
         assert isinstance(Credential.__table__.columns.success.type, Boolean)
         assert Credential.__table__.columns.success.default.arg is False
 
@@ -153,6 +183,7 @@ class TestCredentialModel:
         """Test Credential model relationships."""
         assert isinstance(Credential.attack.property, RelationshipProperty)
         assert Credential.attack.property.back_populates == "credentials"
+        assert Credential.pair.property.mapper.class_ is CredentialPair
 
     def test_repr(self):
         """Test Credential __repr__ method."""
@@ -161,8 +192,7 @@ class TestCredentialModel:
         cred = Credential(
             id=cred_id,
             attack_id=attack_id,
-            username="testuser",
-            password="testpass",
+            pair=CredentialPair(username="testuser", password="testpass"),
             success=True,
         )
         repr_str = repr(cred)
@@ -0,0 +1,150 @@
+# tests/unit/core/test_partitions.py
+"""Unit tests for attacks table partition management."""
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from unittest.mock import MagicMock
+
+import pytest
+
+from tenebrinet.core.partitions import (
+    PartitioningError,
+    _parse_bound,
+    drop_expired_partitions,
+    ensure_partitions,
+    partition_name,
+    partition_start,
+)
+
+
+class _FakeConnection:
+    """Records executed SQL and answers the catalog lookups."""
+
+    def __init__(self, partitions=(), partitioned=True):
+        self.dialect = MagicMock()
+        self.dialect.name = "postgresql"
+        self.partitions = list(partitions)
+        self.partitioned = partitioned
+        self.statements = []
+
+    async def execute(self, statement, params=None):
+        sql = str(statement)
+        self.statements.append(sql)
+        result = MagicMock()
+        result.all.return_value = (
+            self.partitions if "pg_inherits" in sql else []
+        )
+        result.scalar.return_value = self.partitioned
+        return result
+
+    @asynccontextmanager
+    async def begin_nested(self):
+        yield
+
+
+def _bounds(lower: str, upper: str) -> str:
+    return f"FOR VALUES FROM ('{lower}') TO ('{upper}')"
+
+
+def test_partition_start_daily():
+    """Daily partitions start at midnight UTC."""
+    moment = datetime(2026, 3, 4, 15, 30, tzinfo=timezone.utc)
+    assert partition_start(moment) == datetime(
+        2026, 3, 4, tzinfo=timezone.utc
+    )
+
+
+def test_partition_start_weekly():
+    """Weekly partitions start on Monday."""
+    moment = datetime(2026, 3, 5, 8, 0, tzinfo=timezone.utc)  # Thursday
+    assert partition_start(moment, "weekly") == datetime(
+        2026, 3, 2, tzinfo=timezone.utc
+    )
+
+
+def test_partition_name():
+    """Partition names encode their start date."""
+    start = datetime(2026, 3, 2, tzinfo=timezone.utc)
+    assert partition_name(start) == "attacks_p20260302"
+
+
+def test_parse_bound_short_offset():
+    """PostgreSQL's short UTC offsets are understood."""
+    assert _parse_bound("2026-03-02 00:00:00+00") == datetime(
+        2026, 3, 2, tzinfo=timezone.utc
+    )
+
+
+async def test_ensure_partitions_noop_on_other_dialects():
+    """Non-PostgreSQL databases are left alone."""
+    conn = _FakeConnection()
+    conn.dialect.name = "sqlite"
+    assert await ensure_partitions(conn) == []
+    assert conn.statements == []
+
+
+async def test_ensure_partitions_creates_ahead():
+    """The current partition plus the requested number ahead are created."""
+    conn = _FakeConnection()
+    now = datetime(2026, 3, 4, 12, 0, tzinfo=timezone.utc)
+    created = await ensure_partitions(conn, "daily", ahead=2, now=now)
+
+    assert created == [
+        "attacks_p20260304", "attacks_p20260305", "attacks_p20260306"
+    ]
+    assert any("DEFAULT" in sql for sql in conn.statements)
+
+
+async def test_ensure_partitions_requires_partitioned_table():
+    """An unmigrated attacks table is reported instead of altered."""
+    conn = _FakeConnection(partitioned=False)
+    with pytest.raises(PartitioningError, match="initdb"):
+        await ensure_partitions(conn)
+
+    assert not any("CREATE TABLE" in sql for sql in conn.statements)
+
+
+async def test_ensure_partitions_skips_overlapping_ranges():
+    """Existing partitions are not recreated or overlapped."""
+    conn = _FakeConnection([
+        (
+            "attacks_p20260302",
+            _bounds("2026-03-02 00:00:00+00", "2026-03-09 00:00:00+00"),
+        ),
+    ])
+    now = datetime(2026, 3, 4, 12, 0, tzinfo=timezone.utc)
+    created = await ensure_partitions(conn, "daily", ahead=5, now=now)
+
+    assert created == ["attacks_p20260309"]
+
+
+async def test_drop_expired_partitions():
+    """Only partitions entirely past the retention period are dropped."""
+    conn = _FakeConnection([
+        (
+            "attacks_p20260101",
+            _bounds("2026-01-01 00:00:00+00", "2026-01-02 00:00:00+00"),
+        ),
+        (
+            "attacks_p20260301",
+            _bounds("2026-03-01 00:00:00+00", "2026-03-02 00:00:00+00"),
+        ),
+        ("attacks_default", "DEFAULT"),
+    ])
+    now = datetime(2026, 3, 4, tzinfo=timezone.utc)
+    dropped = await drop_expired_partitions(conn, 30, now=now)
+
+    assert dropped == ["attacks_p20260101"]
+    # Children are deleted by the partition's ids, before it is dropped
+    drop = conn.statements.index("DROP TABLE IF EXISTS attacks_p20260101")
+    children = [
+        sql for sql in conn.statements[:drop] if sql.startswith("DELETE")
+    ]
+    assert [sql.split()[2] for sql in children] == [
+        "session_commands", "sessions", "credentials"
+    ]
+    assert all("attacks_p20260101" in sql for sql in children)
+    assert not any("NOT EXISTS" in sql for sql in conn.statements)
+    rollups = [sql for sql in conn.statements if "attack_rollups" in sql]
+    assert rollups == [
+        "DELETE FROM attack_rollups WHERE bucket >= :lower AND bucket < :upper"
+    ]
@@ -0,0 +1,97 @@
+# tests/unit/core/test_rollups.py
+"""Unit tests for incrementally maintained attack rollups."""
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import (
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+
+from tenebrinet.core.database import Base
+from tenebrinet.core.models import Attack, AttackRollup
+from tenebrinet.core.rollups import (
+    apply_attack_rollups,
+    minute_bucket,
+    remove_attack_from_rollups,
+    summarize_attacks,
+)
+
+
+@pytest.fixture
+async def session_factory(tmp_path):
+    """Provide a session factory bound to a throwaway SQLite database."""
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'rollups.db'}"
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(
+        bind=engine, class_=AsyncSession, expire_on_commit=False
+    )
+    await engine.dispose()
+
+
+def _attack(minute: int, second: int = 0, **overrides) -> dict:
+    row = {
+        "id": uuid.uuid4(),
+        "ip": "10.0.0.1",
+        "timestamp": datetime(2026, 1, 1, 12, minute, second,
+                              tzinfo=timezone.utc),
+        "service": "ssh",
+        "threat_type": "credential_attack",
+        "country": "US",
+    }
+    row.update(overrides)
+    return row
+
+
+def test_minute_bucket():
+    """Timestamps are truncated to the UTC minute."""
+    ts = datetime(2026, 1, 1, 12, 34, 56, 789, tzinfo=timezone.utc)
+    assert minute_bucket(ts) == datetime(
+        2026, 1, 1, 12, 34, tzinfo=timezone.utc
+    )
+
+
+def test_summarize_attacks():
+    """Attacks in the same minute and key collapse into one row."""
+    rollups = summarize_attacks([
+        _attack(0, 5),
+        _attack(0, 50),
+        _attack(1, ip="10.0.0.2", threat_type=None, country=None),
+    ])
+
+    counts = {
+        (r["bucket"].minute, r["threat_type"], r["country"]): r["count"]
+        for r in rollups
+    }
+    assert counts == {(0, "credential_attack", "US"): 2, (1, "", ""): 1}
+
+
+async def test_apply_accumulates_across_batches(session_factory):
+    """Repeated batches add to the existing counters."""
+    async with session_factory() as session:
+        await apply_attack_rollups(session, [_attack(0), _attack(0)])
+        await apply_attack_rollups(session, [_attack(0, ip="10.0.0.2")])
+        await session.commit()
+
+    async with session_factory() as session:
+        rollup = (await session.execute(select(AttackRollup))).scalar_one()
+        assert rollup.count == 3
+
+
+async def test_remove_attack(session_factory):
+    """Deleting an attack decrements its bucket."""
+    row = _attack(3)
+    async with session_factory() as session:
+        await apply_attack_rollups(session, [row, _attack(3)])
+        await remove_attack_from_rollups(session, Attack(**row))
+        await session.commit()
+
+    async with session_factory() as session:
+        rollup = (await session.execute(select(AttackRollup))).scalar_one()
+        assert rollup.count == 1
@@ -0,0 +1,346 @@
+# tests/unit/core/test_sink.py
+"""Unit tests for the write-behind event sink."""
+import asyncio
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError, OperationalError
+from sqlalchemy.ext.asyncio import (
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+
+from tenebrinet.core.database import Base
+from tenebrinet.core.models import Attack, Credential, Session
+from tenebrinet.core.sink import EventSink, is_transient
+from tenebrinet.core.spool import decode_records, encode_records
+
+
+@pytest.fixture
+async def session_factory(tmp_path):
+    """Provide a session factory bound to a throwaway SQLite database."""
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'sink.db'}"
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(
+        bind=engine, class_=AsyncSession, expire_on_commit=False
+    )
+    await engine.dispose()
+
+
+def _attack_row(**overrides) -> dict:
+    row = {
+        "id": uuid.uuid4(),
+        "ip": "10.0.0.1",
+        "timestamp": datetime.now(timezone.utc),
+        "service": "ssh",
+        "threat_type": "credential_attack",
+        "payload": {"username": "root"},
+    }
+    row.update(overrides)
+    return row
+
+
+async def _count(session_factory, model) -> int:
+    async with session_factory() as session:
+        result = await session.execute(select(func.count()).select_from(model))
+        return result.scalar() or 0
+
+
+async def test_flushes_when_batch_is_full(session_factory):
+    """A full batch is written without waiting for the interval."""
+    sink = EventSink(
+        batch_size=10, flush_interval=60, session_factory=session_factory
+    )
+    await sink.start()
+    for _ in range(10):
+        await sink.put(Attack, _attack_row())
+
+    for _ in range(50):
+        if await _count(session_factory, Attack) == 10:
+            break
+        await asyncio.sleep(0.02)
+    assert await _count(session_factory, Attack) == 10
+    await sink.stop()
+
+
+async def test_flushes_on_interval(session_factory):
+    """A partial batch is written once the flush interval elapses."""
+    sink = EventSink(
+        batch_size=100, flush_interval=0.05, session_factory=session_factory
+    )
+    await sink.start()
+    await sink.put(Attack, _attack_row())
+    await asyncio.sleep(0.3)
+    assert await _count(session_factory, Attack) == 1
+    await sink.stop()
+
+
+async def test_children_written_after_parents(session_factory):
+    """Sessions and credentials in the same batch as their attack."""
+    sink = EventSink(
+        batch_size=100, flush_interval=60, session_factory=session_factory
+    )
+    await sink.start()
+    attack = _attack_row()
+    # Queue the children first to exercise foreign-key ordering
+    await sink.put(Credential, {
+        "id": uuid.uuid4(),
+        "attack_id": attack["id"],
+        "username": "root",
+        "password": "toor",
+        "success": True,
+    })
+    session_id = uuid.uuid4()
+    await sink.put(Session, {
+        "id": session_id,
+        "attack_id": attack["id"],
+        "start_time": datetime.now(timezone.utc),
+        "commands": [],
+    })
+    await sink.put(Attack, attack)
+    await sink.put_update(Session, {
+        "id": session_id,
+        "end_time": datetime.now(timezone.utc),
+    })
+    await sink.stop()
+
+    assert await _count(session_factory, Attack) == 1
+    assert await _count(session_factory, Credential) == 1
+    async with session_factory() as db:
+        stored = await db.get(Session, session_id)
+        assert stored.end_time is not None
+
+
+async def test_stop_drains_queue(session_factory):
+    """Stopping the sink writes everything still queued."""
+    sink = EventSink(
+        batch_size=7, flush_interval=60, session_factory=session_factory
+    )
+    await sink.start()
+    for _ in range(25):
+        await sink.put(Attack, _attack_row())
+    await sink.stop()
+    assert await _count(session_factory, Attack) == 25
+    assert sink.running is False
+
+
+async def test_put_without_start_writes_directly(session_factory):
+    """An idle sink falls back to writing each event immediately."""
+    sink = EventSink(session_factory=session_factory)
+    await sink.put(Attack, _attack_row())
+    assert await _count(session_factory, Attack) == 1
+
+
+async def test_put_nowait_drops_when_full(session_factory):
+    """put_nowait reports a full queue instead of blocking."""
+    sink = EventSink(
+        batch_size=100,
+        flush_interval=60,
+        max_queue_size=2,
+        session_factory=session_factory,
+    )
+    await sink.start()
+    results = [sink.put_nowait(Attack, _attack_row()) for _ in range(5)]
+    assert results.count(False) >= 1
+    await sink.stop()
+
+
+class _FlakySessionFactory:
+    """Session factory that fails until ``available`` is set."""
+
+    def __init__(self, factory):
+        self.factory = factory
+        self.available = False
+
+    def __call__(self):
+        if not self.available:
+            raise ConnectionRefusedError("database is down")
+        return self.factory()
+
+
+async def test_spools_and_replays_when_database_recovers(
+    session_factory, tmp_path
+):
+    """Batches are spooled while the database is down, then replayed."""
+    from tenebrinet.core.spool import EventSpool
+
+    flaky = _FlakySessionFactory(session_factory)
+    spool = EventSpool(str(tmp_path / "spool"), fsync_interval=0)
+    sink = EventSink(
+        batch_size=5,
+        flush_interval=0.01,
+        session_factory=flaky,
+        spool=spool,
+        spool_replay_interval=60,
+    )
+    await sink.start()
+    for _ in range(12):
+        await sink.put(Attack, _attack_row())
+    await sink.flush()
+    for _ in range(50):
+        if sink.pending == 0:
+            break
+        await asyncio.sleep(0.02)
+    await asyncio.sleep(0.05)
+
+    assert sink._spooling is True
+    assert spool.has_backlog
+    assert await _count(session_factory, Attack) == 0
+
+    flaky.available = True
+    assert await sink.replay() is True
+    assert await _count(session_factory, Attack) == 12
+    assert not spool.has_backlog
+
+    # Live writes resume once the spool is drained
+    await sink.put(Attack, _attack_row())
+    await sink.stop()
+    assert await _count(session_factory, Attack) == 13
+
+
+async def test_spool_is_synced_on_a_timer(session_factory, tmp_path):
+    """Spooled writes are fsynced even when no further append arrives."""
+    from tenebrinet.core.sink import Event
+    from tenebrinet.core.spool import EventSpool
+
+    spool = EventSpool(str(tmp_path / "spool"), fsync_interval=0.05)
+    sink = EventSink(
+        session_factory=session_factory,
+        spool=spool,
+        spool_replay_interval=60,
+    )
+    await sink.start()
+    sink._spooling = True
+    for _ in range(2):
+        await sink._write([Event("insert", Attack, _attack_row())])
+    assert spool._dirty
+
+    await asyncio.sleep(0.2)
+    assert not spool._dirty
+    await sink.stop()
+
+
+async def test_spooling_throughput(session_factory, tmp_path):
+    """Spooling keeps up with a burst of events."""
+    import time
+
+    from tenebrinet.core.sink import Event
+    from tenebrinet.core.spool import EventSpool
+
+    sink = EventSink(
+        session_factory=session_factory,
+        spool=EventSpool(str(tmp_path / "spool"), fsync_interval=1.0),
+    )
+    sink._spooling = True
+    batch = [Event("insert", Attack, _attack_row()) for _ in range(500)]
+
+    started = time.perf_counter()
+    for _ in range(20):
+        await sink._write(batch)
+    elapsed = time.perf_counter() - started
+
+    assert sink.spool.has_backlog
+    # 10k events should spool in well under a second
+    assert elapsed < 5
+
+
+@pytest.mark.parametrize(
+    "error,expected",
+    [
+        (ConnectionRefusedError("down"), True),
+        (OperationalError("SELECT 1", {}, Exception("gone")), True),
+        (TypeError("not serializable"), False),
+        (IntegrityError("INSERT", {}, Exception("duplicate")), False),
+    ],
+)
+def test_is_transient(error, expected):
+    """Only connection and operational failures are retried."""
+    assert is_transient(error) is expected
+
+
+async def test_rejected_batch_is_dead_lettered(tmp_path):
+    """Batches failing for non-connection reasons are not spooled."""
+    from tenebrinet.core.spool import EventSpool
+
+    def broken_factory():
+        raise ValueError("bug in the write path")
+
+    spool = EventSpool(str(tmp_path / "spool"), fsync_interval=0)
+    sink = EventSink(session_factory=broken_factory, spool=spool)
+    await sink.put(Attack, _attack_row())
+
+    assert sink._spooling is False
+    assert not spool.has_backlog
+    dead = [p for _, p in spool.read(tmp_path / "spool" / "dead-letter.spool")]
+    assert len(dead) == 1
+    assert decode_records(dead[0])[0]["table"] == "attacks"
+
+
+async def test_replay_quarantines_failing_record(session_factory, tmp_path):
+    """A record failing replay repeatedly is set aside, not retried."""
+    from tenebrinet.core.spool import EventSpool
+
+    spool = EventSpool(str(tmp_path / "spool"), fsync_interval=0)
+    spool.append(encode_records([
+        {"op": "insert", "table": "no_such_table", "values": {}},
+    ]))
+    spool.append(encode_records([
+        {"op": "insert", "table": "attacks", "values": _attack_row()},
+    ]))
+    sink = EventSink(
+        session_factory=session_factory,
+        spool=spool,
+        max_replay_attempts=2,
+    )
+    sink._spooling = True
+
+    assert await sink.replay() is False
+    assert await _count(session_factory, Attack) == 0
+    assert await sink.replay() is True
+    assert await _count(session_factory, Attack) == 1
+    assert sink._spooling is False
+    dead = list(spool.read(tmp_path / "spool" / "dead-letter.spool"))
+    assert len(dead) == 1
+
+
+async def test_rejected_event_does_not_drop_its_batch(
+    session_factory, tmp_path
+):
+    """Only the event the database rejects is dead-lettered."""
+    from tenebrinet.core.sink import Event
+    from tenebrinet.core.spool import EventSpool
+
+    existing = _attack_row()
+    sink = EventSink(session_factory=session_factory)
+    await sink.put(Attack, existing)
+
+    spool = EventSpool(str(tmp_path / "spool"), fsync_interval=0)
+    sink.spool = spool
+    batch = [Event("insert", Attack, _attack_row()) for _ in range(6)]
+    attack = _attack_row()
+    batch += [
+        # Duplicate primary key, rejected by the database
+        Event("insert", Attack, dict(existing)),
+        Event("insert", Attack, attack),
+        Event("insert", Credential, {
+            "id": uuid.uuid4(),
+            "attack_id": attack["id"],
+            "username": "root",
+            "password": "toor",
+            "success": False,
+        }),
+    ]
+    await sink._write(batch)
+
+    assert await _count(session_factory, Attack) == 8
+    assert await _count(session_factory, Credential) == 1
+    assert sink._spooling is False
+    dead = [p for _, p in spool.read(tmp_path / "spool" / "dead-letter.spool")]
+    assert len(dead) == 1
+    assert decode_records(dead[0])[0]["values"]["id"] == existing["id"]
@@ -83,6 +83,19 @@ class TestFeatureExtractor:
         assert df.iloc[0]["is_scanner"] == 1
         assert df.iloc[0]["service"] == "http"
 
+    def test_keywords_counted_after_decoding(self):
+        """Test encoded payloads count the same keywords as plain ones."""
+        extractor = FeatureExtractor()
+        data = [
+            {"service": "http", "payload": {"query": "q=<script>"}},
+            {"service": "http", "payload": {"query": "q=%253cSCRIPT%253e"}},
+        ]
+
+        df = extractor._preprocess(data)
+
+        assert df.iloc[0]["xss_keywords"] == 1
+        assert df.iloc[1]["xss_keywords"] == 1
+
 
 class TestThreatClassifier:
     """Tests for ThreatClassifier."""
@@ -0,0 +1,396 @@
+# tests/unit/services/test_detection.py
+"""
+Unit tests for the HTTP honeypot threat matcher.
+"""
+import asyncio
+from concurrent.futures import Future
+import functools
+import re
+import threading
+from urllib.parse import unquote
+from pathlib import Path
+
+from prometheus_client import REGISTRY
+import pytest
+
+from tenebrinet.services.http.detection import (
+    ATTACK_PATTERNS,
+    PROBE,
+    SignatureRules,
+    ThreatDetector,
+    ThreatMatcher,
+)
+from tenebrinet.utils.normalization import canonicalize
+
+
+LEGACY_SQL_PATTERNS = [
+    r"(\%27)|(\')|(\-\-)|(\%23)|(#)",
+    r"((\%3D)|(=))[^\n]*((\%27)|(\')|(\-\-)|(\%3B)|(;))",
+    r"\w*((\%27)|(\'))((\%6F)|o|(\%4F))((\%72)|r|(\%52))",
+]
+
+
+@pytest.fixture
+def matcher():
+    """Create a matcher over the built-in signatures."""
+    return ThreatMatcher()
+
+
+class TestThreatMatcher:
+    """Tests for ThreatMatcher."""
+
+    @pytest.mark.parametrize(
+        "query,expected",
+        [
+            ("id=1' OR '1'='1", "sql_injection"),
+            ("q=1 UNION SELECT a FROM b", "sql_injection"),
+            ("q=<SCRIPT>alert(1)</SCRIPT>", "xss"),
+            ("file=../../etc/passwd", "path_traversal"),
+            ("host=x|whoami", "command_injection"),
+            ("page=PHP://filter", "lfi_rfi"),
+        ],
+    )
+    def test_classifies_attacks(self, matcher, query, expected):
+        """Test attack categories are detected case-insensitively."""
+        assert matcher.classify("/page", query) == expected
+
+    def test_reports_every_category(self, matcher):
+        """Test all matching categories are returned in priority order."""
+        found = matcher.match(
+            "/wp-admin/edit.php",
+            "q=<script>x</script>&f=../../etc/passwd",
+            user_agent="sqlmap/1.7",
+        )
+
+        assert found == [
+            "xss", "path_traversal", "lfi_rfi", "reconnaissance", "scanner"
+        ]
+
+    def test_body_is_matched(self, matcher):
+        """Test the request body is searched."""
+        assert matcher.match("/contact", body="<svg x onload=alert(1)>") == [
+            "xss"
+        ]
+
+    def test_reconnaissance_and_scanner(self, matcher):
+        """Test path probes and scanner user agents."""
+        assert matcher.classify("/.ENV") == "reconnaissance"
+        assert matcher.classify("/", user_agent="Nikto/2.5") == "scanner"
+
+    def test_benign_request_is_probe(self, matcher):
+        """Test requests matching nothing are probes."""
+        found = matcher.match("/about", "page=2", "name=bob", "Mozilla/5.0")
+
+        assert found == []
+        assert matcher.classify("/about") == PROBE
+
+    def test_custom_signatures(self):
+        """Test signatures can be supplied."""
+        matcher = ThreatMatcher(
+            attack_patterns={"log4shell": [r"\$\{jndi:"]},
+            suspicious_paths=["/Solr"],
+            scanner_signatures=["Censys"],
+        )
+
+        assert matcher.match(
+            "/solr/admin", "x=${JNDI:ldap://a}", user_agent="censysinspect"
+        ) == ["log4shell", "reconnaissance", "scanner"]
+
+    @pytest.mark.parametrize(
+        "text",
+        [
+            "id=1'",
+            "a=%27x",
+            "x--",
+            "q=%23",
+            "a=b;",
+            "a%3db%3b",
+            "x=1 or 2",
+            "name=o'reilly",
+            "x' or 1",
+            "%27%4f%72",
+            "%2527or",
+            "plain text",
+        ],
+    )
+    def test_sql_rewrites_match_original_patterns(self, text):
+        """Test the canonical SQL signatures agree with the originals."""
+        canonical = canonicalize(text, plus_as_space=True)
+        for legacy, pattern in zip(
+            LEGACY_SQL_PATTERNS, ATTACK_PATTERNS["sql_injection"]
+        ):
+            expected = bool(re.search(legacy, unquote(text), re.IGNORECASE))
+            assert bool(re.search(pattern, canonical)) == expected
+
+    def test_query_and_body_are_matched_separately(self, matcher):
+        """Test a signature cannot pair the query with the body."""
+        assert matcher.match("/form", "a=1", body="x;") == []
+        assert matcher.match("/form", "a=1;x") == [
+            "sql_injection", "command_injection"
+        ]
+
+
+class TestThreatDetector:
+    """Tests for ThreatDetector."""
+
+    async def test_small_requests_are_matched_inline(self):
+        """Test small requests do not start worker processes."""
+        detector = ThreatDetector(inline_max_chars=1000)
+
+        assert await detector.classify("/", "id=1'") == "sql_injection"
+        assert detector._executor is None
+
+    async def test_large_requests_are_offloaded(self):
+        """Test large requests are matched in a worker process."""
+        detector = ThreatDetector(inline_max_chars=100, workers=1)
+        body = "x" * 5000 + "<script>alert(1)</script>"
+        try:
+            found = await detector.match("/contact", body=body)
+        finally:
+            detector.close()
+
+        assert found == ["xss"]
+        assert detector.queue_depth == 0
+
+    async def test_budget_and_queue_limit(self):
+        """Test runaway matches stop and overflow is matched inline."""
+        detector = ThreatDetector(
+            matcher=ThreatMatcher(attack_patterns={"redos": [r"(a+)+$"]}),
+            inline_max_chars=10,
+            workers=1,
+            cpu_budget=0.1,
+            max_queue=1,
+        )
+        body = "a" * 40 + "b"
+        try:
+            first, second = await asyncio.gather(
+                detector.match("/", body=body),
+                detector.match("/", body=body),
+            )
+        finally:
+            detector.close()
+
+        # Both fall back to matching the first 10 characters inline,
+        # which end in "a"
+        assert first == second == ["redos"]
+        assert detector.timeouts == 1
+
+    async def test_pending_set_is_updated_on_the_loop(self):
+        """Test finished offloads are removed by the event loop thread."""
+        detector = ThreatDetector()
+        future = Future()
+        detector._pending.add(future)
+        future.add_done_callback(
+            functools.partial(detector._done, asyncio.get_running_loop())
+        )
+        threads = []
+        finished = detector._finished
+
+        def record(done):
+            threads.append(threading.current_thread())
+            finished(done)
+
+        detector._finished = record
+        worker = threading.Thread(target=future.set_result, args=([],))
+        worker.start()
+        worker.join()
+        await asyncio.sleep(0)
+
+        assert threads == [threading.main_thread()]
+        assert detector.queue_depth == 0
+
+
+class TestSignatureRules:
+    """Tests for rule files, reloading and rule counters."""
+
+    def _write(self, path, patterns):
+        lines = ["attacks:", "  custom:"]
+        for name, pattern in patterns:
+            lines += [f"    - name: {name}", f"      pattern: '{pattern}'"]
+        path.write_text("\n".join(lines) + "\n")
+
+    def test_shipped_rules_match_builtin_signatures(self):
+        """Test config/http_rules.yml holds the built-in signatures."""
+        rules = SignatureRules(
+            str(Path(__file__).parents[3] / "config" / "http_rules.yml")
+        )
+        rules.load()
+        builtin = ThreatMatcher()
+
+        assert {
+            category: [pattern for _, pattern in specs]
+            for category, specs in rules.matcher.attack_patterns.items()
+        } == ATTACK_PATTERNS
+        assert rules.matcher.suspicious_paths == builtin.suspicious_paths
+        assert rules.matcher.scanner_signatures == builtin.scanner_signatures
+
+    def test_rules_count_hits_and_time(self):
+        """Test each rule counts its matches and evaluation time."""
+        matcher = ThreatMatcher(
+            attack_patterns={"xss": [("first", "<script"), ("second", "x")]}
+        )
+        matcher.match("/", "q=<script>")
+        matcher.match("/", "q=x")
+
+        stats = {rule.name: rule for rule in matcher.rules}
+        assert stats["first"].hits == 1
+        assert stats["second"].hits == 1
+        assert stats["first"].eval_ns > 0
+        assert stats["suspicious_paths"].hits == 0
+
+    def test_invalid_rules_are_rejected(self):
+        """Test bad patterns and duplicate names raise ValueError."""
+        with pytest.raises(ValueError):
+            ThreatMatcher(attack_patterns={"a": [("bad", "(")]})
+        with pytest.raises(ValueError):
+            ThreatMatcher(
+                attack_patterns={"a": [("x", "1")], "b": [("x", "2")]}
+            )
+
+    def test_reload_on_change(self, tmp_path):
+        """Test changed files are swapped in and broken ones skipped."""
+        path = tmp_path / "rules.yml"
+        self._write(path, [("evil", "evil")])
+        rules = SignatureRules(str(path))
+        rules.load()
+        assert rules.matcher.classify("/evil") == "custom"
+        assert not rules.reload_if_changed()
+
+        self._write(path, [("wicked", "wicked"), ("other", "other")])
+        assert rules.reload_if_changed()
+        assert rules.matcher.classify("/evil") == PROBE
+        assert rules.matcher.classify("/wicked") == "custom"
+
+        current = rules.matcher
+        path.write_text("attacks: [unbalanced\n")
+        assert not rules.reload_if_changed()
+        assert rules.matcher is current
+
+    def test_export_stats(self, tmp_path):
+        """Test rule counters are exported to Prometheus once."""
+        path = tmp_path / "rules.yml"
+        self._write(path, [("exported_rule", "boom")])
+        rules = SignatureRules(str(path))
+        rules.load()
+        labels = {"category": "custom", "rule": "exported_rule"}
+
+        def hits():
+            return REGISTRY.get_sample_value(
+                "tenebrinet_http_rule_hits_total", labels
+            ) or 0
+
+        before = hits()
+        rules.matcher.match("/boom")
+        rules.export_stats()
+        rules.export_stats()
+
+        assert hits() == before + 1
+        assert rules.stats()[0]["hits"] == 1
+
+    def test_detector_restarts_workers_on_reload(self, tmp_path):
+        """Test worker pools are replaced when the rules change."""
+        path = tmp_path / "rules.yml"
+        self._write(path, [("one", "one")])
+        rules = SignatureRules(str(path))
+        rules.load()
+        detector = ThreatDetector(rules=rules)
+        try:
+            pool = detector._pool()
+            assert detector._pool() is pool
+
+            self._write(path, [("two", "two"), ("three", "three")])
+            rules.reload_if_changed()
+            assert detector._pool() is not pool
+        finally:
+            detector.close()
+
+
+class TestCanonicalInput:
+    """Tests for matching encoded requests."""
+
+    @pytest.mark.parametrize(
+        "path,query,expected",
+        [
+            ("/download", "f=%252e%252e%252fetc%252fpasswd", "path_traversal"),
+            ("/page", "q=%u003cscript%u003e", "xss"),
+            ("/page", "q=%26lt%3bsvg/onload%3dx%26gt%3b", "xss"),
+            ("/%2e%65nv", "", "reconnaissance"),
+        ],
+    )
+    def test_encoded_attacks_are_detected(
+        self, matcher, path, query, expected
+    ):
+        """Test encoded payloads match the plain signatures."""
+        assert matcher.classify(path, query) == expected
+
+
+class TestVerdictCache:
+    """Tests for the detector's verdict cache."""
+
+    def _hits(self, detector):
+        return sum(rule.hits for rule in detector.matcher.rules)
+
+    async def test_repeated_requests_skip_matching(self):
+        """Test identical requests are answered from the cache."""
+        detector = ThreatDetector(matcher=ThreatMatcher())
+
+        first = await detector.match("/x", "id=1'", user_agent="sqlmap")
+        hits = self._hits(detector)
+        second = await detector.match("/X", "id=1%27", user_agent="SQLMAP")
+
+        assert first == second == ["sql_injection", "scanner"]
+        assert self._hits(detector) == hits
+        assert len(detector._cache) == 1
+
+    async def test_miss_canonicalizes_once(self, monkeypatch):
+        """Test a cache miss canonicalizes each input only once."""
+        calls = []
+
+        def counting(text, plus_as_space=False):
+            calls.append(text)
+            return canonicalize(text, plus_as_space=plus_as_space)
+
+        monkeypatch.setattr(
+            "tenebrinet.services.http.detection.canonicalize", counting
+        )
+        detector = ThreatDetector(matcher=ThreatMatcher())
+
+        found = await detector.match(
+            "/form", "a=1", body="x=%3Cscript%3E", user_agent="curl"
+        )
+
+        assert found == ["xss"]
+        assert calls == ["/form", "a=1", "x=%3Cscript%3E", "curl"]
+
+    async def test_key_covers_method_and_body(self):
+        """Test requests differing in method or body are matched again."""
+        detector = ThreatDetector(matcher=ThreatMatcher())
+
+        assert await detector.match("/form", body="a=b") == []
+        assert await detector.match("/form", body="a=<script>") == ["xss"]
+        await detector.match("/form", body="a=b", method="POST")
+
+        assert len(detector._cache) == 3
+
+    async def test_reload_clears_cache(self, tmp_path):
+        """Test cached verdicts are dropped when the rules change."""
+        path = tmp_path / "rules.yml"
+        path.write_text("attacks:\n  custom: [evil]\n")
+        rules = SignatureRules(str(path))
+        rules.load()
+        detector = ThreatDetector(rules=rules)
+        assert await detector.classify("/evil") == "custom"
+
+        path.write_text("attacks:\n  custom: [wicked]\n")
+        rules.reload_if_changed()
+
+        assert await detector.classify("/evil") == PROBE
+
+    async def test_cache_can_be_disabled(self):
+        """Test a cache size of 0 matches every request."""
+        detector = ThreatDetector(matcher=ThreatMatcher(), cache_entries=0)
+
+        await detector.match("/", "id=1'")
+        await detector.match("/", "id=1'")
+
+        assert self._hits(detector) == 2
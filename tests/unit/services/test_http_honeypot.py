@@ -104,3 +104,90 @@ class TestAttackPatterns:
         assert "/wp-admin" in SUSPICIOUS_PATHS
         assert "/.env" in SUSPICIOUS_PATHS
         assert "/phpmyadmin" in SUSPICIOUS_PATHS
+
+
+class TestBackgroundRecording:
+    """Tests for fire-and-forget attack recording."""
+
+    async def _client(self, honeypot):
+        from aiohttp import web
+        from aiohttp.test_utils import TestClient, TestServer
+
+        honeypot.app = web.Application(
+            middlewares=[honeypot._request_logger_middleware]
+        )
+        honeypot._setup_routes()
+        client = TestClient(TestServer(honeypot.app))
+        await client.start_server()
+        return client
+
+    async def test_response_does_not_wait_for_recording(self, http_config):
+        """The response is sent while the recording is still pending."""
+        import asyncio
+
+        honeypot = HTTPHoneypot(http_config)
+        release = asyncio.Event()
+
+        async def slow_record(**kwargs):
+            await release.wait()
+
+        honeypot._record_attack = slow_record
+        client = await self._client(honeypot)
+        try:
+            resp = await asyncio.wait_for(client.get("/"), timeout=2)
+            assert resp.status == 200
+            assert len(honeypot._pending_records) == 1
+        finally:
+            release.set()
+            await asyncio.sleep(0)
+            await client.close()
+        assert honeypot.record_limit_hits == 0
+
+    async def test_pending_limit_records_inline(self):
+        """Past the pending limit, recording falls back to inline."""
+        import asyncio
+
+        config = HTTPServiceConfig(
+            host="127.0.0.1", port=8080, max_pending_records=1
+        )
+        honeypot = HTTPHoneypot(config)
+        release = asyncio.Event()
+        recorded = []
+
+        async def record(**kwargs):
+            recorded.append(kwargs["threat_type"])
+            if len(recorded) == 1:
+                await release.wait()
+
+        honeypot._record_attack = record
+        client = await self._client(honeypot)
+        try:
+            await client.get("/")
+            await client.get("/robots.txt")
+            assert honeypot.record_limit_hits == 1
+            assert len(recorded) == 2
+        finally:
+            release.set()
+            await asyncio.sleep(0)
+            await client.close()
+
+    async def test_inline_mode_records_before_handler(self):
+        """With background recording disabled nothing is left pending."""
+        config = HTTPServiceConfig(
+            host="127.0.0.1", port=8080, background_recording=False
+        )
+        honeypot = HTTPHoneypot(config)
+        recorded = []
+
+        async def record(**kwargs):
+            recorded.append(kwargs["client_ip"])
+
+        honeypot._record_attack = record
+        client = await self._client(honeypot)
+        try:
+            resp = await client.get("/")
+            assert resp.status == 200
+            assert len(recorded) == 1
+            assert not honeypot._pending_records
+        finally:
+            await client.close()
@@ -69,3 +69,83 @@ class TestSSHHoneypotServer:
         assert server.honeypot == ssh_honeypot
         assert server.client_ip is None
         assert server.attack_id is None
+
+
+class TestSSHHoneypotSession:
+    """Tests for the buffered command log."""
+
+    @pytest.fixture
+    def sink(self):
+        """Patch the event sink with a recorder."""
+        from unittest.mock import AsyncMock, patch
+
+        with patch("tenebrinet.services.ssh.server.event_sink") as sink:
+            sink.put = AsyncMock()
+            sink.put_update = AsyncMock()
+            yield sink
+
+    @pytest.fixture
+    def session(self, ssh_honeypot):
+        import uuid
+
+        from tenebrinet.services.ssh.server import SSHHoneypotSession
+
+        sess = SSHHoneypotSession(SSHHoneypotServer(ssh_honeypot))
+        sess.session_id = uuid.uuid4()
+        return sess
+
+    async def test_commands_are_buffered(self, session, sink):
+        """Commands below the flush size are held in memory."""
+        await session._record_command("whoami")
+        await session._record_command("id")
+        sink.put.assert_not_called()
+        assert [c["seq"] for c in session._command_buffer] == [1, 2]
+
+    async def test_flush_at_batch_size(self, session, sink):
+        """A full buffer is appended to the command log."""
+        from tenebrinet.core.models import SessionCommand
+        from tenebrinet.services.ssh.server import COMMAND_FLUSH_SIZE
+
+        for i in range(COMMAND_FLUSH_SIZE):
+            await session._record_command(f"cmd{i}")
+        assert sink.put.await_count == COMMAND_FLUSH_SIZE
+        model, row = sink.put.await_args_list[0].args
+        assert model is SessionCommand
+        assert row["command"] == "cmd0"
+        assert session._command_buffer == []
+
+    async def test_close_flushes_remaining_commands(self, session, sink):
+        """Closing the session flushes the buffer and records end time."""
+        await session._record_command("uname -a")
+        await session._close_session()
+        await session._close_session()  # second close is a no-op
+
+        assert sink.put.await_count == 1
+        sink.put_update.assert_awaited_once()
+        assert "end_time" in sink.put_update.await_args.args[1]
+
+    async def test_command_after_close_is_written(self, session, sink):
+        """A command finishing after the final flush is not left behind."""
+        await session._record_command("id")
+        await session._close_session()
+        await session._record_command("uname -a")
+
+        assert [
+            call.args[1]["command"] for call in sink.put.await_args_list
+        ] == ["id", "uname -a"]
+        assert session._command_buffer == []
+
+    async def test_stop_waits_for_session_close(
+        self, ssh_honeypot, session, sink
+    ):
+        """A close started by a dropped connection finishes before stop."""
+        ssh_honeypot._running = True
+        await session._record_command("uname -a")
+        session.connection_lost(None)
+        assert ssh_honeypot._pending_closes
+
+        await ssh_honeypot.stop()
+
+        sink.put.assert_awaited_once()
+        sink.put_update.assert_awaited_once()
+        assert not ssh_honeypot._pending_closes
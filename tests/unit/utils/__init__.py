@@ -0,0 +1,2 @@
+# tests/unit/utils - Utility unit tests
+"""Unit tests for TenebriNET utility modules."""
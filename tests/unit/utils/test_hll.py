@@ -0,0 +1,49 @@
+# tests/unit/utils/test_hll.py
+"""Unit tests for the HyperLogLog sketch."""
+import pytest
+
+from tenebrinet.utils.hll import HyperLogLog
+
+
+def test_empty_sketch():
+    """An empty sketch counts zero."""
+    assert HyperLogLog().count() == 0
+
+
+def test_small_counts_are_exact_enough():
+    """Linear counting keeps small cardinalities near exact."""
+    sketch = HyperLogLog()
+    sketch.update(f"10.0.0.{i}" for i in range(100))
+    sketch.update(f"10.0.0.{i}" for i in range(100))  # duplicates
+    assert sketch.count() == pytest.approx(100, abs=2)
+
+
+def test_large_count_within_error():
+    """Large cardinalities are within a few standard errors."""
+    sketch = HyperLogLog()
+    sketch.update(f"ip-{i}" for i in range(50000))
+    assert sketch.count() == pytest.approx(50000, rel=0.03)
+
+
+def test_merge_counts_union():
+    """Merged sketches estimate the size of the union."""
+    a, b = HyperLogLog(), HyperLogLog()
+    a.update(str(i) for i in range(0, 6000))
+    b.update(str(i) for i in range(3000, 9000))
+    a.merge(b)
+    assert a.count() == pytest.approx(9000, rel=0.03)
+
+
+def test_serialization_round_trip():
+    """Sketches survive serialization unchanged."""
+    sketch = HyperLogLog(precision=10)
+    sketch.update(str(i) for i in range(500))
+    restored = HyperLogLog.from_bytes(sketch.to_bytes())
+    assert restored.precision == 10
+    assert restored.count() == sketch.count()
+
+
+def test_merge_rejects_other_precision():
+    """Sketches of different precision cannot be merged."""
+    with pytest.raises(ValueError):
+        HyperLogLog(10).merge(HyperLogLog(12))
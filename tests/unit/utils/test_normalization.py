@@ -0,0 +1,58 @@
+# tests/unit/utils/test_normalization.py
+"""Unit tests for request input canonicalization."""
+import pytest
+
+from tenebrinet.utils import normalization
+from tenebrinet.utils.normalization import canonicalize, decode_once
+
+
+@pytest.mark.parametrize(
+    "raw,expected",
+    [
+        ("/%2e%2e%2fetc%2fpasswd", "/../etc/passwd"),
+        ("/%252e%252e%252fetc", "/../etc"),
+        ("%u003cscript%u003e", "<script>"),
+        ("\\u003cSVG onload=x\\x3e", "<svg onload=x>"),
+        ("&lt;script&gt;", "<script>"),
+        ("%26lt%3bimg%26gt%3b", "<img>"),
+        ("UNION\t\n  SELECT", "union select"),
+        ("＜script＞", "<script>"),
+        ("/plain/path", "/plain/path"),
+    ],
+)
+def test_canonicalize(raw, expected):
+    """Encoded variants reduce to one canonical form."""
+    assert canonicalize(raw) == expected
+
+
+def test_plus_is_a_space_only_when_asked():
+    """Query strings and form bodies decode + as a space."""
+    assert canonicalize("a+b") == "a+b"
+    assert canonicalize("a+b", plus_as_space=True) == "a b"
+
+
+def test_decoding_depth_is_limited():
+    """Encoding layers beyond the depth limit are left alone."""
+    raw = "'"
+    for _ in range(normalization.MAX_DECODE_DEPTH + 1):
+        raw = raw.replace("%", "%25").replace("'", "%27")
+
+    decoded = canonicalize(raw)
+
+    assert decoded != "'"
+    assert decode_once(decoded) == "'"
+
+
+def test_small_inputs_are_memoized():
+    """Repeated small inputs are served from the memo."""
+    raw = "/memo-test?id=%27"
+    canonicalize(raw)
+    hits = normalization.memo_info().hits
+    canonicalize(raw)
+    assert normalization.memo_info().hits == hits + 1
+
+    big = "x" * (normalization.MEMO_MAX_CHARS + 1)
+    misses = normalization.memo_info().misses
+    canonicalize(big)
+    canonicalize(big)
+    assert normalization.memo_info().misses == misses